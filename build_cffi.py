@@ -62,17 +62,69 @@ DECL void callback_conn_active(void *ctx);
 
 DECL void callback_log(void *ctx, const char *msg, size_t msg_len);
 
-DECL void gevent_wakeup(void);
+DECL void callback_batch(const batch_item *items);
 
-DECL void gevent_invoke(void);
+"""
+
+batch_types = r"""
+#define BATCH_SESSION_EVENT 0
+#define BATCH_EVENT         1
+#define BATCH_CLOSE         2
+#define BATCH_CONN_STATE    3
+#define BATCH_CONN_ACTIVE   4
+#define BATCH_LOG           5
 """
 
 cdef = r"""
 void free(void *);
 
-ninchat_session new_common_session(void *ctx);
+typedef struct session_context session_context;
+
+typedef struct batch_item {
+	const struct batch_item *next;
+	session_context *context;
+	int type;
+	bool last_reply;
+	const char *data;
+	size_t data_len;
+	const ninchat_frame *payload;
+	unsigned int payload_len;
+	unsigned int dropped;
+} batch_item;
+
+""" + batch_types + r"""
+
+session_context *new_session_context(void *ctx, bool batch);
+
+void delete_session_context(session_context *context);
+
+void *session_context_handle(const session_context *context);
+
+int set_event_filter(
+		session_context *context,
+		const char *const events[],
+		const char *const message_types[],
+		unsigned int count);
+
+bool filter_event(session_context *context, const char *params, size_t params_len);
+
+ninchat_session new_common_session(session_context *context);
+
+ninchat_session new_batch_session(session_context *context);
+
+typedef struct send_action {
+	const char *params;
+	size_t params_len;
+	const ninchat_frame *payload;
+	unsigned int payload_len;
+} send_action;
 
-ninchat_session new_gevent_session(void *ctx);
+char *send_actions(
+		ninchat_session s,
+		const send_action actions[],
+		unsigned int count,
+		int64_t action_ids[],
+		unsigned int *sent);
 
 void set_payload_frame(
 		ninchat_frame payload[],
@@ -80,6 +132,12 @@ void set_payload_frame(
 		const void *frame_data,
 		size_t frame_size);
 
+void set_payload_frames(
+		ninchat_frame payload[],
+		const void *const frame_data[],
+		const size_t frame_size[],
+		unsigned int count);
+
 const ninchat_frame *payload_frame(const ninchat_frame vec[], unsigned int i);
 
 const char *frame_data(const ninchat_frame *frame);
@@ -99,31 +157,364 @@ with open("go/src/github.com/ninchat/ninchat-go/include/ninchat.h") as f:
             header += line
 
 source = r"""
+#include <stdbool.h>
 #include <stddef.h>
+#include <stdlib.h>
 #include <string.h>
 
 #include <pthread.h>
 
 #include <ninchat.h>
 
+""" + batch_types + r"""
+
+struct session_context;
+
+typedef struct batch_item {
+	const struct batch_item *next;
+	struct session_context *context;
+	int type;
+	bool last_reply;
+	const char *data;
+	size_t data_len;
+	const ninchat_frame *payload;
+	unsigned int payload_len;
+	unsigned int dropped;
+} batch_item;
+
 """ + python_callbacks.replace("DECL", "static") + r"""
 
-#define COMMON_CALLBACK_PROLOGUE \
-	PyGILState_STATE gstate = PyGILState_Ensure(); \
-	Py_BEGIN_ALLOW_THREADS
+/*
+ * Every session has a native context which is passed to the library as
+ * the callback context.  It holds the Python handle and the event filter.
+ */
+
+typedef struct event_filter {
+	unsigned int count;
+	struct {
+		const char *event;
+		const char *message_type; /* NULL matches any */
+	} rules[];
+} event_filter;
+
+typedef struct session_context {
+	void *handle;
+	unsigned int refs;
+	pthread_mutex_t filter_lock;
+	event_filter *filter;
+	batch_item *close_item; /* preallocated for batch sessions */
+	unsigned int dropped;   /* events lost since the last queued item */
+} session_context;
+
+/* Protects the batch queue and session context reference counts. */
+static pthread_mutex_t batch_lock = PTHREAD_MUTEX_INITIALIZER;
+
+static session_context *new_session_context(void *handle, bool batch)
+{
+	session_context *context = calloc(1, sizeof (session_context));
+	if (context) {
+		if (batch) {
+			/* The close item of a batch session can't be lost. */
+			context->close_item = malloc(sizeof (batch_item) + 1);
+			if (context->close_item == NULL) {
+				free(context);
+				return NULL;
+			}
+		}
+
+		context->handle = handle;
+		context->refs = 1;
+		pthread_mutex_init(&context->filter_lock, NULL);
+	}
+	return context;
+}
+
+static void unref_session_context_locked(session_context *context)
+{
+	if (--context->refs == 0) {
+		pthread_mutex_destroy(&context->filter_lock);
+		free(context->filter);
+		free(context->close_item);
+		free(context);
+	}
+}
+
+static void delete_session_context(session_context *context)
+{
+	pthread_mutex_lock(&batch_lock);
+	context->handle = NULL;
+	unref_session_context_locked(context);
+	pthread_mutex_unlock(&batch_lock);
+}
+
+static void *session_context_handle(const session_context *context)
+{
+	void *handle;
+
+	/* Cleared by delete_session_context on another thread. */
+	pthread_mutex_lock(&batch_lock);
+	handle = context->handle;
+	pthread_mutex_unlock(&batch_lock);
+
+	return handle;
+}
+
+static int set_event_filter(
+		session_context *context,
+		const char *const events[],
+		const char *const message_types[],
+		unsigned int count)
+{
+	size_t size = sizeof (event_filter) + count * sizeof (context->filter->rules[0]);
+	event_filter *filter = NULL;
+	event_filter *old;
+	unsigned int i;
+	char *buf;
+
+	if (count) {
+		for (i = 0; i < count; i++) {
+			size += strlen(events[i]) + 1;
+			if (message_types[i])
+				size += strlen(message_types[i]) + 1;
+		}
+
+		filter = malloc(size);
+		if (filter == NULL)
+			return -1;
+
+		filter->count = count;
+		buf = (char *) &filter->rules[count];
+
+		for (i = 0; i < count; i++) {
+			filter->rules[i].event = strcpy(buf, events[i]);
+			buf += strlen(buf) + 1;
+
+			if (message_types[i]) {
+				filter->rules[i].message_type = strcpy(buf, message_types[i]);
+				buf += strlen(buf) + 1;
+			} else {
+				filter->rules[i].message_type = NULL;
+			}
+		}
+	}
+
+	pthread_mutex_lock(&context->filter_lock);
+	old = context->filter;
+	__atomic_store_n(&context->filter, filter, __ATOMIC_RELEASE);
+	pthread_mutex_unlock(&context->filter_lock);
+
+	free(old);
+	return 0;
+}
+
+typedef struct json_param {
+	const char *key;
+	bool found;
+	const char *value; /* NULL unless a string without escapes */
+	size_t value_len;
+} json_param;
 
-#define COMMON_CALLBACK_EPILOGUE \
-	Py_END_ALLOW_THREADS \
-	PyGILState_Release(gstate);
+static const char *skip_space(const char *p, const char *end)
+{
+	while (p < end && (*p == ' ' || *p == '\t' || *p == '\n' || *p == '\r'))
+		p++;
+	return p;
+}
+
+/* Returns the position after the string which starts at p, or NULL. */
+static const char *skip_string(const char *p, const char *end, bool *escaped)
+{
+	*escaped = false;
+
+	for (p++; p < end; p++) {
+		if (*p == '\\') {
+			*escaped = true;
+			p++;
+		} else if (*p == '"') {
+			return p + 1;
+		}
+	}
+
+	return NULL;
+}
+
+/* Returns the position of the comma or brace which ends the object member
+ * value which starts at p, or NULL. */
+static const char *skip_value(const char *p, const char *end)
+{
+	unsigned int depth = 0;
+	bool escaped;
+
+	while (p < end) {
+		if (*p == '"') {
+			p = skip_string(p, end, &escaped);
+			if (p == NULL)
+				return NULL;
+		} else if (*p == '{' || *p == '[') {
+			depth++;
+			p++;
+		} else if (*p == '}' || *p == ']') {
+			if (depth == 0)
+				return p;
+			depth--;
+			p++;
+		} else if (*p == ',' && depth == 0) {
+			return p;
+		} else {
+			p++;
+		}
+	}
+
+	return NULL;
+}
+
+/*
+ * Looks up top-level keys of a JSON object in one pass.  Nested objects
+ * are skipped.  Returns false if unsure: the JSON isn't an object, a key
+ * has escapes, or a looked-up key occurs more than once.
+ */
+static bool scan_params(
+		const char *json,
+		size_t json_len,
+		json_param params[],
+		unsigned int count)
+{
+	const char *end = json + json_len;
+	const char *p = skip_space(json, end);
+	unsigned int i;
+
+	for (i = 0; i < count; i++) {
+		params[i].found = false;
+		params[i].value = NULL;
+		params[i].value_len = 0;
+	}
+
+	if (p == end || *p != '{')
+		return false;
+
+	p = skip_space(p + 1, end);
+	if (p < end && *p == '}')
+		return true;
+
+	for (;;) {
+		const char *key;
+		const char *value;
+		size_t key_len;
+		bool escaped;
+
+		if (p == end || *p != '"')
+			return false;
+
+		key = p + 1;
+		p = skip_string(p, end, &escaped);
+		if (p == NULL || escaped)
+			return false;
+		key_len = p - 1 - key;
+
+		p = skip_space(p, end);
+		if (p == end || *p != ':')
+			return false;
+
+		value = skip_space(p + 1, end);
+		p = skip_value(value, end);
+		if (p == NULL || p == value)
+			return false;
+
+		for (i = 0; i < count; i++) {
+			if (strlen(params[i].key) != key_len || memcmp(params[i].key, key, key_len) != 0)
+				continue;
+
+			if (params[i].found)
+				return false;
+			params[i].found = true;
+
+			if (*value == '"') {
+				const char *value_end = skip_string(value, end, &escaped);
+				if (!escaped) {
+					params[i].value = value + 1;
+					params[i].value_len = value_end - 1 - params[i].value;
+				}
+			}
+		}
+
+		if (*p == '}')
+			return true;
+
+		p = skip_space(p + 1, end);
+	}
+}
+
+static bool match_param(const char *pattern, const char *value, size_t value_len)
+{
+	size_t len = strlen(pattern);
+
+	if (len && pattern[len - 1] == '*')
+		return value_len >= len - 1 && memcmp(pattern, value, len - 1) == 0;
+
+	return value_len == len && memcmp(pattern, value, len) == 0;
+}
+
+/*
+ * Decides if an event should be dropped without calling into Python.
+ * Replies to actions are always delivered, and so is everything which
+ * can't be parsed with certainty.
+ */
+static bool filter_event(session_context *context, const char *params_json, size_t params_len)
+{
+	json_param params[] = {
+		{"event"},
+		{"action_id"},
+		{"message_type"},
+	};
+	const json_param *event = &params[0];
+	const json_param *action_id = &params[1];
+	const json_param *message_type = &params[2];
+	bool drop = false;
+	unsigned int i;
+
+	/* Avoid scanning the params when no filter has been set. */
+	if (__atomic_load_n(&context->filter, __ATOMIC_ACQUIRE) == NULL)
+		return false;
+
+	if (!scan_params(params_json, params_len, params, sizeof (params) / sizeof (params[0])))
+		return false;
+
+	if (event->value == NULL || action_id->found)
+		return false;
+
+	pthread_mutex_lock(&context->filter_lock);
+
+	if (context->filter) {
+		for (i = 0; i < context->filter->count && !drop; i++) {
+			if (!match_param(context->filter->rules[i].event, event->value, event->value_len))
+				continue;
+
+			if (context->filter->rules[i].message_type == NULL)
+				drop = true;
+			else if (message_type->value)
+				drop = match_param(context->filter->rules[i].message_type, message_type->value, message_type->value_len);
+		}
+	}
+
+	pthread_mutex_unlock(&context->filter_lock);
+
+	return drop;
+}
+
+#define HANDLE(ctx) (((session_context *) (ctx))->handle)
+
+/*
+ * The extern "Python" functions acquire the GIL (and create a thread
+ * state for a foreign thread) by themselves, so the shims call them
+ * directly: one GIL acquisition per callback.
+ */
 
 static void common_callback_session_event(
 		void *ctx,
 		const char *params,
 		size_t params_len)
 {
-	COMMON_CALLBACK_PROLOGUE
-	callback_session_event(ctx, params, params_len);
-	COMMON_CALLBACK_EPILOGUE
+	callback_session_event(HANDLE(ctx), params, params_len);
 }
 
 static void common_callback_event(
@@ -134,40 +525,33 @@ static void common_callback_event(
 		unsigned int payload_len,
 		bool last_reply)
 {
-	COMMON_CALLBACK_PROLOGUE
-	callback_event(ctx, params, params_len, payload, payload_len, last_reply);
-	COMMON_CALLBACK_EPILOGUE
+	if (filter_event(ctx, params, params_len))
+		return;
+
+	callback_event(HANDLE(ctx), params, params_len, payload, payload_len, last_reply);
 }
 
 static void common_callback_close(void *ctx)
 {
-	COMMON_CALLBACK_PROLOGUE
-	callback_close(ctx);
-	COMMON_CALLBACK_EPILOGUE
+	callback_close(HANDLE(ctx));
 }
 
 static void common_callback_conn_state(void *ctx, const char *state)
 {
-	COMMON_CALLBACK_PROLOGUE
-	callback_conn_state(ctx, state);
-	COMMON_CALLBACK_EPILOGUE
+	callback_conn_state(HANDLE(ctx), state);
 }
 
 static void common_callback_conn_active(void *ctx)
 {
-	COMMON_CALLBACK_PROLOGUE
-	callback_conn_active(ctx);
-	COMMON_CALLBACK_EPILOGUE
+	callback_conn_active(HANDLE(ctx));
 }
 
 static void common_callback_log(void *ctx, const char *msg, size_t msg_len)
 {
-	COMMON_CALLBACK_PROLOGUE
-	callback_log(ctx, msg, msg_len);
-	COMMON_CALLBACK_EPILOGUE
+	callback_log(HANDLE(ctx), msg, msg_len);
 }
 
-static ninchat_session new_common_session(void *ctx)
+static ninchat_session new_common_session(session_context *ctx)
 {
 	ninchat_session s = ninchat_session_new();
 	ninchat_session_on_session_event(s, common_callback_session_event, ctx);
@@ -179,44 +563,156 @@ static ninchat_session new_common_session(void *ctx)
 	return s;
 }
 
-static pthread_mutex_t gevent_lock = PTHREAD_MUTEX_INITIALIZER;
-
-static int gevent_invoke_py(void *dummy)
+/*
+ * Batch sessions append callback invocations to a process-wide queue
+ * without touching the interpreter.  A dedicated drain thread detaches
+ * everything queued so far and hands it to Python with a single
+ * callback_batch invocation, so a burst of events costs one GIL
+ * acquisition instead of one per event.  Queue order preserves the
+ * callback order of each session.
+ */
+
+static pthread_cond_t batch_cond = PTHREAD_COND_INITIALIZER;
+static pthread_once_t batch_once = PTHREAD_ONCE_INIT;
+static batch_item *batch_head;
+static batch_item *batch_tail;
+
+static void *batch_drain(void *dummy)
 {
 	(void) dummy;
 
-	Py_BEGIN_ALLOW_THREADS
-	pthread_mutex_lock(&gevent_lock);
+	for (;;) {
+		batch_item *items;
+		const batch_item *item;
+
+		pthread_mutex_lock(&batch_lock);
+		while (batch_head == NULL)
+			pthread_cond_wait(&batch_cond, &batch_lock);
+		items = batch_head;
+		batch_head = NULL;
+		batch_tail = NULL;
+		pthread_mutex_unlock(&batch_lock);
+
+		callback_batch(items);
+
+		pthread_mutex_lock(&batch_lock);
+		for (item = items; item; ) {
+			const batch_item *next = item->next;
+			unref_session_context_locked(item->context);
+			free((void *) item);
+			item = next;
+		}
+		pthread_mutex_unlock(&batch_lock);
+	}
+
+	return NULL;
+}
 
-	gevent_invoke();
+static void batch_start(void)
+{
+	pthread_t thread;
+	pthread_attr_t attr;
 
-	pthread_mutex_unlock(&gevent_lock);
-	Py_END_ALLOW_THREADS
+	pthread_attr_init(&attr);
+	pthread_attr_setdetachstate(&attr, PTHREAD_CREATE_DETACHED);
+	pthread_create(&thread, &attr, batch_drain, NULL);
+	pthread_attr_destroy(&attr);
+}
 
-	return 0;
+static size_t batch_item_size(
+		size_t data_len,
+		const ninchat_frame payload[],
+		unsigned int payload_len)
+{
+	size_t size = sizeof (batch_item) + payload_len * sizeof (ninchat_frame) + data_len + 1;
+	unsigned int i;
+
+	for (i = 0; i < payload_len; i++)
+		size += payload[i].size;
+
+	return size;
 }
 
-#define GEVENT_CALLBACK_PROLOGUE \
-	COMMON_CALLBACK_PROLOGUE \
-	pthread_mutex_lock(&gevent_lock);
+static void batch_queue(
+		batch_item *item,
+		session_context *context,
+		int type,
+		const char *data,
+		size_t data_len,
+		const ninchat_frame payload[],
+		unsigned int payload_len,
+		bool last_reply)
+{
+	ninchat_frame *frames = (ninchat_frame *) (item + 1);
+	char *buf = (char *) (frames + payload_len);
+	unsigned int i;
+
+	item->next = NULL;
+	item->context = context;
+	item->type = type;
+	item->last_reply = last_reply;
+	item->data = buf;
+	item->data_len = data_len;
+	item->payload = frames;
+	item->payload_len = payload_len;
+
+	if (data_len)
+		memcpy(buf, data, data_len);
+	buf[data_len] = '\0';
+	buf += data_len + 1;
+
+	for (i = 0; i < payload_len; i++) {
+		memset(&frames[i], 0, sizeof (ninchat_frame));
+		frames[i].data = buf;
+		frames[i].size = payload[i].size;
+		memcpy(buf, payload[i].data, payload[i].size);
+		buf += payload[i].size;
+	}
+
+	pthread_mutex_lock(&batch_lock);
+	item->dropped = context->dropped;
+	context->dropped = 0;
+	context->refs++;
+	if (batch_tail)
+		batch_tail->next = item;
+	else
+		batch_head = item;
+	batch_tail = item;
+	pthread_cond_signal(&batch_cond);
+	pthread_mutex_unlock(&batch_lock);
+}
 
-#define GEVENT_CALLBACK_EPILOGUE \
-	pthread_mutex_unlock(&gevent_lock); \
-	if (Py_AddPendingCall(gevent_invoke_py, NULL) == 0) \
-		gevent_wakeup(); \
-	COMMON_CALLBACK_EPILOGUE
+static void batch_push(
+		session_context *context,
+		int type,
+		const char *data,
+		size_t data_len,
+		const ninchat_frame payload[],
+		unsigned int payload_len,
+		bool last_reply)
+{
+	batch_item *item = malloc(batch_item_size(data_len, payload, payload_len));
 
-static void gevent_callback_session_event(
+	if (item == NULL) {
+		/* Reported to Python with the session's next item. */
+		pthread_mutex_lock(&batch_lock);
+		context->dropped++;
+		pthread_mutex_unlock(&batch_lock);
+		return;
+	}
+
+	batch_queue(item, context, type, data, data_len, payload, payload_len, last_reply);
+}
+
+static void batch_callback_session_event(
 		void *ctx,
 		const char *params,
 		size_t params_len)
 {
-	GEVENT_CALLBACK_PROLOGUE
-	callback_session_event(ctx, params, params_len);
-	GEVENT_CALLBACK_EPILOGUE
+	batch_push(ctx, BATCH_SESSION_EVENT, params, params_len, NULL, 0, false);
 }
 
-static void gevent_callback_event(
+static void batch_callback_event(
 		void *ctx,
 		const char *params,
 		size_t params_len,
@@ -224,51 +720,90 @@ static void gevent_callback_event(
 		unsigned int payload_len,
 		bool last_reply)
 {
-	GEVENT_CALLBACK_PROLOGUE
-	callback_event(ctx, params, params_len, payload, payload_len, last_reply);
-	GEVENT_CALLBACK_EPILOGUE
+	if (filter_event(ctx, params, params_len))
+		return;
+
+	batch_push(ctx, BATCH_EVENT, params, params_len, payload, payload_len, last_reply);
 }
 
-static void gevent_callback_close(void *ctx)
+static void batch_callback_close(void *ctx)
 {
-	GEVENT_CALLBACK_PROLOGUE
-	callback_close(ctx);
-	GEVENT_CALLBACK_EPILOGUE
+	session_context *context = ctx;
+	batch_item *item = context->close_item;
+
+	/* Otherwise the session would never learn about it, and its context
+	 * would leak. */
+	if (item) {
+		context->close_item = NULL;
+		batch_queue(item, context, BATCH_CLOSE, NULL, 0, NULL, 0, false);
+	} else {
+		batch_push(context, BATCH_CLOSE, NULL, 0, NULL, 0, false);
+	}
 }
 
-static void gevent_callback_conn_state(void *ctx, const char *state)
+static void batch_callback_conn_state(void *ctx, const char *state)
 {
-	GEVENT_CALLBACK_PROLOGUE
-	callback_conn_state(ctx, state);
-	GEVENT_CALLBACK_EPILOGUE
+	batch_push(ctx, BATCH_CONN_STATE, state, strlen(state), NULL, 0, false);
 }
 
-static void gevent_callback_conn_active(void *ctx)
+static void batch_callback_conn_active(void *ctx)
 {
-	GEVENT_CALLBACK_PROLOGUE
-	callback_conn_active(ctx);
-	GEVENT_CALLBACK_EPILOGUE
+	batch_push(ctx, BATCH_CONN_ACTIVE, NULL, 0, NULL, 0, false);
 }
 
-static void gevent_callback_log(void *ctx, const char *msg, size_t msg_len)
+static void batch_callback_log(void *ctx, const char *msg, size_t msg_len)
 {
-	GEVENT_CALLBACK_PROLOGUE
-	callback_log(ctx, msg, msg_len);
-	GEVENT_CALLBACK_EPILOGUE
+	batch_push(ctx, BATCH_LOG, msg, msg_len, NULL, 0, false);
 }
 
-static ninchat_session new_gevent_session(void *ctx)
+static ninchat_session new_batch_session(session_context *context)
 {
-	ninchat_session s = ninchat_session_new();
-	ninchat_session_on_session_event(s, gevent_callback_session_event, ctx);
-	ninchat_session_on_event(s, gevent_callback_event, ctx);
-	ninchat_session_on_close(s, gevent_callback_close, ctx);
-	ninchat_session_on_conn_state(s, gevent_callback_conn_state, ctx);
-	ninchat_session_on_conn_active(s, gevent_callback_conn_active, ctx);
-	ninchat_session_on_log(s, gevent_callback_log, ctx);
+	ninchat_session s;
+
+	pthread_once(&batch_once, batch_start);
+
+	s = ninchat_session_new();
+	ninchat_session_on_session_event(s, batch_callback_session_event, context);
+	ninchat_session_on_event(s, batch_callback_event, context);
+	ninchat_session_on_close(s, batch_callback_close, context);
+	ninchat_session_on_conn_state(s, batch_callback_conn_state, context);
+	ninchat_session_on_conn_active(s, batch_callback_conn_active, context);
+	ninchat_session_on_log(s, batch_callback_log, context);
 	return s;
 }
 
+typedef struct send_action {
+	const char *params;
+	size_t params_len;
+	const ninchat_frame *payload;
+	unsigned int payload_len;
+} send_action;
+
+/*
+ * Sends actions in order until one fails.  The number of actions sent is
+ * stored in *sent, and the error of the failed one (if any) is returned.
+ */
+static char *send_actions(
+		ninchat_session s,
+		const send_action actions[],
+		unsigned int count,
+		int64_t action_ids[],
+		unsigned int *sent)
+{
+	unsigned int i;
+
+	for (i = 0; i < count; i++) {
+		char *error = ninchat_session_send(s, actions[i].params, actions[i].params_len, (ninchat_frame *) actions[i].payload, actions[i].payload_len, &action_ids[i]);
+		if (error) {
+			*sent = i;
+			return error;
+		}
+	}
+
+	*sent = count;
+	return NULL;
+}
+
 static void set_payload_frame(
 		ninchat_frame payload[],
 		unsigned int i,
@@ -280,6 +815,22 @@ static void set_payload_frame(
 	payload[i].size = size;
 }
 
+static void set_payload_frames(
+		ninchat_frame payload[],
+		const void *const data[],
+		const size_t size[],
+		unsigned int count)
+{
+	unsigned int i;
+
+	memset(payload, 0, count * sizeof (ninchat_frame));
+
+	for (i = 0; i < count; i++) {
+		payload[i].data = data[i];
+		payload[i].size = size[i];
+	}
+}
+
 static const ninchat_frame *payload_frame(
 		const ninchat_frame payload[],
 		unsigned int i)
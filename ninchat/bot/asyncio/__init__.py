@@ -131,19 +131,17 @@ class Dialogue:
 
     async def _load_messages(self, ctx):
         try:
-            replies = []
-            params, _ = await load_history(ctx, self.user_id, lambda *args: replies.append(args))
-
-            if params["event"] != "error":
-                messages = []
+            messages = []
+            params = None
 
-                for params, payload, last_reply in replies:
-                    if params["event"] == "message_received" and params["message_type"] == "ninchat.com/text":
-                        if params["message_user_id"] == ctx.user_id:
-                            messages = []
-                        else:
-                            messages.append((params, payload))
+            async for params, payload, last_reply in stream_history(ctx, self.user_id):
+                if params["event"] == "message_received" and params["message_type"] == "ninchat.com/text":
+                    if params["message_user_id"] == ctx.user_id:
+                        messages = []
+                    else:
+                        messages.append((params, payload))
 
+            if params is not None and params["event"] != "error":
                 for params, payload in messages:
                     self._buffer_message(params, payload)
         finally:
@@ -254,13 +252,21 @@ def transfer_audience(ctx, user_id, queue_id):
 
 
 def load_history(ctx, user_id, on_reply):
-    return ctx.session.call({
+    return ctx.session.call(_load_history_params(user_id), on_reply=on_reply)
+
+
+def stream_history(ctx, user_id):
+    return ctx.session.stream(_load_history_params(user_id))
+
+
+def _load_history_params(user_id):
+    return {
         "action":         "load_history",
         "user_id":        user_id,
         "message_id":     "",
         "history_length": 1000,
         "history_order":  1,
-    }, on_reply=on_reply)
+    }
 
 
 def accept_audience(ctx, queue_id, queue_attrs):
@@ -373,17 +379,11 @@ def text(ctx, params, payload):
                 del ctx.dialogues[user_id]
 
 
-async def run(handler_factory, *, identity, debug_messages=False):
-    events = asyncio.Queue()
-
+async def run(handler_factory, *, identity, debug_messages=False, transport=None):
     def on_session_event(params):
         if params["event"] == "error":
             log.error("session: %s", params)
-            params = None
-        loop.create_task(events.put((params, None)))
-
-    def on_event(params, payload, last_reply):
-        loop.create_task(events.put((params, payload)))
+            events.close()
 
     message_types = list(message_handlers.keys())
     if debug_messages:
@@ -398,10 +398,11 @@ async def run(handler_factory, *, identity, debug_messages=False):
         params["identity_name"] = identity["name"]
         params["identity_auth"] = identity["auth"]
 
-    session = Session()
+    session = Session(transport=transport)
     session.set_params(params)
     session.on_session_event = on_session_event
-    session.on_event = on_event
+    session.on_event = lambda params, payload, last_reply: None
+    events = session.events(list(event_handlers.keys()))
 
     outgoing_messages = asyncio.Queue()
     handler = handler_factory(outgoing_messages, debug_messages)
@@ -422,11 +423,7 @@ async def run(handler_factory, *, identity, debug_messages=False):
             ctx = Context(handler, session, params["user_id"], debug_messages)
             loop.create_task(process_outgoing_messages(ctx))
 
-            while True:
-                params, payload = await events.get()
-                if params is None:
-                    break
-
+            async for params, payload, last_reply in events:
                 name = params["event"]
 
                 if verbose_logging:
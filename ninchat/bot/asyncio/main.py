@@ -2,6 +2,7 @@ import argparse
 import asyncio
 import json
 from collections import defaultdict
+from functools import partial
 from os import environ
 
 from . import run
@@ -56,11 +57,13 @@ class Handler:
 def main(handler_factory=Handler, *, identity_file=None):
     args = None
     params = {}
+    transport = None
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--identity-file", metavar="PATH", default=identity_file, help='JSON document containing "type", "name" and "auth" properties')
     parser.add_argument("--debug-messages", action="store_true", help='send additional "ninch.at/bot/debug" messages')
-    parser.set_defaults(func=lambda: run(handler_factory, **params))
+    parser.add_argument("--socket-url", metavar="URL", help="connect to a session server such as ninchat.testing.server using the pure-Python transport")
+    parser.set_defaults(func=lambda: run(handler_factory, transport=transport, **params))
 
     subparsers = parser.add_subparsers()
 
@@ -85,4 +88,8 @@ def main(handler_factory=Handler, *, identity_file=None):
     if args.debug_messages:
         params["debug_messages"] = True
 
+    if args.socket_url:
+        from ninchat.client.aiohttp import Transport
+        transport = partial(Transport, url=args.socket_url)
+
     loop.run_until_complete(args.func())
@@ -26,9 +26,8 @@ from __future__ import absolute_import
 
 __all__ = ["APIError"]
 
-import json
-
 import ninchat
+from ninchat.codec import get_default as _default_codec
 
 url = "https://api.ninchat.com/v2/call"
 
@@ -57,7 +56,12 @@ def request_content(params, **kwargs):
         params["caller_name"] = identity["name"]
         params["caller_auth"] = identity["auth"]
 
-    return json.dumps(params, separators=(",", ":")).encode()
+    return _default_codec().encode(params)
+
+
+def decode_content(data):
+    # type: (ByteString) -> Dict[str, Any]
+    return _default_codec().decode(data)
 
 
 def check_event(e):
@@ -51,7 +51,7 @@ async def call(session: aiohttp.ClientSession,
     async with session.post(lib.url, data=data, headers=lib.request_headers) as r:
         if r.status != HTTPStatus.OK:
             r.raise_for_status()
-        e = await r.json()
+        e = lib.decode_content(await r.read())
 
     if check:
         lib.check_event(e)
@@ -53,7 +53,7 @@ def call(params, **kwargs):
     r = s.post(lib.url, data=data, headers=lib.request_headers)
     if r.status_code != requests.codes.ok:
         r.raise_for_status()
-    e = r.json()
+    e = lib.decode_content(r.content)
 
     if kwargs.get("check"):
         lib.check_event(e)
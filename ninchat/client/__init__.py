@@ -26,7 +26,7 @@
 
 from __future__ import absolute_import
 
-__all__ = ["Session", "Error"]
+__all__ = ["Session", "Error", "EventParams"]
 
 try:
     # Python 2
@@ -41,13 +41,56 @@ except NameError:
     def _decode_str(x):
         return str(x, "utf-8")
 
-import json
+try:
+    # Python 3
+    memoryview.release
+    _views_supported = True
+except AttributeError:
+    # Python 2 views can't be released, so payload frames are copied.
+    _views_supported = False
+
+try:
+    # Python 3.8+
+    memoryview.toreadonly
+
+    def _frame_view(buf):
+        return memoryview(buf).toreadonly()
+except AttributeError:
+    _frame_view = memoryview
+
 import logging
+import sys
+import threading
+from heapq import heapify, heappop, heappush
+
+try:
+    # Python 3
+    from time import monotonic as _monotonic
+except ImportError:
+    # Python 2
+    from time import time as _monotonic
+
+try:
+    from _ninchat_cffi import ffi, lib
+except ImportError as e:
+    # Sessions with a transport don't need the native library.
+    ffi = lib = None
+    _native_error = e
 
-from _ninchat_cffi import ffi, lib
+    def _def_extern():
+        return lambda f: f
+else:
+    _def_extern = ffi.def_extern
+
+from ninchat.codec import get_default as _default_codec
+
+from .params import EventParams
 
 log = logging.getLogger(__name__)
 
+# None on implementations without reference counts.
+_getrefcount = getattr(sys, "getrefcount", None)
+
 _live = set()
 
 
@@ -76,12 +119,22 @@ class Session(object):
 
     Threading:
 
-    - The API is not thread-safe.  If Session methods are invoked on
-      multiple threads (probably a bad idea), proper synchronization
-      must be taken care of.
+    - The send() and send_many() methods may be invoked on multiple
+      threads concurrently.  Otherwise the API is not thread-safe: if
+      other Session methods are invoked on multiple threads (probably a
+      bad idea), proper synchronization must be taken care of.
     - The callbacks are executed on arbitrary threads, so proper
-      synchronization must be taken care of.  (The asyncio and gevent
-      implementations avoid this problem.)
+      synchronization must be taken care of.  (The asyncio, gevent and
+      threaded implementations avoid this problem.)
+
+    Batching:
+
+    - If the batch_events constructor argument is set, the native
+      library queues callbacks without touching the Python interpreter,
+      and a dedicated thread delivers everything queued so far at once.
+      This trades a little latency for a lot less GIL contention under
+      bursty load.  The callbacks of all batch sessions are executed on
+      the same thread.  Payload frames are always copied.
 
     .. attribute:: on_session_event
 
@@ -113,6 +166,92 @@ class Session(object):
 
        Indicates that there has recently been activity on the connection.
        Invoked without arguments.
+
+    .. attribute:: payload_views
+
+       If set, event payload frames are delivered to on_event and action
+       reply callbacks as read-only memoryview objects which refer to
+       the native buffers directly, instead of bytes copies.  The views
+       are released when the callback returns, and they must not
+       outlive it: neither may slices of them, views created from them,
+       nor buffers exported by them.  Use bytes() or tobytes() to retain
+       the data.  If a callback retains a view, the memory it refers to
+       is freed anyway; an error is logged, and the session copies the
+       frames from then on.  Only the default Session implementation on
+       Python 3 supports this; the asyncio, gevent and threaded versions
+       defer callbacks, so they always copy the frames.
+
+    .. attribute:: codec
+
+       The ninchat.codec.Codec used for encoding action params and
+       decoding event params.  Defaults to the process-wide default
+       codec.
+
+    .. attribute:: lazy_params
+
+       If set, on_event and action reply callbacks receive the event
+       params as an EventParams mapping, which defers JSON decoding
+       until a parameter other than "event" or "action_id" is accessed.
+       Useful when most events are discarded based on their type.
+
+    .. attribute:: reply_timeout
+
+       Default deadline (in seconds) for receiving the final reply to an
+       action sent with an on_reply callback.  When the deadline passes,
+       the callback is invoked with params set to None and forgotten.
+       Can be overridden per action.  None means no deadline.  Deadlines
+       are checked when actions are sent and events are received; the
+       asyncio implementation also uses a timer.  Otherwise
+       expire_replies() may be called periodically.
+
+    .. attribute:: max_replies
+
+       Maximum number of actions whose reply callbacks are retained.
+       None means unlimited.
+
+    .. attribute:: reply_overflow
+
+       What to do when sending an action with an on_reply callback would
+       exceed max_replies: "raise" an Error without sending the action,
+       or "evict" the oldest callback by invoking it with params set to
+       None.
+
+    .. attribute:: max_inflight
+
+       Maximum number of sent actions whose final reply event hasn't
+       been received yet.  Actions sent with the action_id param set to
+       None are not counted.  None means unlimited.
+
+    .. attribute:: max_inflight_bytes
+
+       Maximum total size of the params and payloads of the actions in
+       flight.  An action which exceeds the limit by itself is sent when
+       nothing else is in flight.  None means unlimited.
+
+    .. attribute:: inflight_overflow
+
+       What send() does when the in-flight window is full: "block" until
+       replies arrive (or reply_timeout expires), or "raise" an Error
+       without sending the action.  Blocking must not be used on the
+       thread which executes the callbacks.  The asyncio implementation
+       always raises; see its drain() method.
+
+    .. attribute:: metrics
+
+       A ninchat.client.metrics.Metrics instance which collects counters
+       and timings, or None.  Enabling it after actions have been sent
+       leaves their round-trip times unmeasured.
+
+    .. attribute:: transport
+
+       None (the default) uses the native library.  Otherwise it's a
+       callable which is invoked with the session by the constructor, and
+       returns an object which is used instead of the native library:
+       ninchat.client.aiohttp.Transport implements the protocol for
+       asyncio sessions, and ninchat.testing.fake.Transport is an
+       in-process stand-in for benchmarks and tests.  The constructor
+       argument overrides it for a single session.  The _ninchat_cffi
+       module isn't needed by sessions which have a transport.
 """
 
     on_session_event = None  # type: Callback[[Dict[str,Any]], None]
@@ -121,20 +260,98 @@ class Session(object):
     on_conn_state = None     # type: Optional[Callback[[str], None]]
     on_conn_active = None    # type: Optional[Callback[[], None]]
 
-    _new_session = lib.new_common_session
+    payload_views = False    # type: bool
+    codec = None             # type: Optional[ninchat.codec.Codec]
+    lazy_params = False      # type: bool
+    reply_timeout = None     # type: Optional[float]
+    max_replies = None       # type: Optional[int]
+    reply_overflow = "raise"  # type: str
+    max_inflight = None      # type: Optional[int]
+    max_inflight_bytes = None  # type: Optional[int]
+    inflight_overflow = "block"  # type: str
+    metrics = None           # type: Optional[ninchat.client.metrics.Metrics]
+    transport = None         # type: Optional[Callable[[Session], Any]]
+
+    _new_session = lib.new_common_session if lib is not None else None
+    _deferred_callbacks = False
+
+    # Callbacks and other configuration set on instances go to __dict__,
+    # which isn't allocated for sessions configured via class attributes.
+    # The reply tables are created on demand.
+    __slots__ = [
+        "revision",
+        "state",
+        "_on_open",
+        "_on_replies",
+        "_reply_deadlines",
+        "_replies_lock",
+        "_window_cond",
+        "_window_actions",
+        "_window_bytes",
+        "_inflight",
+        "_sending",
+        "_early_replies",
+        "_replaying",
+        "_sent_at",
+        "_state_since",
+        "_ctx",
+        "_context",
+        "_internal",
+        "_engine",
+        "__dict__",
+        "__weakref__",
+    ]
+
+    def __init__(self, batch_events=False, transport=None):
+        # type: (bool, Optional[Callable[[Session], Any]]) -> None
+        if transport is not None:
+            self.transport = transport
 
-    def __init__(self):
-        # type: () -> None
         self.revision = 0
         self.state = "uninitialized"
 
         self._on_open = None
-        self._on_replies = {}
+        self._on_replies = None
+        self._reply_deadlines = None
+        self._replies_lock = threading.Lock()
+        self._window_cond = None
+        self._window_actions = 0
+        self._window_bytes = 0
+        self._inflight = None
+        self._sending = 0
+        self._early_replies = None
+        self._replaying = None
+        self._sent_at = None
+        self._state_since = None
+
+        self._engine = self._create_engine()
+        if self._engine is not None:
+            # The live set keeps the engine, and the engine the session.
+            self._ctx = self._engine
+            self._context = None
+            self._internal = None
+            return
+
+        if lib is None:
+            raise _native_error
+
         self._ctx = ffi.new_handle(self)
-        self._internal = self._new_session(self._ctx)
+
+        self._context = lib.new_session_context(self._ctx, batch_events)
+        if not self._context:
+            raise MemoryError()
+
+        if batch_events:
+            self._internal = lib.new_batch_session(self._context)
+        else:
+            self._internal = self._new_session(self._context)
 
     def __del__(self):
+        if self._engine is not None or lib is None:
+            return
+
         lib.ninchat_session_delete(self._internal)
+        lib.delete_session_context(self._context)
 
     def __str__(self):
         return "<{} {}.{}: {}>".format(type(self).__name__, self._internal, self.revision, self.state)
@@ -145,7 +362,11 @@ class Session(object):
         "create_session" action."""
         assert self._ctx
 
-        params_json = json.dumps(params).encode()
+        if self._engine is not None:
+            self._engine.set_params(params)
+            return
+
+        params_json = (self.codec or _default_codec()).encode(params)
         params_ptr = ffi.from_buffer(params_json)
         params_len = len(params_json)
 
@@ -160,7 +381,10 @@ class Session(object):
         assert self._ctx not in _live
         assert not self._on_open
 
-        lib.ninchat_session_open(self._internal)
+        if self._engine is not None:
+            self._engine.open()
+        else:
+            lib.ninchat_session_open(self._internal)
 
         self._on_open = on_open
         self.state = "initialized"
@@ -172,43 +396,538 @@ class Session(object):
         """Close the session on the server."""
         assert self._ctx in _live
 
-        lib.ninchat_session_close(self._internal)
+        if self._engine is not None:
+            self._engine.close()
+        else:
+            lib.ninchat_session_close(self._internal)
         self.state = "closing"
 
-    def send(self, params, payload=None, on_reply=None):
-        # type: (Dict[str,Any], Optional[Sequence[ByteString]], Optional[Callable[[Dict[str,Any], List[bytes], bool], None]]) -> None
+    def set_event_filter(self, rules):
+        # type: (Iterable[Union[str, Tuple[str, str]]]) -> None
+        """Replaces the set of events which are dropped by the native
+        library before they reach Python.  A rule is either an event name
+        (e.g. "user_updated"), or an event name and message type pair
+        (e.g. ("message_received", "ninchat.com/info/*")).  A trailing
+        asterisk matches any suffix.  Replies to actions are never
+        dropped.  An empty list disables filtering."""
+        if self._engine is not None:
+            self._engine.set_event_filter(rules)
+            return
+
+        events = []
+        message_types = []
+
+        for rule in rules:
+            if isinstance(rule, tuple):
+                event, message_type = rule
+                message_types.append(ffi.new("char[]", message_type.encode()))
+            else:
+                event = rule
+                message_types.append(ffi.NULL)
+            events.append(ffi.new("char[]", event.encode()))
+
+        if lib.set_event_filter(self._context, events, message_types, len(events)) < 0:
+            raise MemoryError()
+
+    def send(self, params, payload=None, on_reply=None, timeout=None):
+        # type: (Dict[str,Any], Optional[Sequence[ByteString]], Optional[Callable[[Dict[str,Any], List[bytes], bool], None]], Optional[float]) -> None
         """Send an action.  If specified, the on_reply callback will be
         invoked with the reply event(s).  If the session is closed
-        before the final reply event is received, the callback will be
-        invoked with params set to None."""
+        before the final reply event is received, or the timeout (which
+        defaults to the reply_timeout attribute) expires, the callback
+        will be invoked with params set to None."""
         assert self._ctx in _live
 
-        params_json = json.dumps(params).encode()
-        params_ptr = ffi.from_buffer(params_json)
-        params_len = len(params_json)
+        if self._reply_deadlines:
+            self.expire_replies()
 
+        engine = self._engine
+        if engine is not None:
+            params, action_id = engine.prepare(params, payload)
+
+        params_json = (self.codec or _default_codec()).encode(params)
         payload_len = len(payload) if payload else 0
-        payload_ptr = ffi.new("ninchat_frame[]", payload_len)
-        for i in xrange(payload_len):
-            frame = payload[i]
-            lib.set_payload_frame(payload_ptr, i, ffi.from_buffer(frame), len(frame))
 
-        action_id_ptr = ffi.new("int64_t *")
+        size = 0
+        if self.max_inflight_bytes is not None:
+            size = _action_size(params_json, payload)
 
-        error_ptr = lib.ninchat_session_send(self._internal, params_ptr, params_len, payload_ptr, payload_len, action_id_ptr)
-        if error_ptr:
-            try:
-                error_str = ffi.string(error_ptr).decode()
-            finally:
-                lib.free(error_ptr)
-            raise Error(error_str)
+        metrics = self.metrics
+        sent_at = None
+        if metrics is not None:
+            sent_at = _monotonic()
 
-        action_id = ffi.unpack(action_id_ptr, 1)[0]
-        if action_id and on_reply:
-            self._on_replies[action_id] = on_reply
+        windowed = self._begin_send(1 if on_reply else 0, 1, size)
+        entries = []
+        try:
+            if engine is not None:
+                engine.send(action_id, params_json, payload)
+            else:
+                scratch = self._acquire_scratch()
+                try:
+                    payload_ptr = scratch.frames(payload_len)
+                    if payload_len:
+                        _set_payload_frames(payload_ptr, payload)
+
+                    # bytes objects are passed to C without copying or wrapping.
+                    error_ptr = lib.ninchat_session_send(self._internal, params_json, len(params_json), payload_ptr, payload_len, scratch.action_id_ptr)
+                    if error_ptr:
+                        _raise_error(error_ptr)
+
+                    action_id = scratch.action_id_ptr[0]
+                finally:
+                    _scratch_pool.append(scratch)
+
+            name = None
+            if metrics is not None:
+                name = params.get("action")
+                metrics._action_sent(self, name, _action_size(params_json, payload))
+
+            entries.append((action_id, on_reply, timeout, size, name))
+        finally:
+            self._end_send(entries, windowed, 1, size, sent_at)
 
         return action_id
 
+    def send_many(self, actions, timeout=None):
+        # type: (Sequence[Tuple[Dict[str,Any], Optional[Sequence[ByteString]], Optional[Callable[[Dict[str,Any], List[bytes], bool], None]]]], Optional[float]) -> List[int]
+        """Send multiple actions with a single call into the native
+        library.  The actions are (params, payload, on_reply) tuples
+        which correspond to the arguments of the send() method; payload
+        and on_reply may be None.  Returns a list of action ids.  If an
+        action can't be sent, Error is raised; the preceding actions
+        have been sent by then.  The timeout applies to all reply
+        callbacks, like with send().  The actions occupy the in-flight
+        window together."""
+        assert self._ctx in _live
+
+        if self._reply_deadlines:
+            self.expire_replies()
+
+        codec = self.codec or _default_codec()
+        count = len(actions)
+
+        engine = self._engine
+        if engine is not None:
+            prepared = [engine.prepare(params, payload) for params, payload, _ in actions]
+            params_jsons = [codec.encode(params) for params, _ in prepared]
+        else:
+            params_jsons = [codec.encode(params) for params, _, _ in actions]
+
+        frame_count = sum(len(payload) for _, payload, _ in actions if payload)
+
+        if self.max_inflight_bytes is not None:
+            sizes = [_action_size(params_jsons[i], actions[i][1]) for i in xrange(count)]
+        else:
+            sizes = [0] * count
+
+        metrics = self.metrics
+        sent_at = None
+        if metrics is not None:
+            sent_at = _monotonic()
+
+        windowed = self._begin_send(sum(1 for _, _, on_reply in actions if on_reply), count, sum(sizes))
+        entries = []
+        try:
+            if engine is not None:
+                action_ids = [action_id for _, action_id in prepared]
+                for i in xrange(count):
+                    engine.send(action_ids[i], params_jsons[i], actions[i][1])
+                error_ptr = None
+            else:
+                params_ptr = ffi.from_buffer(b"".join(params_jsons))
+
+                scratch = self._acquire_scratch()
+                try:
+                    payload_ptr = scratch.frames(frame_count)
+                    action_ptr = scratch.actions(count)
+                    action_ids_ptr = scratch.action_ids(count)
+
+                    params_offset = 0
+                    frame_index = 0
+
+                    for i in xrange(count):
+                        payload = actions[i][1]
+                        params_len = len(params_jsons[i])
+                        payload_len = len(payload) if payload else 0
+
+                        action = action_ptr[i]
+                        action.params = params_ptr + params_offset
+                        action.params_len = params_len
+                        action.payload = payload_ptr + frame_index
+                        action.payload_len = payload_len
+
+                        if payload_len:
+                            _set_payload_frames(action.payload, payload)
+
+                        params_offset += params_len
+                        frame_index += payload_len
+
+                    error_ptr = lib.send_actions(self._internal, action_ptr, count, action_ids_ptr, scratch.sent_ptr)
+                    action_ids = ffi.unpack(action_ids_ptr, scratch.sent_ptr[0])
+                finally:
+                    _scratch_pool.append(scratch)
+
+            for i in xrange(len(action_ids)):
+                params, payload, on_reply = actions[i]
+                name = None
+                if metrics is not None:
+                    name = params.get("action")
+                    metrics._action_sent(self, name, _action_size(params_jsons[i], payload))
+
+                entries.append((action_ids[i], on_reply, timeout, sizes[i], name))
+        finally:
+            self._end_send(entries, windowed, count, sum(sizes), sent_at)
+
+        if error_ptr:
+            _raise_error(error_ptr)
+
+        return action_ids
+
+    def expire_replies(self):
+        # type: () -> Optional[float]
+        """Invoke the reply callbacks whose deadline has passed with params
+        set to None, and forget them.  The actions are also removed from
+        the in-flight window.  Returns the next deadline (in
+        time.monotonic() seconds), or None."""
+        expired = []
+        released = False
+
+        with self._replies_lock:
+            deadlines = self._reply_deadlines
+            now = _monotonic()
+
+            while deadlines and deadlines[0][0] <= now:
+                _, action_id = heappop(deadlines)
+                on_reply = self._on_replies.pop(action_id, None) if self._on_replies else None
+                if on_reply:
+                    expired.append(on_reply)
+                if self._inflight and self._release_window(action_id):
+                    released = True
+                if self._sent_at:
+                    self._sent_at.pop(action_id, None)
+
+            if deadlines:
+                next_deadline = deadlines[0][0]
+            else:
+                next_deadline = None
+                self._reply_deadlines = None
+
+            if expired and not self._on_replies:
+                self._on_replies = None
+            if released and not self._inflight:
+                self._inflight = None
+
+        if released:
+            self._window_changed()
+
+        if expired:
+            self._defer(_invoke_dropped, expired, "timed out")
+
+        return next_deadline
+
+    def cancel_reply(self, action_id):
+        # type: (int) -> bool
+        """Forget the reply callback of an action without invoking it.
+        The action is also removed from the in-flight window.  Returns
+        True if the action was still awaiting its final reply."""
+        with self._replies_lock:
+            on_reply = self._on_replies.pop(action_id, None) if self._on_replies else None
+            released = bool(self._inflight) and self._release_window(action_id)
+            if self._sent_at:
+                self._sent_at.pop(action_id, None)
+
+            # The deadline is left in the heap; expiry skips it.
+            if on_reply and not self._on_replies:
+                self._on_replies = None
+            if released and not self._inflight:
+                self._inflight = None
+
+        if released:
+            self._window_changed()
+
+        return on_reply is not None or released
+
+    @property
+    def inflight(self):
+        # type: () -> Tuple[int, int]
+        """The number of actions awaiting their final reply event and
+        their size in bytes, as counted by the in-flight window.  Zeros
+        unless max_inflight or max_inflight_bytes is set."""
+        with self._replies_lock:
+            return self._window_actions, self._window_bytes
+
+    def _begin_send(self, reply_count, count, size):
+        windowed = (self.max_inflight is not None or self.max_inflight_bytes is not None)
+
+        with self._replies_lock:
+            if self.max_replies is not None:
+                if self.reply_overflow not in ("evict", "raise"):
+                    raise ValueError("unknown reply overflow policy: {!r}".format(self.reply_overflow))
+
+                if reply_count and self.reply_overflow == "raise" and len(self._on_replies or ()) + reply_count > self.max_replies:
+                    raise Error("too many actions awaiting replies")
+
+            if windowed:
+                if self.inflight_overflow not in ("block", "raise"):
+                    raise ValueError("unknown inflight overflow policy: {!r}".format(self.inflight_overflow))
+
+                if not self._window_fits(count, size):
+                    self._wait_window(count, size)
+
+                self._window_actions += count
+                self._window_bytes += size
+
+            self._sending += 1
+
+        return windowed
+
+    def _end_send(self, entries, windowed, reserved_count, reserved_size, sent_at=None):
+        replays = []
+        evicted = ()
+        deadline = None
+        released = False
+        reply_times = []
+
+        with self._replies_lock:
+            for action_id, on_reply, timeout, size, name in entries:
+                if not action_id:
+                    continue
+
+                early = self._early_replies.pop(action_id, None) if self._early_replies else None
+                if early:
+                    if on_reply:
+                        # Later events are appended until the replay.
+                        if self._replaying is None:
+                            self._replaying = {}
+                        self._replaying[action_id] = early
+                        replays.append((action_id, on_reply))
+                    if early[-1][2]:
+                        # Final reply has been received already.
+                        if sent_at is not None:
+                            reply_times.append((name, _monotonic() - sent_at))
+                        continue
+
+                if windowed:
+                    if self._inflight is None:
+                        self._inflight = {}
+                    self._inflight[action_id] = size
+                    reserved_count -= 1
+                    reserved_size -= size
+
+                if on_reply:
+                    if self._on_replies is None:
+                        self._on_replies = {}
+                    self._on_replies[action_id] = on_reply
+
+                if sent_at is not None:
+                    if self._sent_at is None:
+                        self._sent_at = {}
+                    self._sent_at[action_id] = (sent_at, name)
+
+                if timeout is None:
+                    timeout = self.reply_timeout
+
+                if timeout is not None and (on_reply or windowed or sent_at is not None):
+                    d = self._add_deadline(action_id, timeout)
+                    if d is not None and (deadline is None or d < deadline):
+                        deadline = d
+
+            self._sending -= 1
+            if not self._sending and self._early_replies is not None:
+                self._early_replies = None  # Replies to actions sent without callback.
+
+            if windowed and (reserved_count or reserved_size):
+                self._window_actions -= reserved_count
+                self._window_bytes -= reserved_size
+                self._notify_window()
+                released = True
+
+            on_replies = self._on_replies
+            if self.max_replies is not None and on_replies and len(on_replies) > self.max_replies:
+                evicted = []
+                while len(on_replies) > self.max_replies:
+                    evicted.append(on_replies.pop(next(iter(on_replies))))
+
+        if deadline is not None:
+            self._schedule_reply_expiry(deadline)
+
+        if released:
+            self._window_changed()
+
+        if reply_times:
+            metrics = self.metrics
+            if metrics is not None:
+                for name, seconds in reply_times:
+                    metrics._reply_done(name, seconds)
+
+        if replays:
+            self._defer(self._replay, replays)
+
+        if evicted:
+            self._defer(_invoke_dropped, evicted, "evicted")
+
+    def _replay(self, replays):
+        for action_id, on_reply in replays:
+            with self._replies_lock:
+                events = self._replaying.pop(action_id, ()) if self._replaying else ()
+                if not self._replaying:
+                    self._replaying = None
+
+            for params, payload, last_reply in events:
+                try:
+                    metrics = self.metrics
+                    if metrics is None:
+                        on_reply(params, payload, last_reply)
+                    else:
+                        _timed(metrics, "on_reply", on_reply, params, payload, last_reply)
+                except Exception:
+                    log.exception("raised by action reply callback")
+
+    def _defer(self, call, *args):
+        call(*args)
+
+    def _create_engine(self):
+        transport = self.transport
+        if transport is None:
+            return None
+        return transport(self)
+
+    def _pending_replies(self):
+        with self._replies_lock:
+            return len(self._on_replies or ())
+
+    def _add_deadline(self, action_id, timeout):
+        deadlines = self._reply_deadlines
+        if deadlines is None:
+            deadlines = self._reply_deadlines = []
+
+        # Completed actions leave stale entries in the heap.
+        if len(deadlines) > 64:
+            tables = [t for t in (self._on_replies, self._inflight, self._sent_at) if t]
+            if len(deadlines) > 2 * sum(len(t) for t in tables):
+                deadlines[:] = [x for x in deadlines if any(x[1] in t for t in tables)]
+                heapify(deadlines)
+
+        deadline = _monotonic() + timeout
+        heappush(deadlines, (deadline, action_id))
+        if deadlines[0][1] == action_id:
+            return deadline
+        return None  # Already covered by an earlier one.
+
+    def _schedule_reply_expiry(self, deadline):
+        pass
+
+    def _window_fits(self, count, size):
+        if not self._window_actions:
+            return True  # Oversized actions are sent one at a time.
+        if self.max_inflight is not None and self._window_actions + count > self.max_inflight:
+            return False
+        if self.max_inflight_bytes is not None and self._window_bytes + size > self.max_inflight_bytes:
+            return False
+        return True
+
+    def _wait_window(self, count, size):
+        if self.inflight_overflow == "raise":
+            raise Error("too many actions in flight")
+
+        while True:
+            if self._ctx is None:
+                raise Error("session closed")
+            if self._window_fits(count, size):
+                break
+
+            if self._reply_deadlines:
+                timeout = self._reply_deadlines[0][0] - _monotonic()
+                if timeout <= 0:
+                    # Expire outside of the lock; the callbacks may do anything.
+                    self._replies_lock.release()
+                    try:
+                        self.expire_replies()
+                    finally:
+                        self._replies_lock.acquire()
+                else:
+                    self._window_condition().wait(timeout)
+            else:
+                self._window_condition().wait()
+
+    def _window_condition(self):
+        cond = self._window_cond
+        if cond is None:
+            cond = self._window_cond = threading.Condition(self._replies_lock)
+        return cond
+
+    def _notify_window(self):
+        if self._window_cond is not None:
+            self._window_cond.notify_all()
+
+    def _release_window(self, action_id):
+        size = self._inflight.pop(action_id, None) if self._inflight else None
+        if size is None:
+            return False
+
+        self._window_actions -= 1
+        self._window_bytes -= size
+        self._notify_window()
+        return True
+
+    def _window_changed(self):
+        pass
+
+    def _take_reply(self, action_id, params, payload, last_reply):
+        released = False
+        sent = None
+
+        with self._replies_lock:
+            on_replies = self._on_replies
+            if last_reply:
+                on_reply = on_replies.pop(action_id, None) if on_replies else None
+                if self._inflight:
+                    released = self._release_window(action_id)
+                if self._sent_at:
+                    sent = self._sent_at.pop(action_id, None)
+
+                # Emptied dicts keep their capacity; drop them.
+                if on_reply and not on_replies:
+                    self._on_replies = None
+                if released and not self._inflight:
+                    self._inflight = None
+                if sent and not self._sent_at:
+                    self._sent_at = None
+            else:
+                on_reply = on_replies.get(action_id) if on_replies else None
+
+            if self._replaying and action_id in self._replaying:
+                # The replay of early replies hasn't happened yet.
+                payload = [bytes(frame) for frame in payload]
+                self._replaying[action_id].append((params, payload, last_reply))
+                on_reply = None
+            elif on_reply is None and not released and not sent and self._sending:
+                if not (self._inflight and action_id in self._inflight) and not (self._sent_at and action_id in self._sent_at):
+                    # The reply overtook the send() call which hasn't
+                    # registered the action yet; it will replay the event.
+                    payload = [bytes(frame) for frame in payload]
+                    if self._early_replies is None:
+                        self._early_replies = {}
+                    self._early_replies.setdefault(action_id, []).append((params, payload, last_reply))
+
+        if released:
+            self._window_changed()
+
+        if sent:
+            metrics = self.metrics
+            if metrics is not None:
+                sent_at, name = sent
+                metrics._reply_done(name, _monotonic() - sent_at)
+
+        return on_reply
+
+    def _acquire_scratch(self):
+        try:
+            return _scratch_pool.pop()
+        except IndexError:
+            return _Scratch()
+
     def _handle_session_event(self, params):
         self.revision += 1
 
@@ -221,31 +940,55 @@ class Session(object):
                 except Exception:
                     log.exception("raised by session create callback")
         finally:
-            self.on_session_event(params)
+            metrics = self.metrics
+            if metrics is None:
+                self.on_session_event(params)
+            else:
+                _timed(metrics, "on_session_event", self.on_session_event, params)
 
     def _handle_event(self, params, payload, last_reply):
-        if last_reply:
-            lookup = self._on_replies.pop
-        else:
-            lookup = self._on_replies.__getitem__
+        if self._reply_deadlines:
+            self.expire_replies()
+
+        metrics = self.metrics
 
         try:
             try:
-                on_reply = lookup(params["action_id"])
+                action_id = params["action_id"]
             except KeyError:
-                pass
+                on_reply = None
             else:
+                on_reply = self._take_reply(action_id, params, payload, last_reply)
+
+            if on_reply:
                 try:
-                    on_reply(params, payload, last_reply)
+                    if metrics is None:
+                        on_reply(params, payload, last_reply)
+                    else:
+                        _timed(metrics, "on_reply", on_reply, params, payload, last_reply)
                 except Exception:
                     log.exception("raised by action reply callback")
         finally:
-            self.on_event(params, payload, last_reply)
+            if metrics is None:
+                self.on_event(params, payload, last_reply)
+            else:
+                _timed(metrics, "on_event", self.on_event, params, payload, last_reply)
+
+    def _handle_events(self, events):
+        for params, payload, last_reply in events:
+            try:
+                self._handle_event(params, payload, last_reply)
+            except Exception:
+                log.exception("raised by callback")
 
     def _handle_close(self):
         _live.remove(self._ctx)
         self._ctx = None
 
+        metrics = self.metrics
+        if metrics is not None:
+            self._state_done(metrics)
+
         self.state = "closed"
 
         try:
@@ -255,23 +998,57 @@ class Session(object):
                 except Exception:
                     log.exception("raised by session create callback when session closed")
 
-            for on_reply in self._on_replies.values():
+            with self._replies_lock:
+                on_replies = list(self._on_replies.values()) if self._on_replies else ()
+                self._on_replies = None
+                self._reply_deadlines = None
+                self._sent_at = None
+
+                if self._inflight:
+                    self._window_actions -= len(self._inflight)
+                    self._window_bytes -= sum(self._inflight.values())
+                self._inflight = None
+                self._notify_window()
+
+            self._window_changed()
+
+            for on_reply in on_replies:
                 try:
                     on_reply(None, None, True)
                 except Exception:
                     log.exception("raised by action reply callback when session closed")
         finally:
             if self.on_close:
-                self.on_close()
+                if metrics is None:
+                    self.on_close()
+                else:
+                    _timed(metrics, "on_close", self.on_close)
 
     def _handle_conn_state(self, state):
+        metrics = self.metrics
+        if metrics is not None:
+            self._state_done(metrics)
+
         self.state = state
         if self.on_conn_state:
-            self.on_conn_state(state)
+            if metrics is None:
+                self.on_conn_state(state)
+            else:
+                _timed(metrics, "on_conn_state", self.on_conn_state, state)
 
     def _handle_conn_active(self):
         if self.on_conn_active:
-            self.on_conn_active()
+            metrics = self.metrics
+            if metrics is None:
+                self.on_conn_active()
+            else:
+                _timed(metrics, "on_conn_active", self.on_conn_active)
+
+    def _state_done(self, metrics):
+        now = _monotonic()
+        if self._state_since is not None:
+            metrics._conn_state_done(self.state, now - self._state_since)
+        self._state_since = now
 
     def _handle_log(self, msg):
         log.debug("session %s.%s: %s", self._internal, self.revision, msg)
@@ -283,54 +1060,324 @@ class Session(object):
             log.exception("raised by callback")
 
 
-@ffi.def_extern()
+# Shared by all sessions, so that idle sessions don't hold buffers.  It
+# holds one entry unless sessions are used concurrently.
+_scratch_pool = []
+
+
+class _Scratch(object):
+    """Reusable cffi buffers for sending actions.  The arrays grow
+    geometrically, so that they settle on a size which fits the largest
+    sends."""
+
+    __slots__ = ["action_id_ptr", "sent_ptr", "_frames", "_actions", "_action_ids"]
+
+    def __init__(self):
+        self.action_id_ptr = ffi.new("int64_t *")
+        self.sent_ptr = ffi.new("unsigned int *")
+        self._frames = ffi.new("ninchat_frame[]", 4)
+        self._actions = None
+        self._action_ids = None
+
+    def frames(self, count):
+        frames = self._frames
+        if count > len(frames):
+            frames = self._frames = ffi.new("ninchat_frame[]", _grow(frames, count))
+        return frames
+
+    def actions(self, count):
+        actions = self._actions
+        if actions is None or count > len(actions):
+            actions = self._actions = ffi.new("send_action[]", _grow(actions, count))
+        return actions
+
+    def action_ids(self, count):
+        action_ids = self._action_ids
+        if action_ids is None or count > len(action_ids):
+            action_ids = self._action_ids = ffi.new("int64_t[]", _grow(action_ids, count))
+        return action_ids
+
+
+def _grow(array, needed):
+    size = 16 if array is None else len(array) * 2
+    while size < needed:
+        size *= 2
+    return size
+
+
+def _set_payload_frames(payload_ptr, payload):
+    lib.set_payload_frames(payload_ptr, [ffi.from_buffer(frame) for frame in payload], [len(frame) for frame in payload], len(payload))
+
+
+def _action_size(params_json, payload):
+    size = len(params_json)
+    if payload:
+        for frame in payload:
+            size += len(frame)
+    return size
+
+
+def _invoke_dropped(callbacks, reason):
+    for on_reply in callbacks:
+        try:
+            on_reply(None, None, True)
+        except Exception:
+            log.exception("raised by action reply callback when %s", reason)
+
+
+def _prepare_action(params, payload, last_action_id):
+    # Used by transports: numbers the action after last_action_id unless
+    # its action_id is explicitly None, and declares the payload frames.
+    # Returns the params and the action id (0 if none).
+    if "action_id" in params and params["action_id"] is None:
+        action_id = 0
+        params = dict((k, v) for k, v in params.items() if k != "action_id")
+    else:
+        action_id = last_action_id + 1
+        params = dict(params, action_id=action_id)
+
+    if payload:
+        params["frames"] = len(payload)
+
+    return params, action_id
+
+
+def _event_rules(rules):
+    # Normalizes set_event_filter() rules to (event, message_type) pairs.
+    return [r if isinstance(r, tuple) else (r, None) for r in rules]
+
+
+def _rules_match(rules, params):
+    event = params.get("event", "")
+    for event_rule, type_rule in rules:
+        if _match(event_rule, event):
+            if type_rule is None or _match(type_rule, params.get("message_type", "")):
+                return True
+    return False
+
+
+def _match(rule, value):
+    if rule.endswith("*"):
+        return value.startswith(rule[:-1])
+    return value == rule
+
+
+def _deadline(timeout):
+    if timeout is None:
+        return None
+    # The session's deadline is computed a moment later, so this one
+    # has passed by the time the action expires.
+    return _monotonic() + timeout
+
+
+def _future_callback(f, on_reply, deadline, timeout_error):
+    # Resolves a future (asyncio or concurrent.futures) with the final
+    # reply of an action.
+    def callback(params, payload, last_reply):
+        if f.done():
+            return  # Cancelled.
+
+        if params is None:
+            if deadline is not None and _monotonic() >= deadline:
+                _resolve(f.set_exception, timeout_error())
+            else:
+                f.cancel()
+        else:
+            try:
+                if on_reply is not None:
+                    on_reply(params, payload, last_reply)
+            finally:
+                if last_reply:
+                    _resolve(f.set_result, (params, payload))
+
+    return callback
+
+
+def _resolve(method, value):
+    try:
+        method(value)
+    except Exception:
+        pass  # Cancelled in the meantime.
+
+
+def _cancel_callback(session, action_id):
+    def callback(f):
+        if f.cancelled():
+            session.cancel_reply(action_id)
+
+    return callback
+
+
+def _timed(metrics, name, callback, *args):
+    start = _monotonic()
+    try:
+        callback(*args)
+    finally:
+        metrics._callback_done(name, _monotonic() - start)
+
+
+def _call_with_views(session, params, payload, last_reply):
+    # The views must be gone when the callback returns.  A view which has
+    # been exported can't be released, and views derived from it (slices
+    # etc.) keep the underlying buffer object referenced after release.
+    refs = [_buffer_refs(view) for view in payload]
+
+    try:
+        session._call(session._handle_event, params, payload, last_reply)
+    finally:
+        retained = False
+
+        for view, count in zip(payload, refs):
+            buf = view.obj
+            try:
+                view.release()
+            except BufferError:
+                retained = True
+            else:
+                # The released view no longer references the buffer.
+                if _getrefcount is not None and _getrefcount(buf) >= count:
+                    retained = True
+
+        if retained:
+            session.payload_views = False
+            log.error("payload view retained by callback refers to freed memory; copying payloads from now on")
+
+
+def _buffer_refs(view):
+    buf = view.obj
+    if _getrefcount is None:
+        return None
+    return _getrefcount(buf)
+
+
+def _decode_params(session, data):
+    codec = session.codec or _default_codec()
+    if session.lazy_params:
+        return EventParams(data[:], codec)
+    return codec.decode(data)
+
+
+def _received(metrics, params, params_len, payload):
+    size = params_len
+    for frame in payload:
+        size += len(frame)
+    metrics._event_received(params.get("event"), size)
+
+
+def _raise_error(error_ptr):
+    try:
+        error_str = ffi.string(error_ptr).decode()
+    finally:
+        lib.free(error_ptr)
+    raise Error(error_str)
+
+
+@_def_extern()
 def callback_session_event(ctx, params_ptr, params_len):
     session = ffi.from_handle(ctx)
-    params = json.loads(_decode_str(ffi.buffer(params_ptr, params_len)))
+    params = (session.codec or _default_codec()).decode(ffi.buffer(params_ptr, params_len))
     session._call(session._handle_session_event, params)
 
 
-@ffi.def_extern()
+@_def_extern()
 def callback_event(ctx, params_ptr, params_len, payload_ptr, payload_len, last_reply_int):
     session = ffi.from_handle(ctx)
-    params = json.loads(_decode_str(ffi.buffer(params_ptr, params_len)))
-    payload = []
-    for i in xrange(payload_len):
-        frame = lib.payload_frame(payload_ptr, i)
-        payload.append(ffi.string(lib.frame_data(frame), lib.frame_size(frame)))
+    params = _decode_params(session, ffi.buffer(params_ptr, params_len))
     last_reply = (last_reply_int != 0)
-    session._call(session._handle_event, params, payload, last_reply)
+
+    if session.payload_views and _views_supported and not session._deferred_callbacks:
+        payload = []
+        for i in xrange(payload_len):
+            frame = lib.payload_frame(payload_ptr, i)
+            payload.append(_frame_view(ffi.buffer(lib.frame_data(frame), lib.frame_size(frame))))
+        if session.metrics is not None:
+            _received(session.metrics, params, params_len, payload)
+        # The native buffers are freed when this function returns.
+        _call_with_views(session, params, payload, last_reply)
+    else:
+        payload = []
+        for i in xrange(payload_len):
+            frame = lib.payload_frame(payload_ptr, i)
+            payload.append(ffi.buffer(lib.frame_data(frame), lib.frame_size(frame))[:])
+        if session.metrics is not None:
+            _received(session.metrics, params, params_len, payload)
+        session._call(session._handle_event, params, payload, last_reply)
 
 
-@ffi.def_extern()
+@_def_extern()
 def callback_close(ctx):
     session = ffi.from_handle(ctx)
     session._call(session._handle_close)
 
 
-@ffi.def_extern()
+@_def_extern()
 def callback_conn_state(ctx, state_ptr):
     session = ffi.from_handle(ctx)
     state = ffi.string(state_ptr).decode()
     session._call(session._handle_conn_state, state)
 
 
-@ffi.def_extern()
+@_def_extern()
 def callback_conn_active(ctx):
     session = ffi.from_handle(ctx)
     session._call(session._handle_conn_active)
 
 
-@ffi.def_extern()
+@_def_extern()
 def callback_log(ctx, msg_ptr, msg_len):
     session = ffi.from_handle(ctx)
     msg = _decode_str(ffi.buffer(msg_ptr, msg_len))
     session._call(session._handle_log, msg)
 
 
+@_def_extern()
+def callback_batch(item):
+    session = None
+    events = []
+
+    while item:
+        ctx = lib.session_context_handle(item.context)
+        if ctx:
+            s = ffi.from_handle(ctx)
+            if events and (s is not session or item.type != lib.BATCH_EVENT):
+                session._call(session._handle_events, events)
+                events = []
+            session = s
+
+            if item.dropped:
+                log.error("%s: %d callbacks dropped: out of memory", session, item.dropped)
+
+            if item.type == lib.BATCH_EVENT:
+                params = _decode_params(session, ffi.buffer(item.data, item.data_len))
+                payload = []
+                for i in xrange(item.payload_len):
+                    frame = lib.payload_frame(item.payload, i)
+                    payload.append(ffi.buffer(lib.frame_data(frame), lib.frame_size(frame))[:])
+                if session.metrics is not None:
+                    _received(session.metrics, params, item.data_len, payload)
+                events.append((params, payload, item.last_reply))
+            elif item.type == lib.BATCH_SESSION_EVENT:
+                params = (session.codec or _default_codec()).decode(ffi.buffer(item.data, item.data_len))
+                session._call(session._handle_session_event, params)
+            elif item.type == lib.BATCH_CLOSE:
+                session._call(session._handle_close)
+            elif item.type == lib.BATCH_CONN_STATE:
+                session._call(session._handle_conn_state, ffi.string(item.data).decode())
+            elif item.type == lib.BATCH_CONN_ACTIVE:
+                session._call(session._handle_conn_active)
+            elif item.type == lib.BATCH_LOG:
+                session._call(session._handle_log, _decode_str(ffi.buffer(item.data, item.data_len)))
+
+        item = item.next
+
+    if events:
+        session._call(session._handle_events, events)
+
+
 del callback_session_event
 del callback_event
 del callback_close
 del callback_conn_state
 del callback_conn_active
 del callback_log
+del callback_batch
@@ -0,0 +1,406 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Pure-Python implementation of the session protocol for
+ninchat.client.asyncio.Session, using the third-party aiohttp package.
+Select it per session with the transport constructor argument:
+
+.. code-block:: python
+
+   from ninchat.client.aiohttp import Transport
+   from ninchat.client.asyncio import Session
+
+   session = Session(transport=Transport)
+
+Callbacks are executed directly by the transport's task, so no threads
+are involved.  Actions must be sent in the event loop's thread.  Event
+streams with the "block" overflow policy stop reading from the socket
+until the consumer catches up.
+
+Server-side session state (session id and the last received event id) is
+kept for resuming the session after a dropped connection.  Actions whose
+final reply hasn't been received are sent again after resumption.  If the
+server has lost the session, a new one is created and the unreplied
+actions are sent to it.
+"""
+
+__all__ = ["Transport"]
+
+import asyncio
+import logging
+import random
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+
+from ninchat.codec import get_default as _default_codec
+
+from . import Error, _event_rules, _monotonic, _prepare_action, _received, _rules_match
+
+log = logging.getLogger(__name__)
+
+_closed_types = (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR)
+
+
+class _Disconnect(Exception):
+    pass
+
+
+class Transport:
+    """Session protocol engine.  Instances are created by the session;
+    use functools.partial() to pass keyword arguments.  The client
+    argument is an aiohttp.ClientSession to be used for connecting; by
+    default the transport creates its own.
+
+    .. attribute:: url
+
+       The WebSocket endpoint of the first connection.  The server may
+       redirect subsequent connections to another host.
+
+    .. attribute:: heartbeat
+
+       WebSocket ping interval in seconds, or None.
+
+    .. attribute:: ack_interval
+
+       Maximum delay (in seconds) before received events are
+       acknowledged to the server.
+
+    .. attribute:: ack_window
+
+       Number of received events which causes immediate acknowledgement.
+
+    .. attribute:: max_backoff
+
+       Maximum delay (in seconds) between connection attempts.
+"""
+
+    url = "wss://api.ninchat.com/v2/socket"  # type: str
+    heartbeat = 30.0     # type: Optional[float]
+    ack_interval = 1.0   # type: float
+    ack_window = 1000    # type: int
+    max_backoff = 60.0   # type: float
+
+    def __init__(self, session, *, url=None, client=None):
+        # type: (ninchat.client.asyncio.Session, Optional[str], Optional[aiohttp.ClientSession]) -> None
+        self.session = session
+        if url is not None:
+            self.url = url
+        self.client = client
+
+        self._params = None
+        self._params_version = 0
+        self._filter = None
+        self._session_id = None
+        self._session_url = None
+        self._event_id = None
+        self._acked_id = None
+        self._ack_due = None
+        self._last_action_id = 0
+        self._pending = OrderedDict()  # Actions awaiting their final reply.
+        self._outbox = deque()
+        self._waiter = None
+        self._active_at = 0
+        self._close = None
+        self._closing = False
+        self._closed = False
+
+    def set_params(self, params):
+        self._params = dict(params)
+        self._params_version += 1
+        self._wake()
+
+    def set_event_filter(self, rules):
+        self._filter = _event_rules(rules) or None
+
+    def open(self):
+        self.session.loop.create_task(self._run())
+
+    def close(self):
+        self._closing = True
+        self._close = 0, (self.session.codec or _default_codec()).encode({"action": "close_session"}), ()
+        if self._session_id is not None:
+            self._outbox.append(self._close)
+        self._wake()
+
+    def prepare(self, params, payload):
+        if self._closing:
+            raise Error("session closed")
+
+        params, action_id = _prepare_action(params, payload, self._last_action_id)
+        if action_id:
+            self._last_action_id = action_id
+        return params, action_id
+
+    def send(self, action_id, params_json, payload):
+        action = action_id, params_json, [bytes(frame) for frame in payload] if payload else ()
+        if action_id:
+            self._pending[action_id] = action
+        self._outbox.append(action)
+        self._wake()
+
+    async def _run(self):
+        session = self.session
+        client = self.client
+        if client is None:
+            client = aiohttp.ClientSession()
+
+        backoff = 0
+
+        try:
+            while not (self._closing and self._session_id is None):
+                if backoff:
+                    await self._wait(backoff * random.uniform(0.5, 1))
+
+                self._deliver(session._handle_conn_state, "connecting")
+
+                try:
+                    ws = await client.ws_connect(self._session_url or self.url, heartbeat=self.heartbeat)
+                except (aiohttp.ClientError, OSError, asyncio.TimeoutError) as e:
+                    log.debug("connection failed: %s", e)
+                    self._deliver(session._handle_conn_state, "disconnected")
+                    if self._closing:
+                        break
+                    backoff = min(max(backoff * 2, 0.5), self.max_backoff)
+                    continue
+
+                params_version = self._params_version
+                connected = False
+                rejected = False
+
+                try:
+                    if await self._handshake(ws):
+                        connected = True
+                        backoff = 0
+                        self._deliver(session._handle_conn_state, "connected")
+                        await self._communicate(ws)
+                    else:
+                        rejected = True
+                except (aiohttp.ClientError, OSError, asyncio.TimeoutError, _Disconnect) as e:
+                    log.debug("disconnected: %s", e)
+                finally:
+                    await ws.close()
+
+                self._deliver(session._handle_conn_state, "disconnected")
+
+                if self._closed:
+                    break
+
+                if self._closing:
+                    if not connected:
+                        break
+                    continue  # Resume the session to send close_session.
+
+                if rejected:
+                    # Session creation failed; wait for new params.
+                    while params_version == self._params_version and not self._closing:
+                        await self._wait(None)
+                elif not connected:
+                    backoff = min(max(backoff * 2, 0.5), self.max_backoff)
+        finally:
+            if self.client is None:
+                await client.close()
+
+            self._deliver(session._handle_close)
+
+    async def _handshake(self, ws):
+        codec = self.session.codec or _default_codec()
+
+        if self._session_id is not None:
+            await ws.send_str(codec.encode({
+                "action":     "resume_session",
+                "session_id": self._session_id,
+                "event_id":   self._event_id,
+            }).decode())
+        else:
+            if self._closing:
+                return False
+
+            await ws.send_str(codec.encode(dict(self._params or {}, action="create_session")).decode())
+
+            params, _ = await self._receive(ws, codec)
+            if params.get("event") != "session_created":
+                self._deliver(self.session._handle_session_event, params)
+                return False
+
+            self._session_id = params.get("session_id")
+            self._event_id = self._acked_id = params.get("event_id")
+            self._ack_due = None
+
+            host = params.get("session_host")
+            if host:
+                self._session_url = _replace_host(self.url, host)
+
+            self._deliver(self.session._handle_session_event, params)
+
+        # Unreplied actions are sent again; the server skips the ones it
+        # has already processed.
+        outbox = deque(self._pending.values())
+        outbox.extend(action for action in self._outbox if not action[0] and action is not self._close)
+        if self._closing:
+            outbox.append(self._close)
+        self._outbox = outbox
+        return True
+
+    async def _communicate(self, ws):
+        loop = self.session.loop
+        tasks = [loop.create_task(self._read(ws)), loop.create_task(self._write(ws))]
+
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for t in tasks:
+                t.cancel()
+
+        for t in done:
+            t.result()
+
+    async def _read(self, ws):
+        session = self.session
+        codec = session.codec or _default_codec()
+
+        while not self._closed:
+            params, payload = await self._receive(ws, codec)
+
+            event_id = params.get("event_id")
+            if event_id is not None:
+                self._event_id = event_id
+                if self._ack_due is None:
+                    self._ack_due = _monotonic() + self.ack_interval
+                if event_id - (self._acked_id or 0) >= self.ack_window:
+                    self._wake()
+
+            event = params.get("event")
+            action_id = params.get("action_id")
+            last_reply = False
+
+            if action_id is None:
+                if event == "error" and params.get("error_type") == "session_not_found":
+                    self._session_id = None
+                    self._session_url = None
+                    raise _Disconnect("session lost")
+
+                if event == "session_closed":
+                    self._closed = True
+
+                if self._filter is not None and _rules_match(self._filter, params):
+                    continue
+            else:
+                last_reply = _last_reply(params)
+                if last_reply:
+                    self._pending.pop(action_id, None)
+
+            self._deliver(session._handle_event, params, payload, last_reply)
+
+            while not self._closing:
+                space = session._stream_space()
+                if space is None:
+                    break
+                await space
+
+    async def _receive(self, ws, codec):
+        msg = await ws.receive()
+        if msg.type in _closed_types:
+            raise _Disconnect("connection closed")
+
+        data = msg.data if msg.type == aiohttp.WSMsgType.BINARY else msg.data.encode()
+        params = codec.decode(data)
+
+        payload = []
+        for _ in range(params.pop("frames", 0)):
+            msg = await ws.receive()
+            if msg.type in _closed_types:
+                raise _Disconnect("connection closed")
+            payload.append(msg.data if msg.type == aiohttp.WSMsgType.BINARY else msg.data.encode())
+
+        session = self.session
+        if session.metrics is not None:
+            _received(session.metrics, params, len(data), payload)
+
+        now = _monotonic()
+        if now - self._active_at >= 1:
+            self._active_at = now
+            self._deliver(session._handle_conn_active)
+
+        return params, payload
+
+    async def _write(self, ws):
+        codec = self.session.codec or _default_codec()
+
+        while True:
+            outbox = self._outbox
+            while outbox:
+                _, params_json, payload = outbox.popleft()
+                await ws.send_str(params_json.decode())
+                for frame in payload:
+                    await ws.send_bytes(frame)
+
+            timeout = None
+            if self._ack_due is not None:
+                timeout = self._ack_due - _monotonic()
+                if timeout <= 0 or self._event_id - (self._acked_id or 0) >= self.ack_window:
+                    event_id = self._event_id
+                    await ws.send_str(codec.encode({"action": "resume_session", "event_id": event_id}).decode())
+                    self._acked_id = event_id
+                    self._ack_due = None
+                    continue
+
+            await self._wait(timeout)
+
+    async def _wait(self, timeout):
+        f = self._waiter = self.session.loop.create_future()
+        try:
+            await asyncio.wait_for(f, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._waiter = None
+
+    def _wake(self):
+        f = self._waiter
+        if f is not None and not f.done():
+            f.set_result(None)
+
+    def _deliver(self, call, *args):
+        try:
+            call(*args)
+        except Exception as e:
+            self.session.loop.call_exception_handler({
+                "message": "Exception in callback {!r}".format(call),
+                "exception": e,
+            })
+
+
+def _last_reply(params):
+    if params.get("history_length"):
+        return False
+    if params.get("event") == "search_results" and ("users" in params or "channels" in params):
+        return False
+    return True
+
+
+def _replace_host(url, host):
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, host, parts.path, parts.query, parts.fragment))
@@ -24,13 +24,16 @@
 
 ""  # Enables documentation generation.
 
-__all__ = ["Session"]
+__all__ = ["Session", "SessionPool", "EventStream", "ReplyStream"]
 
 import asyncio
+import threading
+import weakref
+from collections import deque
 
 try:
-    from typing import Any, ByteString, Callable, Dict, Optional, Sequence
-    (Any, ByteString, Callable, Dict, Optional, Sequence)  # silence typing warnings
+    from typing import Any, ByteString, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+    (Any, ByteString, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union)  # silence typing warnings
 except ImportError:
     pass
 
@@ -44,7 +47,60 @@ except AttributeError:
     # Python 3.4
     _create_future = asyncio.Future
 
+from . import Error
 from . import Session as BaseSession
+from . import _cancel_callback, _deadline, _event_rules, _future_callback, _monotonic, _rules_match
+from .pool import SessionPool as BaseSessionPool
+
+_dispatchers = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+_dispatchers_lock = threading.Lock()
+
+
+class _Dispatcher:
+    """Runs callbacks queued by native threads in an event loop.  The
+    loop is woken up once per burst instead of once per callback."""
+
+    __slots__ = ["loop", "calls", "lock", "scheduled", "__weakref__"]
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.calls = deque()
+        self.lock = threading.Lock()
+        self.scheduled = False
+
+    def call(self, *sig):
+        self.calls.append(sig)
+        with self.lock:
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.loop.call_soon_threadsafe(self.run)
+
+    def run(self):
+        # Callbacks queued after the flag has been cleared schedule a new
+        # run, so this one doesn't need to consume them.  That keeps a
+        # steady stream of events from starving the rest of the loop.
+        with self.lock:
+            self.scheduled = False
+
+        calls = self.calls
+        for _ in range(len(calls)):
+            sig = calls.popleft()
+            try:
+                sig[0](*sig[1:])
+            except Exception as e:
+                self.loop.call_exception_handler({
+                    "message": "Exception in callback {!r}".format(sig[0]),
+                    "exception": e,
+                })
+
+
+def _get_dispatcher(loop):
+    with _dispatchers_lock:
+        d = _dispatchers.get(loop)
+        if d is None:
+            d = _dispatchers[loop] = _Dispatcher(loop)
+        return d
 
 
 class Session(BaseSession):
@@ -60,17 +116,92 @@ class Session(BaseSession):
 
        A future which will be marked as done once the session closing is
        complete.
+
+    .. attribute:: coalesce_callbacks
+
+       When true (the default), callbacks from the native library are
+       queued and run in bursts, so that the event loop is woken up once
+       per burst instead of once per event.  All sessions of an event
+       loop share the queue, which preserves the order of the callbacks.
+       Set to false before construction to schedule each callback with
+       loop.call_soon_threadsafe().
+
+    .. attribute:: event_buffer_size
+
+       The default number of events buffered by each stream returned by
+       events().  Defaults to 1000.
+
+    .. attribute:: event_overflow
+
+       What an event stream does when its buffer is full:
+
+       - "block" (the default) holds back the native library's event
+         delivery until the consumer catches up.
+       - "drop_oldest" discards the oldest buffered event, and counts it
+         in the stream's dropped attribute.
+       - "fail" closes the session; the stream raises
+         ninchat.client.Error after yielding the buffered events.
+
+    If the in-flight window (see max_inflight and max_inflight_bytes) is
+    full, send() and call() raise ninchat.client.Error instead of
+    blocking the event loop.  Producers should await drain() before
+    sending.
 """
 
-    def __init__(self, *, loop=None):
-        # type: (Optional[asyncio.AbstractEventLoop]) -> None
+    _deferred_callbacks = True
 
-        super().__init__()
+    coalesce_callbacks = True
+    event_buffer_size = 1000
+    event_overflow = "block"
+
+    __slots__ = [
+        "loop",
+        "_dispatcher",
+        "_streams",
+        "_reply_streams",
+        "_opened",
+        "_closed",
+        "_closing",
+        "_expiry_timer",
+        "_expiry_deadline",
+        "_drain_waiters",
+    ]
+
+    def __init__(self, *, loop=None, batch_events=False, transport=None):
+        # type: (Optional[asyncio.AbstractEventLoop], bool, Optional[Callable[[Session], Any]]) -> None
+
+        super().__init__(batch_events, transport)
 
         self.loop = loop or asyncio.get_event_loop()
-        self.opened = _create_future(loop=self.loop)
-        self.closed = _create_future(loop=self.loop)
+        self._dispatcher = _get_dispatcher(self.loop) if self.coalesce_callbacks else None
+        self._streams = None
+        self._reply_streams = None
+        self._opened = None
+        self._closed = None
         self._closing = False
+        self._expiry_timer = None
+        self._expiry_deadline = None
+        self._drain_waiters = None
+
+    # The futures are created on demand, as most sessions never need them.
+
+    @property
+    def opened(self):
+        # type: () -> asyncio.Future
+        f = self._opened
+        if f is None:
+            f = self._opened = _create_future(loop=self.loop)
+        return f
+
+    @property
+    def closed(self):
+        # type: () -> asyncio.Future
+        f = self._closed
+        if f is None:
+            f = self._closed = _create_future(loop=self.loop)
+            if self.state == "closed":
+                f.set_result(None)
+        return f
 
     def __aenter__(self):
         if self.state == "uninitialized":
@@ -107,34 +238,545 @@ class Session(BaseSession):
 
         super().close()
         self._closing = True
+
+        # Release native threads blocked by full streams.
+        for stream in self._streams or ():
+            stream._wakeup()
+        for stream in list((self._reply_streams or {}).values()):
+            stream._wakeup()
+
         return self.closed
 
-    def call(self, params, payload=None, on_reply=None):
-        # type: (Dict[str,Any], Optional[Sequence[ByteString]], Optional[Callable[[Dict[str,Any], List[bytes], bool], None]]) -> asyncio.Future
+    def call(self, params, payload=None, on_reply=None, timeout=None):
+        # type: (Dict[str,Any], Optional[Sequence[ByteString]], Optional[Callable[[Dict[str,Any], List[bytes], bool], None]], Optional[float]) -> asyncio.Future
         """An awaitable version of ninchat.client.Session.send().
-        Returns the final reply event's params and payload."""
+        Returns the final reply event's params and payload.
+
+        If the timeout (which defaults to the reply_timeout attribute)
+        expires, the future raises asyncio.TimeoutError.  The deadline is
+        tracked by the session, so wrapping the call in asyncio.wait_for()
+        isn't necessary.  Cancelling the future forgets the reply
+        callback immediately."""
+
+        if timeout is None:
+            timeout = self.reply_timeout
 
         f = _create_future(loop=self.loop)
+        callback = _future_callback(f, on_reply, _deadline(timeout), asyncio.TimeoutError)
+        action_id = self.send(params, payload, callback, timeout)
+        f.add_done_callback(_cancel_callback(self, action_id))
+        return f
 
-        def callback(params, payload, last_reply):
-            if params is None:
-                f.cancel()
-            else:
-                try:
-                    if on_reply is not None:
-                        on_reply(params, payload, last_reply)
-                finally:
-                    if last_reply:
-                        f.set_result((params, payload))
-
-        self.send(params, payload, callback)
+    def call_many(self, actions, timeout=None):
+        # type: (Sequence[Tuple[Dict[str,Any], Optional[Sequence[ByteString]], Optional[Callable[[Dict[str,Any], List[bytes], bool], None]]]], Optional[float]) -> List[asyncio.Future]
+        """An awaitable version of ninchat.client.Session.send_many().
+        Returns a list of futures which provide the final reply event's
+        params and payload of each action.  Timeout and cancellation
+        work like with call()."""
+
+        if timeout is None:
+            timeout = self.reply_timeout
+
+        deadline = _deadline(timeout)
+        futures = []
+        callbacks = []
+
+        for params, payload, on_reply in actions:
+            f = _create_future(loop=self.loop)
+            futures.append(f)
+            callbacks.append((params, payload, _future_callback(f, on_reply, deadline, asyncio.TimeoutError)))
+
+        action_ids = self.send_many(callbacks, timeout)
+
+        for f, action_id in zip(futures, action_ids):
+            f.add_done_callback(_cancel_callback(self, action_id))
+
+        return futures
+
+    def stream(self, params, payload=None, *, maxsize=None, timeout=None):
+        # type: (Dict[str,Any], Optional[Sequence[ByteString]], Optional[int], Optional[float]) -> ReplyStream
+        """Send an action and return an async iterator over its reply
+        events as (params, payload, last_reply) tuples.  The iteration
+        ends after the final reply event.
+
+        At most maxsize (which defaults to event_buffer_size) reply
+        events are buffered; after that the native library's event
+        delivery waits for the consumer.  If the timeout (which defaults
+        to the reply_timeout attribute) expires before the final reply,
+        the iterator raises asyncio.TimeoutError.  If the session is
+        closed, it raises ninchat.client.Error.  Closing the iterator
+        forgets the action like cancelling a call() does.  Abandoning an
+        iteration (e.g. breaking out of an async for loop) closes the
+        iterator."""
+
+        if timeout is None:
+            timeout = self.reply_timeout
+
+        stream = ReplyStream(self, maxsize or self.event_buffer_size, _deadline(timeout))
+        stream.action_id = self.send(params, payload, stream._on_reply, timeout)
+
+        if not stream._ended:
+            if self._reply_streams is None:
+                self._reply_streams = {}
+            self._reply_streams[stream.action_id] = stream
+
+        return stream
+
+    def events(self, rules=None, *, maxsize=None, overflow=None):
+        # type: (Optional[Iterable[Union[str, Tuple[str, str]]]], Optional[int], Optional[str]) -> EventStream
+        """Returns an async iterator over (params, payload, last_reply)
+        tuples of the events received from now on, including session
+        events.  The iteration ends when the session has been closed.
+
+        Rules are specified like for set_event_filter(), but they select
+        the events which are included in the stream.  By default all
+        events are included.  The maxsize and overflow arguments default
+        to event_buffer_size and event_overflow.  Several streams may be
+        iterated concurrently; each one gets its own copy of the
+        matching events.  Abandoning an iteration (e.g. breaking out of an
+        async for loop) closes the stream."""
+
+        stream = EventStream(self, rules, maxsize or self.event_buffer_size, overflow or self.event_overflow)
+
+        if self.state == "closed":
+            stream._end()
+        else:
+            self._streams = (self._streams or ()) + (stream,)
+
+        return stream
+
+    def drain(self):
+        # type: () -> asyncio.Future
+        """Returns a future which will be marked as done when the
+        in-flight window has room for another action, or the session
+        has been closed."""
+
+        f = _create_future(loop=self.loop)
+        if self._window_ready():
+            f.set_result(None)
+        else:
+            if self._drain_waiters is None:
+                self._drain_waiters = []
+            self._drain_waiters.append(f)
         return f
 
+    def _window_ready(self):
+        with self._replies_lock:
+            return self._ctx is None or self._window_fits(1, 1)
+
+    def _wait_window(self, count, size):
+        raise Error("too many actions in flight")
+
+    def _window_changed(self):
+        waiters = self._drain_waiters
+        if waiters and self._window_ready():
+            self._drain_waiters = None
+            for f in waiters:
+                if not f.done():
+                    f.set_result(None)
+
+    def _remove_stream(self, stream):
+        streams = tuple(s for s in self._streams or () if s is not stream)
+        self._streams = streams or None
+
+    def _remove_reply_stream(self, stream):
+        streams = self._reply_streams
+        if streams and streams.get(stream.action_id) is stream:
+            del streams[stream.action_id]
+            if not streams:
+                self._reply_streams = None
+
+    def _handle_session_event(self, params):
+        try:
+            super()._handle_session_event(params)
+        finally:
+            self._publish(params, [], True)
+
+    def _handle_event(self, params, payload, last_reply):
+        try:
+            super()._handle_event(params, payload, last_reply)
+        finally:
+            self._publish(params, payload, last_reply)
+
+    def _publish(self, params, payload, last_reply):
+        streams = self._streams
+        if streams:
+            item = params, payload, last_reply
+            for stream in streams:
+                if stream._matches(params):
+                    stream._put(item)
+
     def _handle_close(self):
+        if self._expiry_timer:
+            self._expiry_timer.cancel()
+            self._expiry_timer = None
+
+        streams = self._streams
+        self._streams = None
+
         try:
             super()._handle_close()
         finally:
-            self.closed.set_result(None)
+            if self._closed is not None:
+                self._closed.set_result(None)
+
+            for stream in streams or ():
+                stream._end()
+
+    def _schedule_reply_expiry(self, deadline):
+        if self._expiry_timer and self._expiry_deadline <= deadline:
+            return
+
+        if self._expiry_timer:
+            self._expiry_timer.cancel()
+
+        self._expiry_deadline = deadline
+        self._expiry_timer = self.loop.call_later(max(deadline - _monotonic(), 0), self._expire_replies)
+
+    def _expire_replies(self):
+        self._expiry_timer = None
+
+        deadline = self.expire_replies()
+        if deadline is not None:
+            self._schedule_reply_expiry(deadline)
+
+    def _call(self, *sig):
+        if self._streams or self._reply_streams:
+            self._reserve_streams(sig)
+
+        d = self._dispatcher
+        if d is not None:
+            d.call(*sig)
+        else:
+            self.loop.call_soon_threadsafe(*sig)
+
+    def _stream_space(self):
+        # Called by protocol engines, which can't block the event loop like
+        # a native thread does.  Returns a future if a blocking stream is
+        # full.
+        streams = list(self._streams or ())
+        streams.extend((self._reply_streams or {}).values())
+
+        for stream in streams:
+            if stream.overflow == "block" and len(stream._buffer) >= stream.maxsize:
+                return stream._space()
+        return None
+
+    def _reserve_streams(self, sig):
+        # Called by a native thread.  Blocking streams are bounded by
+        # making the native thread wait before the event is queued.
+        call = sig[0]
+        if call == self._handle_event:
+            events, wait = (sig[1],), True
+        elif call == self._handle_events:
+            events, wait = [e[0] for e in sig[1]], True
+        elif call == self._handle_session_event:
+            events, wait = (sig[1],), False
+        else:
+            return
+
+        for stream in self._streams or ():
+            if stream.overflow == "block":
+                n = sum(1 for params in events if stream._matches(params))
+                if n:
+                    stream._reserve(n, wait)
+
+        reply_streams = self._reply_streams
+        if reply_streams and wait:
+            for params in events:
+                stream = reply_streams.get(params.get("action_id"))
+                if stream is not None:
+                    stream._reserve(1, True)
+
+
+class EventStream:
+    """An async iterator returned by ninchat.client.asyncio.Session.events().
+    It may also be used as an async context manager, which closes the
+    stream on exit.
+
+    .. attribute:: dropped
+
+       The number of events discarded due to the "drop_oldest" overflow
+       policy.
+"""
+
+    __slots__ = [
+        "session",
+        "maxsize",
+        "overflow",
+        "dropped",
+        "_rules",
+        "_buffer",
+        "_getters",
+        "_reserved",
+        "_cond",
+        "_ended",
+        "_error",
+        "_space_waiter",
+    ]
+
+    def __init__(self, session, rules, maxsize, overflow):
+        # type: (Session, Optional[Iterable[Union[str, Tuple[str, str]]]], int, str) -> None
+
+        if overflow not in ("block", "drop_oldest", "fail"):
+            raise ValueError("unknown event overflow policy: {!r}".format(overflow))
+
+        self.session = session
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self._rules = None if rules is None else _event_rules(rules)
+        self._buffer = deque()
+        self._getters = deque()
+        self._reserved = 0
+        self._cond = threading.Condition() if overflow == "block" else None
+        self._ended = False
+        self._error = None
+        self._space_waiter = None
+
+    def __aiter__(self):
+        return _StreamIterator(self)
+
+    def __anext__(self):
+        f = _create_future(loop=self.session.loop)
+
+        if self._buffer:
+            f.set_result(self._buffer.popleft())
+            self._release()
+        elif self._ended:
+            f.set_exception(self._error or StopAsyncIteration())
+        else:
+            self._getters.append(f)
+
+        return f
+
+    def __aenter__(self):
+        f = _create_future(loop=self.session.loop)
+        f.set_result(self)
+        return f
+
+    def __aexit__(self, *exc):
+        self.close()
+        f = _create_future(loop=self.session.loop)
+        f.set_result(None)
+        return f
+
+    def close(self):
+        # type: () -> None
+        """Stop receiving events.  Pending iterations end, and buffered
+        events are discarded."""
+
+        self.session._remove_stream(self)
+        self._buffer.clear()
+        self._end()
+
+    def _abandon(self):
+        # Called when an iterator is garbage-collected, possibly in another
+        # thread.  A native thread may be blocked in _reserve(), waiting for
+        # a consumer which is gone.
+        if not self._ended:
+            try:
+                self.session.loop.call_soon_threadsafe(self.close)
+            except RuntimeError:
+                pass  # Event loop has been closed.
+
+    def _matches(self, params):
+        rules = self._rules
+        if rules is None:
+            return True
+
+        return _rules_match(rules, params)
+
+    def _put(self, item):
+        if self._ended:
+            return
+
+        getters = self._getters
+        while getters:
+            f = getters.popleft()
+            if not f.done():
+                f.set_result(item)
+                self._release()
+                return
+
+        buf = self._buffer
+        if self.overflow != "block" and len(buf) >= self.maxsize:
+            if self.overflow == "drop_oldest":
+                buf.popleft()
+                self.dropped += 1
+            else:
+                self._error = Error("event stream buffer overflow")
+                self._end()
+                self.session._remove_stream(self)
+                if self.session.state not in ("closing", "closed"):
+                    self.session.close()
+                return
+
+        buf.append(item)
+
+    def _end(self):
+        self._ended = True
+
+        if not self._buffer:
+            getters = self._getters
+            while getters:
+                f = getters.popleft()
+                if not f.done():
+                    f.set_exception(self._error or StopAsyncIteration())
+
+        self._wakeup()
+
+    def _reserve(self, n, wait):
+        session = self.session
+        with self._cond:
+            if wait:
+                while self._reserved >= self.maxsize and not self._ended and session.state not in ("closing", "closed"):
+                    self._cond.wait()
+            self._reserved += n
+
+    def _space(self):
+        f = self._space_waiter
+        if f is None:
+            f = self._space_waiter = _create_future(loop=self.session.loop)
+        return f
+
+    def _release(self):
+        if len(self._buffer) < self.maxsize:
+            self._wakeup_space()
+
+        cond = self._cond
+        if cond is not None:
+            with cond:
+                if self._reserved > 0:
+                    self._reserved -= 1
+                cond.notify()
+
+    def _wakeup_space(self):
+        f = self._space_waiter
+        if f is not None:
+            self._space_waiter = None
+            if not f.done():
+                f.set_result(None)
+
+    def _wakeup(self):
+        self._wakeup_space()
+
+        cond = self._cond
+        if cond is not None:
+            with cond:
+                cond.notify_all()
+
+
+class _StreamIterator:
+    """Iterator of an EventStream.  If the iteration is abandoned, e.g. by
+    breaking out of an async for loop, the stream is closed."""
+
+    __slots__ = ["stream", "__weakref__"]
+
+    def __init__(self, stream):
+        self.stream = stream
+        weakref.finalize(self, stream._abandon)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return self.stream.__anext__()
+
+
+class ReplyStream(EventStream):
+    """An async iterator over an action's reply events, returned by
+    ninchat.client.asyncio.Session.stream().  It may also be used as an
+    async context manager, which closes the stream on exit.
+
+    .. attribute:: action_id
+
+       The id of the action.
+"""
+
+    __slots__ = [
+        "action_id",
+        "_deadline",
+    ]
+
+    def __init__(self, session, maxsize, deadline):
+        # type: (Session, int, Optional[float]) -> None
+
+        super().__init__(session, None, maxsize, "block")
+        self.action_id = None
+        self._deadline = deadline
+
+    def close(self):
+        # type: () -> None
+        """Stop receiving reply events, and forget the action."""
+
+        if not self._ended:
+            self.session._remove_reply_stream(self)
+            self.session.cancel_reply(self.action_id)
+        self._buffer.clear()
+        self._end()
+
+    def _on_reply(self, params, payload, last_reply):
+        if self._ended:
+            return
+
+        if params is None:
+            if self._deadline is not None and _monotonic() >= self._deadline:
+                self._error = asyncio.TimeoutError()
+            elif self.session._ctx is None:
+                self._error = Error("session closed")
+            else:
+                self._error = Error("reply callback evicted")
+        else:
+            self._put((params, payload, last_reply))
+            if not last_reply:
+                return
+
+        if self.action_id is not None:
+            self.session._remove_reply_stream(self)
+        self._end()
+
+
+class SessionPool(BaseSessionPool):
+    """A version of ninchat.client.pool.SessionPool which owns
+    ninchat.client.asyncio.Session instances, and schedules session
+    creation in the asyncio event loop.  Its methods must be called in
+    the event loop's thread.
+"""
+
+    session_class = Session
+
+    def __init__(self, *, loop=None):
+        # type: (Optional[asyncio.AbstractEventLoop]) -> None
+
+        super().__init__()
+        self.loop = loop or asyncio.get_event_loop()
+
+    def close(self):
+        # type: () -> asyncio.Future
+        """Like ninchat.client.pool.SessionPool.close(), but returns a
+        future which will be marked as done once all sessions have been
+        closed."""
+
+        futures = [e.session.closed for e in self._entries.values() if e.state != "queued"]
+        super().close()
+
+        if futures:
+            return asyncio.gather(*futures)
+
+        f = _create_future(loop=self.loop)
+        f.set_result(None)
+        return f
+
+    def _new_session(self):
+        return self.session_class(loop=self.loop)
+
+    def _schedule(self, deadline):
+        if self._timer and self._timer_deadline <= deadline:
+            return
+
+        if self._timer:
+            self._timer.cancel()
 
-    def _call(self, call, *args):
-        self.loop.call_soon_threadsafe(call, *args)
+        self._timer = self.loop.call_later(max(deadline - _monotonic(), 0), self._tick)
+        self._timer_deadline = deadline
@@ -0,0 +1,183 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+""  # Enables documentation generation.
+
+from __future__ import absolute_import
+
+__all__ = ["ExecutorDispatcher", "default_key"]
+
+import logging
+import threading
+from collections import deque
+
+try:
+    from typing import Any, Callable, Dict, Hashable, List, Optional
+    (Any, Callable, Dict, Hashable, List, Optional)  # silence typing warnings
+except ImportError:
+    pass
+
+from . import _monotonic
+
+log = logging.getLogger(__name__)
+
+
+def default_key(params):
+    # type: (Dict[str,Any]) -> Optional[Hashable]
+    """Orders events per channel, or per user if the event doesn't refer
+    to a channel.  Other events are ordered among themselves."""
+    key = params.get("channel_id")
+    if key is None:
+        key = params.get("user_id")
+    return key
+
+
+class ExecutorDispatcher(object):
+    """An on_event callback which runs the wrapped handler in a
+    concurrent.futures executor, so that CPU-heavy handlers don't hold up
+    the session's callback thread.  Events with the same key (see
+    default_key) are handled one at a time in the order in which they
+    were received; events with different keys are handled concurrently,
+    so one slow conversation doesn't stall the rest.  An instance may be
+    shared by many sessions.
+
+    Action reply callbacks and the other session callbacks are not
+    affected.  Payload views (see Session.payload_views) are copied
+    before they are queued.
+
+    .. attribute:: max_pending
+
+       Maximum number of events waiting for the executor.
+
+    .. attribute:: overflow
+
+       What happens when max_pending events are waiting: "block" the
+       session's callback thread until there is room, or "drop" the
+       event.  Blocking isn't appropriate for asyncio and gevent
+       sessions, whose callback thread runs the event loop.
+"""
+
+    max_pending = 1000
+    overflow = "block"
+
+    def __init__(self, executor, handler, key=default_key):
+        # type: (concurrent.futures.Executor, Callable[[Dict[str,Any], List[bytes], bool], None], Callable[[Dict[str,Any]], Optional[Hashable]]) -> None
+        self.executor = executor
+        self.handler = handler
+        self.key = key
+
+        self._lock = threading.Lock()
+        self._room = threading.Condition(self._lock)
+        self._queues = {}
+        self._pending = 0
+        self._running = 0
+        self._peak_pending = 0
+        self._dropped = 0
+        self._blocked = 0
+        self._blocked_seconds = 0.0
+
+    def __call__(self, params, payload, last_reply):
+        # type: (Dict[str,Any], List[bytes], bool) -> None
+        if payload and isinstance(payload[0], memoryview):
+            payload = [view.tobytes() for view in payload]
+
+        key = self.key(params)
+        item = params, payload, last_reply
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                if self.overflow == "drop":
+                    self._dropped += 1
+                    return
+
+                self._blocked += 1
+                start = _monotonic()
+                while self._pending >= self.max_pending:
+                    self._room.wait()
+                self._blocked_seconds += _monotonic() - start
+
+            self._pending += 1
+            if self._pending > self._peak_pending:
+                self._peak_pending = self._pending
+
+            queue = self._queues.get(key)
+            if queue is not None:
+                queue.append(item)
+                return
+
+            queue = self._queues[key] = deque([item])
+
+        try:
+            self.executor.submit(self._run, key, queue)
+        except Exception:
+            with self._lock:
+                del self._queues[key]
+                self._pending -= len(queue)
+                self._room.notify_all()
+            raise
+
+    def stats(self):
+        # type: () -> Dict[str,Any]
+        """Returns saturation figures as a dictionary:
+
+        - pending: events waiting for the executor.
+        - peak_pending: the highest pending count seen.
+        - running: handlers currently being executed.
+        - keys: keys which have events pending or running.
+        - dropped: events discarded due to the "drop" overflow policy.
+        - blocked: times the callback thread had to wait for room.
+        - blocked_seconds: total time spent waiting for room.
+        """
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "peak_pending": self._peak_pending,
+                "running": self._running,
+                "keys": len(self._queues),
+                "dropped": self._dropped,
+                "blocked": self._blocked,
+                "blocked_seconds": self._blocked_seconds,
+            }
+
+    def _run(self, key, queue):
+        lock = self._lock
+
+        while True:
+            with lock:
+                if not queue:
+                    del self._queues[key]
+                    return
+
+                params, payload, last_reply = queue.popleft()
+                self._pending -= 1
+                self._running += 1
+                self._room.notify()
+
+            try:
+                self.handler(params, payload, last_reply)
+            except Exception:
+                log.exception("raised by event callback")
+            finally:
+                with lock:
+                    self._running -= 1
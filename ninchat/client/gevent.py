@@ -28,97 +28,147 @@ from __future__ import absolute_import
 
 __all__ = ["Session"]
 
-import fcntl
 import logging
-import os
-from time import time
+import threading
+import weakref
+from collections import deque
 
-import gevent
-from gevent.fileobject import FileObject
+try:
+    from typing import Optional
+    (Optional,)  # silence typing warnings
+except ImportError:
+    pass
 
-from _ninchat_cffi import ffi, lib
+import gevent
+import gevent.monkey
+from gevent.event import Event
+from gevent.hub import get_hub
 
 from . import Session as BaseSession
 
 log = logging.getLogger(__name__)
 
-poll_duration = 1
-poll_interval = 0.1
-
-
-def _create_pipe():
-    """Creates a readable co-operative (gevent) file-like object
-    and a writable non-blocking raw file descriptor."""
+_dispatchers = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+_dispatchers_lock = threading.Lock()
+
+# Native threads take the dispatcher locks, so they must not be
+# monkey-patched.
+try:
+    # Python 3
+    _allocate_lock = gevent.monkey.get_original("_thread", "allocate_lock")
+except ImportError:
+    # Python 2
+    _allocate_lock = gevent.monkey.get_original("thread", "allocate_lock")
+
+
+class _Dispatcher(object):
+    """Runs callbacks queued by native threads in a greenlet of the hub's
+    thread.  The hub is woken up by an async watcher, which is signaled
+    once per burst of callbacks."""
+
+    def __init__(self, hub):
+        self.calls = deque()
+        self.lock = _allocate_lock()
+        self.scheduled = False
+        self.wakeup = Event()
+
+        try:
+            self.watcher = hub.loop.async_()
+        except AttributeError:
+            # gevent < 1.3
+            self.watcher = getattr(hub.loop, "async")()
+        self.watcher.start(self.wakeup.set)
+
+        gevent.spawn(self.run)
+
+    def call(self, *sig):
+        self.calls.append(sig)
+        with self.lock:
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.watcher.send()
+
+    def run(self):
+        calls = self.calls
+
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+
+            # Callbacks queued after the flag has been cleared signal the
+            # watcher again.
+            with self.lock:
+                self.scheduled = False
+
+            for _ in range(len(calls)):
+                sig = calls.popleft()
+                session = sig[0].__self__
+                pool = session.callback_pool
+                if pool is None:
+                    _invoke(sig)
+                else:
+                    session._queue_callback(pool, sig)
+
+
+def _invoke(sig):
     try:
-        # Python 3, Linux
-        r, w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
-    except AttributeError:
-        r, w = os.pipe()
-        fcntl.fcntl(w, fcntl.F_SETFL, fcntl.fcntl(w, fcntl.F_GETFL) | os.O_NONBLOCK)
-    return FileObject(r, "rb"), w
-
-
-_wakeup_recv_file, _wakeup_send_fd = _create_pipe()
-_wakeup_send_time = 0
-
-_heartbeat_init = False
+        sig[0](*sig[1:])
+    except Exception:
+        log.exception("raised by callback")
 
-_pending_calls = []
 
-
-def _heartbeat_loop():
-    recv_time = 0
-
-    while True:
-        while time() < recv_time + poll_duration:
-            gevent.sleep(poll_interval)
-
-        if _wakeup_recv_file.read(1):
-            recv_time = time()
+def _get_dispatcher():
+    hub = get_hub()
+    with _dispatchers_lock:
+        d = _dispatchers.get(hub)
+        if d is None:
+            d = _dispatchers[hub] = _Dispatcher(hub)
+        return d
 
 
 class Session(BaseSession):
-    """A version of ninchat.client.Session which executes callbacks
-    in the main thread's gevent event loop."""
+    """A version of ninchat.client.Session which executes callbacks in a
+    greenlet of the gevent hub of the thread which created the session.
 
-    _new_session = lib.new_gevent_session
+    .. attribute:: callback_pool
 
-    def __init__(self):
-        global _heartbeat_init
-        if not _heartbeat_init:
-            gevent.spawn(_heartbeat_loop)
-            _heartbeat_init = True
+       A gevent.pool.Pool, or None.  By default the callbacks of all
+       sessions run one at a time, so a slow callback delays the events
+       of other sessions.  If a pool is set, each session's callbacks run
+       in a greenlet of the pool, in order, while other sessions proceed
+       concurrently.  The pool's size bounds the number of sessions whose
+       callbacks are running at a time.  Sessions may share a pool.
 
-        super(Session, self).__init__()
+    If the in-flight window is configured to block (see max_inflight and
+    inflight_overflow), gevent's monkey-patching of the threading module
+    is required for the callbacks to run while send() waits.
+"""
 
-    def _call(self, *sig):
-        _pending_calls.append(sig)
+    _deferred_callbacks = True
 
+    callback_pool = None  # type: Optional[gevent.pool.Pool]
 
-@ffi.def_extern()
-def gevent_wakeup():
-    global _wakeup_send_time
-    now = time()
-    if now - _wakeup_send_time > poll_duration:
-        if os.write(_wakeup_send_fd, b"\0"):
-            _wakeup_send_time = now
+    __slots__ = ["_dispatcher", "_pending"]
 
+    def __init__(self, transport=None):
+        super(Session, self).__init__(transport=transport)
+        self._dispatcher = _get_dispatcher()
+        self._pending = None
 
-@ffi.def_extern()
-def gevent_invoke():
-    done = 0
-    try:
-        for sig in _pending_calls:
-            done += 1
-            call = sig[0]
-            args = sig[1:]
-            try:
-                call(*args)
-            except Exception:
-                log.exception("raised by callback")
-    finally:
-        del _pending_calls[:done]
-
-
-del gevent_wakeup
-del gevent_invoke
+    def _call(self, *sig):
+        self._dispatcher.call(*sig)
+
+    def _queue_callback(self, pool, sig):
+        pending = self._pending
+        if pending is None:
+            self._pending = deque([sig])
+            pool.spawn(self._run_pending)  # Waits if the pool is full.
+        else:
+            pending.append(sig)
+
+    def _run_pending(self):
+        pending = self._pending
+        while pending:
+            _invoke(pending.popleft())
+        self._pending = None
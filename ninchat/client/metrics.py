@@ -0,0 +1,151 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+""  # Enables documentation generation.
+
+from __future__ import absolute_import
+
+__all__ = ["Metrics", "DEFAULT_BUCKETS"]
+
+import threading
+import weakref
+from bisect import bisect_left
+
+try:
+    from typing import Any, Dict, Optional, Sequence
+    (Any, Dict, Optional, Sequence)  # silence typing warnings
+except ImportError:
+    pass
+
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class _Histogram(object):
+    __slots__ = ["counts", "sum"]
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+    def snapshot(self, bounds):
+        buckets = []
+        total = 0
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            buckets.append((bound, total))
+        return {"count": total, "sum": self.sum, "buckets": buckets}
+
+
+class Metrics(object):
+    """Counters and latency histograms for ninchat.client sessions.  An
+    instance is enabled by assigning it to the metrics attribute of a
+    Session (or a Session subclass); it may be shared by many sessions.
+    All methods are thread-safe.
+
+    Histogram buckets are upper bounds in seconds.  Snapshots present
+    them cumulatively, with an infinite bound last.
+"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        # type: (Sequence[float]) -> None
+        self.bounds = tuple(buckets) + (float("inf"),)
+        self._lock = threading.Lock()
+        self._sessions = weakref.WeakSet()
+        self.reset()
+
+    def reset(self):
+        # type: () -> None
+        """Zero all counters and histograms."""
+        with self._lock:
+            self._events_in = {}
+            self._bytes_in = {}
+            self._actions_out = {}
+            self._bytes_out = {}
+            self._callback_seconds = {}
+            self._reply_seconds = {}
+            self._conn_state_seconds = {}
+
+    def snapshot(self):
+        # type: () -> Dict[str,Any]
+        """Returns the current values as a dictionary:
+
+        - events_in and bytes_in: counts per event name.
+        - actions_out and bytes_out: counts per action name.
+        - callback_seconds: execution time histogram per callback
+          (on_event, on_reply, on_session_event, on_conn_state,
+          on_conn_active, on_close).
+        - reply_seconds: histogram per action name, measured from
+          sending an action to its final reply event.
+        - conn_state_seconds: total time spent per connection state.
+        - pending_replies: number of reply callbacks currently retained
+          by the sessions which have used this instance.
+        """
+        bounds = self.bounds
+
+        with self._lock:
+            snapshot = {
+                "events_in": dict(self._events_in),
+                "bytes_in": dict(self._bytes_in),
+                "actions_out": dict(self._actions_out),
+                "bytes_out": dict(self._bytes_out),
+                "callback_seconds": {k: h.snapshot(bounds) for k, h in self._callback_seconds.items()},
+                "reply_seconds": {k: h.snapshot(bounds) for k, h in self._reply_seconds.items()},
+                "conn_state_seconds": dict(self._conn_state_seconds),
+            }
+            sessions = list(self._sessions)
+
+        snapshot["pending_replies"] = sum(s._pending_replies() for s in sessions)
+        return snapshot
+
+    def _action_sent(self, session, name, size):
+        with self._lock:
+            self._actions_out[name] = self._actions_out.get(name, 0) + 1
+            self._bytes_out[name] = self._bytes_out.get(name, 0) + size
+            if session not in self._sessions:
+                self._sessions.add(session)
+
+    def _event_received(self, name, size):
+        with self._lock:
+            self._events_in[name] = self._events_in.get(name, 0) + 1
+            self._bytes_in[name] = self._bytes_in.get(name, 0) + size
+
+    def _callback_done(self, name, seconds):
+        self._observe(self._callback_seconds, name, seconds)
+
+    def _reply_done(self, name, seconds):
+        self._observe(self._reply_seconds, name, seconds)
+
+    def _conn_state_done(self, state, seconds):
+        with self._lock:
+            self._conn_state_seconds[state] = self._conn_state_seconds.get(state, 0.0) + seconds
+
+    def _observe(self, histograms, name, seconds):
+        i = bisect_left(self.bounds, seconds)
+
+        with self._lock:
+            h = histograms.get(name)
+            if h is None:
+                h = histograms[name] = _Histogram(len(self.bounds))
+            h.counts[i] += 1
+            h.sum += seconds
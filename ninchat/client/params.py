@@ -0,0 +1,137 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+__all__ = ["EventParams"]
+
+import re
+
+try:
+    # Python 3
+    from collections.abc import Mapping
+except ImportError:
+    # Python 2
+    from collections import Mapping
+
+_unknown = object()
+
+_event_key = re.compile(br'"event"\s*:\s*')
+_event_value = re.compile(br'"([^"\\]*)"')
+_action_id_key = re.compile(br'"action_id"\s*:\s*')
+_action_id_value = re.compile(br'(-?[0-9]+)[,}\s]')
+
+
+def _scan(data, key_re, value_re, unique_is_toplevel):
+    # Escaped quotes inside strings can't match the key pattern, so every
+    # match is a real object key, but not necessarily a top-level one.  A
+    # single match is known to be top-level if the key always exists at
+    # the top level, or if the document contains no nested objects.
+    matches = key_re.finditer(data)
+
+    first = next(matches, None)
+    if first is None:
+        return None  # Not present at any level.
+
+    if next(matches, None) is not None or not (unique_is_toplevel or data.count(b"{") == 1):
+        return _unknown
+
+    m = value_re.match(data, first.end())
+    if not m:
+        return _unknown
+
+    return m.group(1)
+
+
+def _scan_event(data):
+    value = _scan(data, _event_key, _event_value, True)
+    if value is None or value is _unknown:
+        return value
+    return value.decode("utf-8")
+
+
+def _scan_action_id(data):
+    value = _scan(data, _action_id_key, _action_id_value, False)
+    if value is None or value is _unknown:
+        return value
+    return int(value)
+
+
+_scanners = {
+    "event":     _scan_event,
+    "action_id": _scan_action_id,
+}
+
+
+class EventParams(Mapping):
+    """Read-only mapping of event params which keeps the raw JSON document
+    and decodes it on first access.  The "event" and "action_id" parameters
+    can usually be looked up without decoding the whole document.
+
+    Use dict(params) to get a mutable (and JSON-serializable) copy.
+    """
+
+    __slots__ = ["_data", "_codec", "_dict"]
+
+    def __init__(self, data, codec):
+        # type: (bytes, ninchat.codec.Codec) -> None
+        self._data = data
+        self._codec = codec
+        self._dict = None
+
+    def _decode(self):
+        d = self._dict
+        if d is None:
+            data = self._data
+            if data is None:
+                return self._dict  # Decoded by another thread.
+            d = self._dict = self._codec.decode(data)
+            self._data = None
+        return d
+
+    def __getitem__(self, key):
+        data = self._data
+        if data is not None:
+            scan = _scanners.get(key)
+            if scan is not None:
+                value = scan(data)
+                if value is None:
+                    raise KeyError(key)
+                if value is not _unknown:
+                    return value
+
+        return self._decode()[key]
+
+    def __iter__(self):
+        return iter(self._decode())
+
+    def __len__(self):
+        return len(self._decode())
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self._decode())
+
+    def copy(self):
+        # type: () -> Dict[str, Any]
+        return dict(self._decode())
@@ -0,0 +1,340 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+""  # Enables documentation generation.
+
+from __future__ import absolute_import
+
+__all__ = ["SessionPool"]
+
+import logging
+import threading
+from collections import deque
+
+try:
+    from typing import Any, Dict, Hashable, Iterator, Optional
+    (Any, Dict, Hashable, Iterator, Optional)  # silence typing warnings
+except ImportError:
+    pass
+
+from . import Error, Session, _monotonic
+
+log = logging.getLogger(__name__)
+
+_handler_callbacks = ["on_event", "on_conn_active"]
+
+
+def _ignore(*args):
+    pass
+
+
+class _Entry(object):
+    __slots__ = ["pool", "key", "session", "handler", "params", "state", "conn_state", "deadline"]
+
+    def __init__(self, pool, key, session, handler, params):
+        self.pool = pool
+        self.key = key
+        self.session = session
+        self.handler = handler
+        self.params = params
+        self.state = "queued"
+        self.conn_state = None
+        self.deadline = None
+
+    def on_session_event(self, params):
+        self.pool._handle_session_event(self, params)
+
+    def on_close(self):
+        self.pool._handle_close(self)
+
+    def on_conn_state(self, state):
+        self.conn_state = state
+        callback = getattr(self.handler, "on_conn_state", None)
+        if callback:
+            callback(state)
+
+
+class SessionPool(object):
+    """Owns many sessions, e.g. one per puppet user, identified by
+    arbitrary keys.  Sessions are opened in the order in which they were
+    added, subject to a rate limit and a limit on concurrent session
+    creation, so that a process starting up doesn't cause a login storm.
+
+    Each session routes its callbacks to a handler object, which may
+    implement any of the Session callbacks (on_session_event, on_event,
+    on_close, on_conn_state, on_conn_active) as methods.  They are
+    installed directly on the session, so dispatch doesn't involve a
+    lookup.
+
+    Sessions are reconnected by the native library.  If it can't
+    create a new server session (an "error" session event), the session
+    stays in the pool until set_params() is called with new credentials
+    (which queues another attempt) or it is removed.
+
+    .. attribute:: session_class
+
+       The Session type to instantiate.
+
+    .. attribute:: open_rate
+
+       Maximum sustained number of session creation attempts per second.
+
+    .. attribute:: open_burst
+
+       Number of attempts which may be made at once after a quiet period.
+
+    .. attribute:: max_opening
+
+       Maximum number of session creations in progress at a time.
+
+    .. attribute:: open_timeout
+
+       Seconds after which a session creation attempt which hasn't
+       succeeded or failed stops occupying a max_opening slot.
+"""
+
+    session_class = Session
+    open_rate = 10.0
+    open_burst = 10
+    max_opening = 100
+    open_timeout = 60.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._queue = deque()
+        self._opening = {}
+        self._tokens = float(self.open_burst)
+        self._token_time = _monotonic()
+        self._timer = None
+        self._timer_deadline = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        # type: () -> Iterator[Hashable]
+        return iter(list(self._entries))
+
+    def __getitem__(self, key):
+        # type: (Hashable) -> Session
+        return self._entries[key].session
+
+    def add(self, key, params, handler=None):
+        # type: (Hashable, Dict[str,Any], Optional[Any]) -> Session
+        """Create a session and queue it to be opened with the given
+        params (see Session.set_params()).  The session may be opened
+        before this method returns; use a session_class subclass to
+        configure session attributes."""
+        if key in self._entries:
+            raise Error("session key already in pool")
+
+        session = self._new_session()
+        entry = _Entry(self, key, session, handler, params)
+
+        session.on_session_event = entry.on_session_event
+        session.on_close = entry.on_close
+        session.on_conn_state = entry.on_conn_state
+        for name in _handler_callbacks:
+            setattr(session, name, getattr(handler, name, None) or _ignore)
+
+        with self._lock:
+            if key in self._entries:
+                raise Error("session key already in pool")
+            self._entries[key] = entry
+            self._queue.append(entry)
+            starts = self._take_startable()
+
+        self._start(starts)
+        return session
+
+    def set_params(self, key, params):
+        # type: (Hashable, Dict[str,Any]) -> None
+        """Replace the params of a session.  If its creation has failed,
+        another attempt is queued."""
+        with self._lock:
+            entry = self._entries[key]
+            entry.params = params
+
+            if entry.state == "error":
+                entry.state = "queued"
+                self._queue.append(entry)
+                starts = self._take_startable()
+                direct = False
+            else:
+                starts = ()
+                direct = (entry.state != "queued")
+
+        if direct:
+            entry.session.set_params(params)
+        self._start(starts)
+
+    def remove(self, key):
+        # type: (Hashable) -> None
+        """Close a session and remove it from the pool.  The handler's
+        on_close method is invoked when the closing is complete."""
+        with self._lock:
+            entry = self._entries[key]
+            if entry.state == "closing":
+                return
+
+            opened = (entry.state != "queued")
+            if opened:
+                entry.state = "closing"
+                self._opening.pop(key, None)
+            else:
+                del self._entries[key]  # The queue skips it.
+                entry.state = "closed"
+
+        if opened:
+            entry.session.close()
+        else:
+            self._notify_close(entry)
+
+    def close(self):
+        # type: () -> None
+        """Remove all sessions."""
+        for key in list(self._entries):
+            try:
+                self.remove(key)
+            except KeyError:
+                pass
+
+    def health(self):
+        # type: () -> Dict[str,int]
+        """Returns the number of sessions in each pool state ("queued",
+        "opening", "open", "error", "closing") and connection state
+        ("connecting", "connected", "disconnected")."""
+        counts = dict.fromkeys(["queued", "opening", "open", "error", "closing", "connecting", "connected", "disconnected"], 0)
+
+        with self._lock:
+            entries = list(self._entries.values())
+
+        for entry in entries:
+            counts[entry.state] += 1
+            if entry.conn_state:
+                counts[entry.conn_state] += 1
+
+        counts["sessions"] = len(entries)
+        return counts
+
+    def _new_session(self):
+        return self.session_class()
+
+    def _handle_session_event(self, entry, params):
+        with self._lock:
+            if entry.state == "opening":
+                del self._opening[entry.key]
+            if entry.state in ("opening", "open", "error"):
+                entry.state = "open" if params.get("event") == "session_created" else "error"
+            starts = self._take_startable()
+
+        self._start(starts)
+
+        callback = getattr(entry.handler, "on_session_event", None)
+        if callback:
+            callback(params)
+
+    def _handle_close(self, entry):
+        with self._lock:
+            if self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+            if self._opening.get(entry.key) is entry:
+                del self._opening[entry.key]
+            entry.state = "closed"
+            starts = self._take_startable()
+
+        self._start(starts)
+        self._notify_close(entry)
+
+    def _notify_close(self, entry):
+        callback = getattr(entry.handler, "on_close", None)
+        if callback:
+            callback()
+
+    def _take_startable(self):
+        now = _monotonic()
+
+        for key, entry in list(self._opening.items()):
+            if entry.deadline <= now:
+                del self._opening[key]  # Still trying, but no longer blocks others.
+
+        self._tokens = min(float(self.open_burst), self._tokens + (now - self._token_time) * self.open_rate)
+        self._token_time = now
+
+        queue = self._queue
+        starts = []
+
+        while queue and len(self._opening) < self.max_opening and self._tokens >= 1:
+            entry = queue.popleft()
+            if entry.state != "queued" or self._entries.get(entry.key) is not entry:
+                continue
+
+            self._tokens -= 1
+            entry.state = "opening"
+            entry.deadline = now + self.open_timeout
+            self._opening[entry.key] = entry
+            starts.append(entry)
+
+        if queue:
+            if self._tokens < 1:
+                self._schedule(now + (1 - self._tokens) / self.open_rate)
+            elif self._opening:
+                delay = min(e.deadline for e in self._opening.values()) - now
+                self._schedule(now + max(delay, 0))
+
+        return starts
+
+    def _start(self, entries):
+        for entry in entries:
+            try:
+                session = entry.session
+                session.set_params(entry.params)
+                if session.state == "uninitialized":
+                    session.open()
+            except Exception:
+                log.exception("session open")
+
+    def _schedule(self, deadline):
+        if self._timer and self._timer_deadline <= deadline:
+            return
+
+        if self._timer:
+            self._timer.cancel()
+
+        timer = threading.Timer(deadline - _monotonic(), self._tick)
+        timer.daemon = True
+        self._timer = timer
+        self._timer_deadline = deadline
+        timer.start()
+
+    def _tick(self):
+        with self._lock:
+            self._timer = None
+            starts = self._take_startable()
+
+        self._start(starts)
@@ -0,0 +1,189 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+""  # Enables documentation generation.
+
+from __future__ import absolute_import
+
+__all__ = ["Session"]
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError
+
+try:
+    from typing import Any, ByteString, Callable, Dict, List, Optional, Sequence, Tuple
+    (Any, ByteString, Callable, Dict, List, Optional, Sequence, Tuple)  # silence typing warnings
+except ImportError:
+    pass
+
+from . import Session as BaseSession
+from . import _cancel_callback, _deadline, _future_callback, _monotonic
+
+log = logging.getLogger(__name__)
+
+
+class Session(BaseSession):
+    """A version of ninchat.client.Session which executes callbacks on a
+    dedicated thread owned by the session, so they don't run
+    concurrently with each other.  The thread is started by open(), and
+    it exits after on_close has been called.
+
+    send(), send_many(), call() and call_many() may be invoked on any
+    thread.  If the in-flight window is configured to block (see
+    max_inflight and inflight_overflow), don't send from the callbacks:
+    the replies which would make room are delivered by the same thread.
+"""
+
+    _deferred_callbacks = True
+
+    __slots__ = ["_calls", "_calls_cond", "_thread", "_expiry_deadline"]
+
+    def __init__(self, batch_events=False, transport=None):
+        # type: (bool, Optional[Callable[[BaseSession], Any]]) -> None
+
+        super(Session, self).__init__(batch_events, transport)
+
+        self._calls = deque()
+        self._calls_cond = threading.Condition(threading.Lock())
+        self._thread = None
+        self._expiry_deadline = None
+
+    def open(self, on_open=None):
+        # type: (Optional[Callable[[Dict[str,Any]], None]]) -> None
+        """Like ninchat.client.Session.open(), but also starts the
+        callback thread."""
+
+        self._thread = threading.Thread(target=self._run, name="ninchat-session")
+        self._thread.daemon = True
+        self._thread.start()
+
+        super(Session, self).open(on_open)
+
+    def call(self, params, payload=None, on_reply=None, timeout=None):
+        # type: (Dict[str,Any], Optional[Sequence[ByteString]], Optional[Callable[[Dict[str,Any], List[bytes], bool], None]], Optional[float]) -> Future
+        """A version of ninchat.client.Session.send() which returns a
+        concurrent.futures.Future.  Its result is the final reply event's
+        params and payload.
+
+        If the timeout (which defaults to the reply_timeout attribute)
+        expires, the future raises concurrent.futures.TimeoutError.  If
+        the session is closed, the future is cancelled.  Cancelling the
+        future forgets the reply callback immediately."""
+
+        if timeout is None:
+            timeout = self.reply_timeout
+
+        f = Future()
+        callback = _future_callback(f, on_reply, _deadline(timeout), TimeoutError)
+        action_id = self.send(params, payload, callback, timeout)
+        f.add_done_callback(_cancel_callback(self, action_id))
+        return f
+
+    def call_many(self, actions, timeout=None):
+        # type: (Sequence[Tuple[Dict[str,Any], Optional[Sequence[ByteString]], Optional[Callable[[Dict[str,Any], List[bytes], bool], None]]]], Optional[float]) -> List[Future]
+        """A version of ninchat.client.Session.send_many() which returns
+        a list of futures which provide the final reply event's params
+        and payload of each action.  Timeout and cancellation work like
+        with call()."""
+
+        if timeout is None:
+            timeout = self.reply_timeout
+
+        deadline = _deadline(timeout)
+        futures = []
+        callbacks = []
+
+        for params, payload, on_reply in actions:
+            f = Future()
+            futures.append(f)
+            callbacks.append((params, payload, _future_callback(f, on_reply, deadline, TimeoutError)))
+
+        action_ids = self.send_many(callbacks, timeout)
+
+        for f, action_id in zip(futures, action_ids):
+            f.add_done_callback(_cancel_callback(self, action_id))
+
+        return futures
+
+    def _call(self, *sig):
+        with self._calls_cond:
+            self._calls.append(sig)
+            if len(self._calls) == 1:
+                self._calls_cond.notify()
+
+    def _defer(self, call, *args):
+        # Reply callbacks triggered by send() or expire_replies() on other
+        # threads are handed over to the callback thread.
+        thread = self._thread
+        if thread is None or thread is threading.current_thread() or not thread.is_alive():
+            call(*args)
+        else:
+            self._call(call, *args)
+
+    def _schedule_reply_expiry(self, deadline):
+        with self._calls_cond:
+            if self._expiry_deadline is None or deadline < self._expiry_deadline:
+                self._expiry_deadline = deadline
+                self._calls_cond.notify()
+
+    def _run(self):
+        calls = self._calls
+        cond = self._calls_cond
+        handle_close = self._handle_close
+
+        while True:
+            with cond:
+                while not calls:
+                    deadline = self._expiry_deadline
+                    if deadline is None:
+                        cond.wait()
+                    else:
+                        timeout = deadline - _monotonic()
+                        if timeout <= 0:
+                            break
+                        cond.wait(timeout)
+
+                expire = self._expiry_deadline is not None and self._expiry_deadline <= _monotonic()
+                if expire:
+                    self._expiry_deadline = None
+
+                batch = list(calls)
+                calls.clear()
+
+            if expire:
+                deadline = self.expire_replies()
+                if deadline is not None:
+                    self._schedule_reply_expiry(deadline)
+
+            for sig in batch:
+                try:
+                    sig[0](*sig[1:])
+                except Exception:
+                    log.exception("raised by callback")
+
+                if sig[0] == handle_close:
+                    return
+
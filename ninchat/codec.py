@@ -0,0 +1,214 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""JSON encoding and decoding.
+
+The session client and the Call API helpers encode action params and decode
+event params using a codec object.  Codecs produce UTF-8 encoded bytes and
+accept any bytes-like object as input (bytes, memoryview, cffi buffers), so
+payloads needn't be converted to str on the way.
+
+The default codec uses the standard json module.  A faster third-party
+implementation may be selected process-wide with set_default(), or for a
+single ninchat.client.Session by setting its codec attribute:
+
+.. code-block:: python
+
+   import ninchat.codec
+
+   ninchat.codec.set_default("auto")
+
+The "auto" codec is the first available one of "orjson", "msgspec" and
+"ujson", falling back to "json" if none of them is installed.
+
+.. autofunction:: get
+.. autofunction:: get_default
+.. autofunction:: set_default
+.. autoclass:: Codec
+   :members:
+
+"""
+
+from __future__ import absolute_import
+
+__all__ = ["Codec", "get", "get_default", "set_default"]
+
+import json
+
+try:
+    # Python 2
+    unicode
+
+    def _decode_str(x):
+        return unicode(str(x), "utf-8")  # noqa
+except NameError:
+    # Python 3
+    def _decode_str(x):
+        return str(x, "utf-8")
+
+
+class Codec(object):
+    """JSON codec interface.
+
+    .. attribute:: name
+
+       str
+    """
+
+    name = None  # type: str
+
+    def encode(self, obj):
+        # type: (Any) -> bytes
+        """Serialize obj as UTF-8 encoded JSON."""
+        raise NotImplementedError
+
+    def decode(self, data):
+        # type: (ByteString) -> Any
+        """Deserialize UTF-8 encoded JSON from a bytes-like object."""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return "<{} {}>".format(type(self).__name__, self.name)
+
+
+class _StdlibCodec(Codec):
+    name = "json"
+
+    def encode(self, obj):
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def decode(self, data):
+        return json.loads(_decode_str(data))
+
+
+class _OrjsonCodec(Codec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    def encode(self, obj):
+        return self._dumps(obj, option=self._option)
+
+    def decode(self, data):
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = memoryview(data)
+        return self._loads(data)
+
+
+class _MsgspecCodec(Codec):
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec.json
+
+        self._encode = msgspec.json.Encoder().encode
+        self._decode = msgspec.json.Decoder().decode
+
+    def encode(self, obj):
+        return self._encode(obj)
+
+    def decode(self, data):
+        return self._decode(data)
+
+
+class _UjsonCodec(Codec):
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._dumps = ujson.dumps
+        self._loads = ujson.loads
+
+    def encode(self, obj):
+        return self._dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode()
+
+    def decode(self, data):
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        return self._loads(data)
+
+
+_types = {
+    "json":    _StdlibCodec,
+    "orjson":  _OrjsonCodec,
+    "msgspec": _MsgspecCodec,
+    "ujson":   _UjsonCodec,
+}
+
+_auto_order = ["orjson", "msgspec", "ujson"]
+
+_instances = {}
+
+_default = _StdlibCodec()
+
+
+def get(name):
+    # type: (str) -> Codec
+    """Get a codec by name: "json", "orjson", "msgspec", "ujson" or "auto".
+    Raises ImportError if the named third-party package is not installed,
+    or ValueError if the name is unknown."""
+    if name == "auto":
+        for name in _auto_order:
+            try:
+                return get(name)
+            except ImportError:
+                pass
+        return get("json")
+
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+
+    try:
+        factory = _types[name]
+    except KeyError:
+        raise ValueError("unknown JSON codec: {}".format(name))
+
+    codec = _instances[name] = factory()
+    return codec
+
+
+def get_default():
+    # type: () -> Codec
+    """Get the process-wide default codec."""
+    return _default
+
+
+def set_default(codec):
+    # type: (Union[Codec, str]) -> None
+    """Set the process-wide default codec, either as a Codec instance or
+    by name (see get())."""
+    global _default
+
+    if not isinstance(codec, Codec):
+        codec = get(codec)
+
+    _default = codec
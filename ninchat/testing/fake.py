@@ -0,0 +1,287 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""In-process stand-in for the native library, for benchmarking and testing
+the Python layer of ninchat.client without the Go build or a network.  Any
+session implementation can use it:
+
+.. code-block:: python
+
+   from functools import partial
+
+   from ninchat.client.asyncio import Session
+   from ninchat.testing.fake import Transport
+
+   session = Session(transport=partial(Transport, event_rate=1000))
+
+Each session gets a thread which plays the part of the native library's
+threads.  It echoes actions back as reply events, and generates unsolicited
+events at a controlled rate.  The events are encoded as JSON and delivered
+via the same path as native ones, so the codec, the reply bookkeeping and
+the session's callback dispatch (asyncio, gevent, threaded) are exercised.
+If payload_views is enabled, the payload views refer to buffers which are
+overwritten after the callback, like the native library's.
+"""
+
+from __future__ import absolute_import
+
+__all__ = ["Transport"]
+
+import threading
+from collections import deque
+
+try:
+    from typing import Any, Dict, List, Optional
+    (Any, Dict, List, Optional)  # silence typing warnings
+except ImportError:
+    pass
+
+from ninchat.client import Error, _call_with_views, _decode_params, _event_rules, _frame_view, _monotonic, _prepare_action, _received, _rules_match, _views_supported
+from ninchat.codec import get_default as _default_codec
+
+
+class Transport(object):
+    """Fake native library instance of a session.  Keyword arguments
+    override the attributes.
+
+    .. attribute:: event_rate
+
+       Number of unsolicited events generated per second.  Events which
+       fall behind schedule are delivered in a burst.  Zero disables
+       them.
+
+    .. attribute:: event_count
+
+       Number of unsolicited events to generate, or None for no limit.
+
+    .. attribute:: event_params
+
+       Params of the unsolicited events.
+
+    .. attribute:: event_payload
+
+       Payload of the unsolicited events.
+
+    .. attribute:: reply_count
+
+       Number of reply events per action; the last one is final.  The
+       non-final ones have a decreasing "history_length" parameter, like
+       the replies to load_history.
+
+    .. attribute:: reply_event
+
+       The "event" parameter of the replies.  None means the name of the
+       action.  Otherwise the reply params are the action params.
+
+    .. attribute:: latency
+
+       Delay (in seconds) before an action is replied to.
+
+    .. attribute:: events_generated
+
+       Number of unsolicited events generated so far, including those
+       dropped by the event filter.
+
+    .. attribute:: events_delivered
+
+       Number of unsolicited events delivered to the session so far.
+
+    .. attribute:: actions_received
+
+       Number of actions sent so far.
+"""
+
+    event_rate = 0.0  # type: float
+    event_count = None  # type: Optional[int]
+    event_params = {"event": "message_received", "channel_id": "fake", "message_type": "ninchat.com/text"}  # type: Dict[str,Any]
+    event_payload = [b'{"text": "Hello, world!"}']  # type: List[bytes]
+    reply_count = 1  # type: int
+    reply_event = None  # type: Optional[str]
+    latency = 0.0  # type: float
+
+    def __init__(self, session, event_rate=None, event_count=None, event_params=None, event_payload=None, reply_count=None, reply_event=None, latency=None):
+        self.session = session
+
+        if event_rate is not None:
+            self.event_rate = event_rate
+        if event_count is not None:
+            self.event_count = event_count
+        if event_params is not None:
+            self.event_params = event_params
+        if event_payload is not None:
+            self.event_payload = event_payload
+        if reply_count is not None:
+            self.reply_count = reply_count
+        if reply_event is not None:
+            self.reply_event = reply_event
+        if latency is not None:
+            self.latency = latency
+
+        self.events_generated = 0
+        self.events_delivered = 0
+        self.actions_received = 0
+
+        self._params = {}
+        self._filter = None
+        self._cond = threading.Condition(threading.Lock())
+        self._actions = deque()
+        self._last_action_id = 0
+        self._closing = False
+
+    def set_params(self, params):
+        self._params = dict(params)
+
+    def set_event_filter(self, rules):
+        self._filter = _event_rules(rules) or None
+
+    def open(self):
+        thread = threading.Thread(target=self._run, name="ninchat-fake")
+        thread.daemon = True
+        thread.start()
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+
+    def prepare(self, params, payload):
+        with self._cond:
+            if self._closing:
+                raise Error("session closed")
+
+            params, action_id = _prepare_action(params, payload, self._last_action_id)
+            if action_id:
+                self._last_action_id = action_id
+
+        return params, action_id
+
+    def send(self, action_id, params_json, payload):
+        action = params_json, list(payload) if payload else [], _monotonic() + self.latency
+
+        with self._cond:
+            self.actions_received += 1
+            if action_id:
+                self._actions.append(action)
+                if len(self._actions) == 1:
+                    self._cond.notify()
+
+    def _run(self):
+        session = self.session
+        codec = session.codec or _default_codec()
+
+        session._call(session._handle_conn_state, "connecting")
+        session._call(session._handle_conn_state, "connected")
+        session._call(session._handle_session_event, {
+            "event":      "session_created",
+            "session_id": "fake",
+            "user_id":    "fake",
+            "user_attrs": self._params.get("user_attrs", {}),
+        })
+
+        event_json = codec.encode(self.event_params)
+        start = _monotonic()
+
+        while True:
+            with self._cond:
+                replies, events, closing = self._wait(start)
+
+            for params_json, payload, _ in replies:
+                params = codec.decode(params_json)
+                event = params.pop("action", None)
+                params.pop("frames", None)
+                if self.reply_event is not None:
+                    event = self.reply_event
+                params["event"] = event
+
+                for i in range(self.reply_count):
+                    last_reply = (i == self.reply_count - 1)
+                    if not last_reply:
+                        params["history_length"] = self.reply_count - 1 - i
+                    else:
+                        params.pop("history_length", None)
+                    self._deliver(codec.encode(params), payload, last_reply)
+
+            self.events_generated += events
+            if events and not (self._filter and _rules_match(self._filter, self.event_params)):
+                for _ in range(events):
+                    self._deliver(event_json, list(self.event_payload), False)
+                    self.events_delivered += 1
+
+            if closing:
+                break
+
+        session._call(session._handle_conn_state, "disconnected")
+        session._call(session._handle_close)
+
+    def _wait(self, start):
+        # Called with the lock held.  Returns the due actions, the number of
+        # due synthetic events, and whether the session is closing.
+        actions = self._actions
+
+        while True:
+            now = _monotonic()
+            timeout = None
+
+            replies = []
+            while actions and actions[0][2] <= now:
+                replies.append(actions.popleft())
+            if actions:
+                timeout = actions[0][2] - now
+
+            events = 0
+            rate = self.event_rate
+            remaining = None if self.event_count is None else self.event_count - self.events_generated
+            if rate > 0 and remaining != 0:
+                events = int((now - start) * rate) + 1 - self.events_generated
+                if remaining is not None:
+                    events = min(events, remaining)
+                if events <= 0:
+                    events = 0
+                    next_at = start + self.events_generated / float(rate)
+                    if timeout is None or next_at - now < timeout:
+                        timeout = next_at - now
+
+            if replies or events or self._closing:
+                return replies, events, self._closing
+
+            self._cond.wait(timeout)
+
+    def _deliver(self, params_json, payload, last_reply):
+        session = self.session
+        params = _decode_params(session, params_json)
+
+        if session.payload_views and _views_supported and not session._deferred_callbacks:
+            buffers = [bytearray(frame) for frame in payload]
+            payload = [_frame_view(buf) for buf in buffers]
+            if session.metrics is not None:
+                _received(session.metrics, params, len(params_json), payload)
+            _call_with_views(session, params, payload, last_reply)
+
+            # Like the native library, reuse the memory.
+            for buf in buffers:
+                buf[:] = b"\0" * len(buf)
+        else:
+            if session.metrics is not None:
+                _received(session.metrics, params, len(params_json), payload)
+            session._call(session._handle_event, params, payload, last_reply)
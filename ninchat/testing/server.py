@@ -0,0 +1,816 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Local stand-in for the Ninchat session service.  It speaks the WebSocket
+session protocol implemented by ninchat.client.aiohttp, and keeps all state
+in memory.  Only a subset of the API is supported: session creation and
+resumption, users (guest, user_auth and identity login), dialogues, channels,
+audience queues, send_message and load_history.
+
+.. code-block:: python
+
+   from ninchat.client.asyncio import Session
+   from ninchat.testing.server import Server
+
+   server = Server(latency=0.01)
+   await server.start()
+
+   session = Session(transport=server.transport())
+
+Setting the class attribute (ninchat.client.asyncio.Session.transport =
+server.transport()) points all asyncio sessions of the process at the
+server, including the ones created by ninchat.bot.asyncio.  Other processes
+can use the --socket-url option of bin/nincat and the bot.
+
+The server can also be run as a program::
+
+    python3 -m ninchat.testing.server --port 8080 --latency 0.05 \\
+        --queue support --agent bot@example.com:secret
+
+"""
+
+__all__ = ["Server"]
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from functools import partial
+
+from aiohttp import WSMsgType, web
+
+log = logging.getLogger(__name__)
+
+
+class _User:
+
+    __slots__ = ["id", "auth", "attrs", "identities", "sessions", "dialogues", "channels", "queues"]
+
+    def __init__(self, user_id, auth, attrs):
+        self.id = user_id
+        self.auth = auth
+        self.attrs = attrs
+        self.identities = {}  # (type, name) -> auth
+        self.sessions = set()
+        self.dialogues = {}   # peer id -> _Dialogue
+        self.channels = set()
+        self.queues = set()
+
+
+class _Dialogue:
+
+    __slots__ = ["members", "status", "history"]
+
+    def __init__(self, user_ids):
+        self.members = {user_id: {} for user_id in user_ids}
+        self.status = {user_id: "visible" for user_id in user_ids}
+        self.history = []
+
+
+class _Channel:
+
+    __slots__ = ["id", "attrs", "members", "history"]
+
+    def __init__(self, channel_id, attrs):
+        self.id = channel_id
+        self.attrs = attrs
+        self.members = set()
+        self.history = []
+
+
+class _Queue:
+
+    __slots__ = ["id", "attrs", "agents", "audience"]
+
+    def __init__(self, queue_id, attrs):
+        self.id = queue_id
+        self.attrs = attrs
+        self.agents = set()
+        self.audience = deque()
+
+    def describe(self):
+        return dict(self.attrs, length=len(self.audience))
+
+
+class _Session:
+
+    __slots__ = ["id", "user", "message_types", "event_id", "action_id", "events", "conn", "waiter", "synthesizer"]
+
+    def __init__(self, session_id, user, message_types):
+        self.id = session_id
+        self.user = user
+        self.message_types = message_types
+        self.event_id = 0
+        self.action_id = 0
+        self.events = deque()  # Unacknowledged (event_id, due, header, payload) tuples.
+        self.conn = None
+        self.waiter = None
+        self.synthesizer = None
+
+    def wants(self, message_type):
+        for pattern in self.message_types:
+            if pattern.endswith("*"):
+                if message_type.startswith(pattern[:-1]):
+                    return True
+            elif message_type == pattern:
+                return True
+        return False
+
+    def wake(self):
+        f = self.waiter
+        if f is not None and not f.done():
+            f.set_result(None)
+
+
+class _Conn:
+
+    __slots__ = ["ws", "held"]
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.held = None
+
+
+class _ActionError(Exception):
+
+    def __init__(self, error_type):
+        super().__init__(error_type)
+        self.error_type = error_type
+
+
+class Server:
+    """In-memory session server.  The start() and stop() coroutines must
+    be called in the event loop which will run it.
+
+    .. attribute:: latency
+
+       Delay (in seconds) added to the delivery of every event.  It may
+       also be a callable which returns the delay, e.g. for adding
+       jitter.  The order of events is preserved.
+
+    .. attribute:: event_rate
+
+       Number of unsolicited events per second generated for each
+       session.  The events are created by synthetic_event().  Changes
+       take effect for new sessions.
+
+    .. attribute:: actions_received
+
+       Number of actions processed so far.
+
+    .. attribute:: events_sent
+
+       Number of events written to connections so far.
+"""
+
+    latency = 0.0     # type: Union[float, Callable[[], float]]
+    event_rate = 0.0  # type: float
+
+    def __init__(self, *, host="127.0.0.1", port=0, latency=None, event_rate=None):
+        # type: (str, int, Optional[Union[float, Callable[[], float]]], Optional[float]) -> None
+        self.host = host
+        self.port = port
+        if latency is not None:
+            self.latency = latency
+        if event_rate is not None:
+            self.event_rate = event_rate
+
+        self.actions_received = 0
+        self.events_sent = 0
+
+        self._ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._users = {}
+        self._identities = {}  # (type, name) -> _User
+        self._sessions = {}
+        self._channels = {}
+        self._queues = {}
+        self._conns = set()
+        self._holding = False
+        self._runner = None
+
+    @property
+    def url(self):
+        # type: () -> str
+        """The WebSocket endpoint.  Available after start()."""
+        return "ws://{}:{}/v2/socket".format(self.host, self.port)
+
+    def transport(self, **kwargs):
+        # type: (...) -> Callable[[ninchat.client.asyncio.Session], ninchat.client.aiohttp.Transport]
+        """Returns a transport factory for ninchat.client.asyncio.Session
+        which connects to this server.  Keyword arguments are passed to
+        ninchat.client.aiohttp.Transport."""
+        from ninchat.client.aiohttp import Transport
+        return partial(Transport, url=self.url, **kwargs)
+
+    async def start(self):
+        # type: () -> None
+        app = web.Application()
+        app.router.add_get("/v2/socket", self._handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+        if not self.port:
+            self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        # type: () -> None
+        """Close all connections and forget all sessions."""
+        for s in list(self._sessions.values()):
+            self._delete_session(s)
+
+        await self._runner.cleanup()
+
+    def create_user(self, name=None, *, identity=None):
+        # type: (Optional[str], Optional[Tuple[str, str, str]]) -> str
+        """Create a user account.  The identity is a (type, name, auth)
+        tuple which can be used for logging in with the identity_type,
+        identity_name and identity_auth session params.  Returns the user
+        id."""
+        attrs = {}
+        if name is not None:
+            attrs["name"] = name
+
+        user = self._new_user(attrs)
+        if identity is not None:
+            identity_type, identity_name, identity_auth = identity
+            user.identities[(identity_type, identity_name)] = identity_auth
+            self._identities[(identity_type, identity_name)] = user
+        return user.id
+
+    def create_channel(self, name=None):
+        # type: (Optional[str]) -> str
+        """Returns the channel id.  Channels are also created by joining
+        unknown channel ids."""
+        channel = self._new_channel(self._new_id("c"), name)
+        return channel.id
+
+    def create_queue(self, name, agents=()):
+        # type: (str, Iterable[str]) -> str
+        """Create an audience queue served by the given users.  Returns
+        the queue id."""
+        queue = _Queue(self._new_id("q"), {"name": name})
+        self._queues[queue.id] = queue
+        for user_id in agents:
+            queue.agents.add(user_id)
+            self._users[user_id].queues.add(queue.id)
+        return queue.id
+
+    def hold(self):
+        # type: () -> None
+        """Stop processing received actions until release() is called.
+        Actions held by a connection which is dropped are discarded."""
+        self._holding = True
+
+    def release(self):
+        # type: () -> None
+        self._holding = False
+        for conn in list(self._conns):
+            held = conn.held
+            conn.held = None
+            for s, params, payload in held or ():
+                self._process(s, params, payload)
+
+    def drop_connections(self, lose_sessions=False):
+        # type: (bool) -> None
+        """Close all connections.  Sessions may be resumed, unless
+        lose_sessions is set."""
+        for conn in list(self._conns):
+            conn.held = None
+            asyncio.ensure_future(conn.ws.close())
+
+        if lose_sessions:
+            for s in list(self._sessions.values()):
+                self._delete_session(s)
+
+    def synthetic_event(self, session_user_id):
+        # type: (str) -> Tuple[Dict[str, Any], List[bytes]]
+        """Creates the params and payload of an unsolicited event.  The
+        default implementation returns a "user_updated" event of the
+        session's user.  May be overridden."""
+        return {"event": "user_updated", "user_id": session_user_id, "user_attrs": self._users[session_user_id].attrs}, []
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        conn = _Conn(ws)
+        self._conns.add(conn)
+        s = None
+
+        try:
+            while True:
+                params, payload = await _receive(ws)
+                if params is None:
+                    break
+
+                action = params.get("action")
+
+                if action == "create_session":
+                    if s is not None:
+                        await _send_error(ws, "session_already_exists")
+                        continue
+                    try:
+                        s = self._create_session(params)
+                    except _ActionError as e:
+                        await _send_error(ws, e.error_type)
+                        continue
+                    self._attach(s, conn, 0)
+                elif action == "resume_session" and "session_id" in params:
+                    s = self._sessions.get(params["session_id"])
+                    if s is None:
+                        await _send_error(ws, "session_not_found")
+                        continue
+                    self._acknowledge(s, params.get("event_id") or 0)
+                    self._attach(s, conn, (params.get("event_id") or 0) + 1)
+                elif s is None:
+                    await _send_error(ws, "session_not_found")
+                elif action == "resume_session":
+                    self._acknowledge(s, params.get("event_id") or 0)
+                elif self._holding:
+                    if conn.held is None:
+                        conn.held = []
+                    conn.held.append((s, params, payload))
+                else:
+                    self._process(s, params, payload)
+        finally:
+            self._conns.discard(conn)
+            if s is not None and s.conn is conn:
+                s.conn = None
+                s.wake()
+
+        return ws
+
+    def _create_session(self, params):
+        if "user_id" in params:
+            user = self._users.get(params["user_id"])
+            if user is None:
+                raise _ActionError("user_not_found")
+            if params.get("user_auth") != user.auth:
+                raise _ActionError("access_denied")
+        elif "identity_type" in params:
+            key = params["identity_type"], params.get("identity_name")
+            user = self._identities.get(key)
+            if user is None:
+                raise _ActionError("identity_not_found")
+            if params.get("identity_auth") != user.identities[key]:
+                raise _ActionError("access_denied")
+        else:
+            user = self._new_user(dict(params.get("user_attrs") or {}))
+
+        s = _Session(self._new_id("s"), user, params.get("message_types") or [])
+        self._sessions[s.id] = s
+        user.sessions.add(s)
+
+        event = {
+            "event":          "session_created",
+            "session_id":     s.id,
+            "user_id":        user.id,
+            "user_attrs":     user.attrs,
+            "user_settings":  {},
+            "user_dialogues": {peer_id: self._describe_dialogue(user, peer_id) for peer_id in user.dialogues},
+            "user_channels":  {c: {"channel_attrs": self._channels[c].attrs} for c in user.channels},
+            "user_queues":    {q: {"queue_attrs": self._queues[q].describe()} for q in user.queues},
+        }
+        if "user_id" not in params and "identity_type" not in params:
+            event["user_auth"] = user.auth
+
+        self._emit(s, event)
+
+        if self.event_rate > 0:
+            s.synthesizer = asyncio.ensure_future(self._synthesize(s, 1.0 / self.event_rate))
+
+        return s
+
+    def _attach(self, s, conn, next_event_id):
+        if s.conn is not None and s.conn is not conn:
+            asyncio.ensure_future(s.conn.ws.close())
+        s.conn = conn
+        s.wake()
+        asyncio.ensure_future(self._write(s, conn, next_event_id))
+
+    def _acknowledge(self, s, event_id):
+        events = s.events
+        while events and events[0][0] <= event_id:
+            events.popleft()
+
+    async def _write(self, s, conn, next_event_id):
+        loop = asyncio.get_event_loop()
+        ws = conn.ws
+
+        try:
+            while s.conn is conn and not ws.closed:
+                events = s.events
+                if not events or events[-1][0] < next_event_id:
+                    if s.id not in self._sessions:
+                        await ws.close()  # The final events have been written.
+                        break
+                    s.waiter = loop.create_future()
+                    await s.waiter
+                    continue
+
+                event_id, due, header, payload = events[max(next_event_id - events[0][0], 0)]
+
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                await ws.send_str(header)
+                for frame in payload:
+                    await ws.send_bytes(frame)
+
+                self.events_sent += 1
+                next_event_id = event_id + 1
+        except (ConnectionError, RuntimeError):
+            pass  # Closed.
+
+    async def _synthesize(self, s, interval):
+        loop = asyncio.get_event_loop()
+        deadline = loop.time()
+
+        while s.id in self._sessions:
+            deadline += interval
+            await asyncio.sleep(max(deadline - loop.time(), 0))
+            if s.id in self._sessions:
+                params, payload = self.synthetic_event(s.user.id)
+                self._emit(s, params, payload)
+
+    def _emit(self, s, params, payload=()):
+        s.event_id += 1
+        params = dict(params, event_id=s.event_id)
+        if payload:
+            params["frames"] = len(payload)
+
+        latency = self.latency
+        if callable(latency):
+            latency = latency()
+
+        s.events.append((s.event_id, asyncio.get_event_loop().time() + latency, json.dumps(params), list(payload)))
+        s.wake()
+
+    def _process(self, s, params, payload):
+        if s.id not in self._sessions:
+            return
+
+        action_id = params.get("action_id")
+        if action_id is not None:
+            if action_id <= s.action_id:
+                return  # Sent again after resumption.
+            s.action_id = action_id
+
+        self.actions_received += 1
+
+        handler = getattr(self, "_action_" + params.get("action", ""), None)
+        try:
+            if handler is None:
+                raise _ActionError("action_not_supported")
+            handler(s, action_id, params, payload)
+        except _ActionError as e:
+            self._emit(s, {"event": "error", "error_type": e.error_type, "action_id": action_id})
+
+    def _reply(self, s, action_id, params, payload=()):
+        if action_id is not None:
+            params = dict(params, action_id=action_id)
+        self._emit(s, params, payload)
+
+    def _broadcast(self, users, params, payload=(), reply_session=None, action_id=None):
+        for user in users:
+            for s in list(user.sessions):
+                if s is reply_session:
+                    self._reply(s, action_id, params, payload)
+                elif params["event"] != "message_received" or s.wants(params["message_type"]):
+                    self._emit(s, params, payload)
+
+    def _action_close_session(self, s, action_id, params, payload):
+        self._reply(s, action_id, {"event": "session_closed"})
+        self._delete_session(s, close=True)
+
+    def _action_describe_conn(self, s, action_id, params, payload):
+        self._reply(s, action_id, {"event": "conn_found", "user_id": s.user.id, "session_id": s.id})
+
+    def _action_describe_user(self, s, action_id, params, payload):
+        user = self._get_user(params.get("user_id", s.user.id))
+        self._reply(s, action_id, {"event": "user_found", "user_id": user.id, "user_attrs": user.attrs})
+
+    def _action_update_user(self, s, action_id, params, payload):
+        s.user.attrs.update(params.get("user_attrs") or {})
+        self._broadcast([s.user], {"event": "user_updated", "user_id": s.user.id, "user_attrs": s.user.attrs}, (), s, action_id)
+
+    def _action_create_identity(self, s, action_id, params, payload):
+        key = params.get("identity_type"), params.get("identity_name")
+        if key in self._identities:
+            raise _ActionError("identity_already_exists")
+        s.user.identities[key] = params.get("identity_auth")
+        self._identities[key] = s.user
+        self._reply(s, action_id, {"event": "identity_created", "identity_type": key[0], "identity_name": key[1]})
+
+    def _action_delete_user(self, s, action_id, params, payload):
+        user = s.user
+        if params.get("user_auth") != user.auth:
+            raise _ActionError("access_denied")
+
+        self._reply(s, action_id, {"event": "user_deleted", "user_id": user.id})
+
+        for key in user.identities:
+            del self._identities[key]
+        for channel_id in user.channels:
+            self._channels[channel_id].members.discard(user.id)
+        for queue_id in user.queues:
+            self._queues[queue_id].agents.discard(user.id)
+        del self._users[user.id]
+
+        for other in list(user.sessions):
+            self._delete_session(other, close=True)
+
+    def _action_join_channel(self, s, action_id, params, payload):
+        channel_id = params.get("channel_id")
+        channel = self._channels.get(channel_id) or self._new_channel(channel_id, None)
+        channel.members.add(s.user.id)
+        s.user.channels.add(channel.id)
+        self._broadcast([s.user], {"event": "channel_joined", "channel_id": channel.id, "channel_attrs": channel.attrs}, (), s, action_id)
+
+    def _action_part_channel(self, s, action_id, params, payload):
+        channel = self._get_channel(s, params.get("channel_id"))
+        channel.members.discard(s.user.id)
+        s.user.channels.discard(channel.id)
+        self._broadcast([s.user], {"event": "channel_parted", "channel_id": channel.id}, (), s, action_id)
+
+    def _action_send_message(self, s, action_id, params, payload):
+        sender = s.user
+
+        message = {
+            "event":             "message_received",
+            "message_id":        "{:016x}".format(next(self._message_ids)),
+            "message_time":      time.time(),
+            "message_type":      params.get("message_type"),
+            "message_user_id":   sender.id,
+            "message_user_name": sender.attrs.get("name", ""),
+        }
+        payload = list(payload)
+
+        if "channel_id" in params:
+            channel = self._get_channel(s, params["channel_id"])
+            message["channel_id"] = channel.id
+            channel.history.append((message, payload))
+            self._broadcast([self._users[u] for u in channel.members], message, payload, s, action_id)
+        elif "user_id" in params:
+            peer = self._get_user(params["user_id"])
+            d = sender.dialogues.get(peer.id)
+            if d is None:
+                d = _Dialogue((sender.id, peer.id))
+                sender.dialogues[peer.id] = d
+                peer.dialogues[sender.id] = d
+            d.history.append((message, payload))
+            self._broadcast([sender], dict(message, user_id=peer.id), payload, s, action_id)
+            if peer is not sender:
+                self._broadcast([peer], dict(message, user_id=sender.id), payload)
+        else:
+            raise _ActionError("target_not_specified")
+
+    def _action_load_history(self, s, action_id, params, payload):
+        if "channel_id" in params:
+            channel = self._get_channel(s, params["channel_id"])
+            history = channel.history
+            target = {"channel_id": channel.id}
+        elif "user_id" in params:
+            d = s.user.dialogues.get(params["user_id"])
+            if d is None:
+                raise _ActionError("dialogue_not_found")
+            history = d.history
+            target = {"user_id": params["user_id"]}
+        else:
+            raise _ActionError("target_not_specified")
+
+        message_id = params.get("message_id") or ""
+        length = params.get("history_length", 50)
+
+        if params.get("history_order") == 1:
+            messages = [m for m in history if m[0]["message_id"] > message_id][:length]
+        else:
+            messages = [m for m in history if not message_id or m[0]["message_id"] < message_id][-length:]
+            messages.reverse()
+
+        if not messages:
+            self._reply(s, action_id, dict(target, event="history_results", history_length=0))
+
+        for i, (message, message_payload) in enumerate(messages):
+            self._reply(s, action_id, dict(message, history_length=len(messages) - 1 - i, **target), message_payload)
+
+    def _action_update_dialogue(self, s, action_id, params, payload):
+        user = s.user
+        peer_id = params.get("user_id")
+        d = user.dialogues.get(peer_id)
+        if d is None:
+            raise _ActionError("dialogue_not_found")
+
+        if "dialogue_status" in params:
+            d.status[user.id] = params["dialogue_status"]
+        if "member_attrs" in params:
+            d.members[user.id].update(params["member_attrs"])
+
+        self._dialogue_updated(d, user, peer_id, s, action_id)
+
+    def _action_request_audience(self, s, action_id, params, payload):
+        queue = self._get_queue(params.get("queue_id"))
+        queue.audience.append((s.user.id, params.get("audience_metadata")))
+
+        self._reply(s, action_id, {
+            "event":          "audience_enqueued",
+            "queue_id":       queue.id,
+            "queue_attrs":    queue.describe(),
+            "queue_position": len(queue.audience),
+        })
+        self._queue_updated(queue)
+
+    def _action_accept_audience(self, s, action_id, params, payload):
+        queue = self._get_queue(params.get("queue_id"))
+        if s.user.id not in queue.agents:
+            raise _ActionError("access_denied")
+
+        while queue.audience:
+            customer = self._users.get(queue.audience.popleft()[0])
+            if customer is not None:
+                break
+        else:
+            raise _ActionError("queue_is_empty")
+
+        agent = s.user
+        d = agent.dialogues.get(customer.id)
+        if d is None:
+            d = _Dialogue((agent.id, customer.id))
+            agent.dialogues[customer.id] = d
+            customer.dialogues[agent.id] = d
+
+        d.members[customer.id]["queue_id"] = queue.id
+        d.members[agent.id].pop("audience_ended", None)
+        d.status[agent.id] = d.status[customer.id] = "visible"
+
+        self._dialogue_updated(d, agent, customer.id, s, action_id)
+        self._queue_updated(queue)
+
+    def _action_transfer_audience(self, s, action_id, params, payload):
+        agent = s.user
+        d = agent.dialogues.get(params.get("user_id"))
+        if d is None:
+            raise _ActionError("dialogue_not_found")
+        queue = self._get_queue(params.get("queue_id"))
+
+        customer_id = params["user_id"]
+        d.members[agent.id]["audience_ended"] = True
+        d.status[agent.id] = "hidden"
+        queue.audience.append((customer_id, None))
+
+        self._dialogue_updated(d, agent, customer_id, s, action_id)
+        self._queue_updated(queue)
+
+    def _dialogue_updated(self, d, user, peer_id, reply_session=None, action_id=None):
+        peer = self._users.get(peer_id)
+        event = {"event": "dialogue_updated", "dialogue_members": d.members}
+
+        self._broadcast([user], dict(event, user_id=peer_id, dialogue_status=d.status[user.id]), (), reply_session, action_id)
+        if peer is not None and peer is not user:
+            self._broadcast([peer], dict(event, user_id=user.id, dialogue_status=d.status[peer_id]))
+
+    def _queue_updated(self, queue):
+        event = {"event": "queue_updated", "queue_id": queue.id, "queue_attrs": queue.describe()}
+        self._broadcast([self._users[u] for u in queue.agents if u in self._users], event)
+
+    def _describe_dialogue(self, user, peer_id):
+        d = user.dialogues[peer_id]
+        return {"dialogue_members": d.members, "dialogue_status": d.status[user.id]}
+
+    def _get_user(self, user_id):
+        user = self._users.get(user_id)
+        if user is None:
+            raise _ActionError("user_not_found")
+        return user
+
+    def _get_channel(self, s, channel_id):
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            raise _ActionError("channel_not_found")
+        if s.user.id not in channel.members:
+            raise _ActionError("access_denied")
+        return channel
+
+    def _get_queue(self, queue_id):
+        queue = self._queues.get(queue_id)
+        if queue is None:
+            raise _ActionError("queue_not_found")
+        return queue
+
+    def _new_id(self, prefix):
+        return "{}{}".format(prefix, next(self._ids))
+
+    def _new_user(self, attrs):
+        user = _User(self._new_id("u"), self._new_id("a"), attrs)
+        self._users[user.id] = user
+        return user
+
+    def _new_channel(self, channel_id, name):
+        channel = _Channel(channel_id, {"name": name} if name else {})
+        self._channels[channel_id] = channel
+        return channel
+
+    def _delete_session(self, s, close=False):
+        self._sessions.pop(s.id, None)
+        s.user.sessions.discard(s)
+
+        if s.synthesizer is not None:
+            s.synthesizer.cancel()
+
+        conn = s.conn
+        if conn is not None:
+            if not close:
+                s.conn = None
+                asyncio.ensure_future(conn.ws.close())
+            s.wake()  # The writer closes the connection after the final events.
+
+
+async def _receive(ws):
+    msg = await ws.receive()
+    if msg.type != WSMsgType.TEXT:
+        return None, None
+
+    params = json.loads(msg.data)
+
+    payload = []
+    for _ in range(params.pop("frames", 0)):
+        msg = await ws.receive()
+        if msg.type == WSMsgType.BINARY:
+            payload.append(msg.data)
+        elif msg.type == WSMsgType.TEXT:
+            payload.append(msg.data.encode())
+        else:
+            return None, None
+
+    return params, payload
+
+
+async def _send_error(ws, error_type):
+    await ws.send_str(json.dumps({"event": "error", "error_type": error_type}))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python3 -m ninchat.testing.server")
+    parser.add_argument("--host", default="127.0.0.1", help="listening address")
+    parser.add_argument("--port", type=int, default=8080, help="listening port")
+    parser.add_argument("--latency", type=float, default=0, metavar="SECONDS", help="event delivery delay")
+    parser.add_argument("--event-rate", type=float, default=0, metavar="N", help="unsolicited events per second per session")
+    parser.add_argument("--queue", action="append", default=[], metavar="NAME", help="create an audience queue")
+    parser.add_argument("--agent", action="append", default=[], metavar="EMAIL:AUTH", help="create a user with an email identity, serving all queues")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    server = Server(host=args.host, port=args.port, latency=args.latency, event_rate=args.event_rate)
+
+    agents = []
+    for spec in args.agent:
+        email, auth = spec.split(":", 1)
+        agents.append(server.create_user(email, identity=("email", email, auth)))
+
+    for name in args.queue:
+        log.info("queue %s: %s", name, server.create_queue(name, agents))
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(server.start())
+    log.info("listening at %s", server.url)
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.stop())
+
+
+if __name__ == "__main__":
+    main()
@@ -65,6 +65,7 @@ setup(
         "ninchat/call",
         "ninchat/client",
         "ninchat/master",
+        "ninchat/testing",
     ],
 
     package_data={
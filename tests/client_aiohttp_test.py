@@ -0,0 +1,162 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import logging
+
+from ninchat.client.asyncio import Session
+from ninchat.testing.server import Server
+
+log = logging.getLogger(__name__)
+
+
+def run(test):
+    async def main():
+        server = Server()
+        await server.start()
+        try:
+            await asyncio.wait_for(test(server), 10)
+        finally:
+            await server.stop()
+
+    asyncio.get_event_loop().run_until_complete(main())
+
+
+def new_session(server, params={"user_attrs": {"name": "test"}}):
+    session_events = []
+    conn_states = []
+
+    s = Session(transport=server.transport())
+    s.on_session_event = session_events.append
+    s.on_event = lambda params, payload, last_reply: None
+    s.on_conn_state = conn_states.append
+    s.set_params(params)
+    return s, session_events, conn_states
+
+
+def test_call_and_stream():
+    async def test(server):
+        s, session_events, _ = new_session(server)
+
+        async with s as params:
+            assert params["event"] == "session_created"
+            assert s.state == "connected"
+            user_id = params["user_id"]
+
+            for text in (b"0", b"1", b"2"):
+                params, payload = await s.call({"action": "send_message", "user_id": user_id, "message_type": "ninchat.com/text"}, [text])
+                assert params["event"] == "message_received"
+                assert payload == [text]
+
+            replies = [(payload[0], last_reply) async for _, payload, last_reply in s.stream({
+                "action":        "load_history",
+                "user_id":       user_id,
+                "history_order": 1,
+            })]
+            assert replies == [(b"0", False), (b"1", False), (b"2", True)]
+
+            s.send({"action": "describe_conn", "action_id": None})
+
+        assert s.state == "closed"
+        assert len(session_events) == 1
+
+    run(test)
+
+
+def test_resume():
+    async def test(server):
+        s, session_events, conn_states = new_session(server)
+
+        async with s as params:
+            server.hold()
+            f = s.call({"action": "send_message", "user_id": params["user_id"], "message_type": "ninchat.com/text"}, [b"again"])
+            await asyncio.sleep(0.1)
+            server.drop_connections()
+            server.release()
+
+            params, payload = await f
+            assert payload == [b"again"]
+
+        assert conn_states.count("connected") == 2
+        assert len(session_events) == 1
+        assert server.actions_received == 2
+
+    run(test)
+
+
+def test_close_interrupted():
+    async def test(server):
+        s, _, conn_states = new_session(server)
+        await s.open()
+
+        server.hold()
+        closed = s.close()
+        await asyncio.sleep(0.1)
+        server.drop_connections()
+        server.release()
+
+        await closed
+        assert conn_states.count("connected") == 2
+        assert not server._sessions
+
+    run(test)
+
+
+def test_session_lost():
+    async def test(server):
+        s, session_events, _ = new_session(server)
+
+        async with s:
+            server.hold()
+            f = s.call({"action": "describe_conn"})
+            await asyncio.sleep(0.1)
+            server.drop_connections(lose_sessions=True)
+            server.release()
+
+            params, _ = await f
+            assert params["session_id"] == session_events[-1]["session_id"]
+
+        assert len(session_events) == 2
+        assert session_events[0]["session_id"] != session_events[1]["session_id"]
+
+    run(test)
+
+
+def test_create_error():
+    async def test(server):
+        s, session_events, _ = new_session(server, {"identity_type": "email", "identity_name": "nobody@example.com", "identity_auth": "x"})
+        s.open()
+
+        while not session_events:
+            await asyncio.sleep(0.01)
+        assert session_events[0]["event"] == "error"
+        assert session_events[0]["error_type"] == "identity_not_found"
+
+        s.set_params({"user_attrs": {"name": "test"}})
+        params = await s.opened
+        assert params["event"] == "session_created"
+
+        await s.close()
+
+    run(test)
@@ -24,9 +24,11 @@
 
 import asyncio
 import logging
+import time
 from functools import partial
 
 from ninchat.client.asyncio import Session
+from ninchat.testing.fake import Transport
 
 log = logging.getLogger(__name__)
 
@@ -58,3 +60,166 @@ async def async_test():
 
 def test_client_asyncio():
     asyncio.get_event_loop().run_until_complete(async_test())
+
+
+def test_client_asyncio_fake():
+    async def test():
+        s = Session(transport=partial(Transport, event_rate=1000, event_count=10, reply_count=2))
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: None
+        stream = s.events(["message_received"])
+
+        async with s:
+            replies = [last_reply async for _, _, last_reply in s.stream({"action": "load_history"})]
+            assert replies == [False, True]
+
+            events = []
+            async for params, _, _ in stream:
+                events.append(params["event"])
+                if len(events) == 10:
+                    break
+            assert events == ["message_received"] * 10
+
+    asyncio.get_event_loop().run_until_complete(test())
+
+
+def test_reply_stream_abandoned():
+    async def test():
+        s = Session(transport=partial(Transport, reply_count=50))
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: None
+
+        async with s:
+            async for _, _, last_reply in s.stream({"action": "load_history"}, maxsize=5):
+                break
+
+            params, _ = await s.call({"action": "describe_conn"}, timeout=5)
+            assert params["event"] == "describe_conn"
+            assert not s._reply_streams
+
+    asyncio.get_event_loop().run_until_complete(test())
+
+
+def test_reply_stream_bounded():
+    async def test():
+        s = Session(transport=partial(Transport, reply_count=2000))
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: None
+
+        async with s:
+            stream = s.stream({"action": "load_history"}, maxsize=10)
+            count = 0
+            buffered = 0
+
+            async for _ in stream:
+                count += 1
+                buffered = max(buffered, len(stream._buffer), stream._reserved)
+
+            assert count == 2000
+            assert buffered <= 10
+
+    asyncio.get_event_loop().run_until_complete(test())
+
+
+def test_event_stream_abandoned():
+    async def test():
+        s = Session(transport=partial(Transport, event_rate=10000, event_count=100))
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: None
+
+        async with s:
+            async for _ in s.events(["message_received"], maxsize=2, overflow="block"):
+                break
+
+            await asyncio.sleep(0.1)  # Let the transport generate the events.
+            params, _ = await s.call({"action": "describe_conn"}, timeout=5)
+            assert params["event"] == "describe_conn"
+            assert not s._streams
+
+    asyncio.get_event_loop().run_until_complete(test())
+
+
+def test_call_timeout():
+    async def test():
+        events = []
+        replies = []
+
+        s = Session(transport=partial(Transport, latency=0.2))
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: events.append(params["event"])
+
+        async with s:
+            start = time.monotonic()
+            try:
+                await s.call({"action": "describe_conn"}, on_reply=lambda *args: replies.append(args), timeout=0.05)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                assert False
+            assert time.monotonic() - start < 0.2
+            assert s._on_replies is None
+
+            await asyncio.sleep(0.3)
+            assert events == ["describe_conn"]
+            assert replies == []
+
+    asyncio.get_event_loop().run_until_complete(test())
+
+
+def test_call_cancelled():
+    async def test():
+        replies = []
+
+        s = Session(transport=partial(Transport, latency=0.1))
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: None
+
+        async with s:
+            f = s.call({"action": "describe_conn"}, on_reply=lambda *args: replies.append(args))
+            assert s._pending_replies() == 1
+            f.cancel()
+            await asyncio.sleep(0)
+            assert s._on_replies is None
+
+            await asyncio.sleep(0.2)
+            assert replies == []
+
+    asyncio.get_event_loop().run_until_complete(test())
+
+
+def test_call_many_timeout():
+    async def test():
+        s = Session(transport=partial(Transport, latency=0.2))
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: None
+        s.reply_timeout = 0.05
+
+        async with s:
+            futures = s.call_many([({"action": "describe_conn"}, None, None)] * 3)
+            done, _ = await asyncio.wait(futures, timeout=1)
+            assert len(done) == 3
+            for f in futures:
+                assert isinstance(f.exception(), asyncio.TimeoutError)
+            assert s._on_replies is None
+
+    asyncio.get_event_loop().run_until_complete(test())
+
+
+def test_call_many_cancelled():
+    async def test():
+        s = Session(transport=partial(Transport, latency=0.1))
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: None
+
+        async with s:
+            futures = s.call_many([({"action": "describe_conn"}, None, None)] * 3)
+            futures[0].cancel()
+            await asyncio.sleep(0)
+            assert s._pending_replies() == 2
+
+            for f in futures[1:]:
+                params, _ = await f
+                assert params["event"] == "describe_conn"
+            assert s._on_replies is None
+
+    asyncio.get_event_loop().run_until_complete(test())
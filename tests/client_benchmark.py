@@ -0,0 +1,803 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Client session benchmarks.  They talk to the real service (except
+dispatch, and the ones given --fake, which use the in-process fake
+library), so the absolute numbers depend on the network; compare the
+modes of a single run with each other.
+
+    python -m tests.client_benchmark batch [--count N]
+    python -m tests.client_benchmark send [--count N] [--frames N]
+    python -m tests.client_benchmark gil [--count N] [--threads N,...] [--window N]
+    python -m tests.client_benchmark pool [--count N] [--rate N]
+    python -m tests.client_benchmark idle [--counts N,...] [--asyncio]
+    python -m tests.client_benchmark loop [--count N] [--sessions N] [--fake]
+    python -m tests.client_benchmark timeout [--count N] [--fake]
+    python -m tests.client_benchmark gevent [--count N] [--idle SECONDS] [--fake] [--modes MODE,...]
+    python -m tests.client_benchmark gevent-pool [--count N] [--sessions N] [--pool N] [--delay SECONDS] [--fake]
+    python -m tests.client_benchmark dispatch [--count N] [--modes MODE,...]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import gc
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+from ninchat.client import Session
+
+log = logging.getLogger(__name__)
+
+
+def open_session(session):
+    opened = threading.Event()
+
+    session.on_session_event = lambda params: opened.set()
+    session.on_event = lambda params, payload, last_reply: None
+    session.on_close = lambda: None
+    session.set_params({"user_attrs": {"name": "ninchat-python benchmark"}})
+    session.open()
+
+    opened.wait()
+    return session
+
+
+def close_session(session):
+    closed = threading.Event()
+    session.on_close = closed.set
+    session.close()
+    closed.wait()
+
+
+def measure_replies(session, count):
+    lock = threading.Lock()
+    done = threading.Event()
+    received = [0]
+
+    def on_event(params, payload, last_reply):
+        if last_reply:
+            with lock:
+                received[0] += 1
+                if received[0] == count:
+                    done.set()
+
+    session.on_event = on_event
+
+    t = time.time()
+    c = time.process_time()
+
+    for _ in range(count):
+        session.send({"action": "describe_conn"})
+
+    done.wait()
+    return time.time() - t, time.process_time() - c
+
+
+def benchmark_batch(args):
+    """Per-event vs. batched event delivery."""
+    for batch_events in (False, True):
+        s = open_session(Session(batch_events=batch_events))
+        try:
+            elapsed, cpu = measure_replies(s, args.count)
+        finally:
+            close_session(s)
+
+        print("{:10} {:8.0f} events/s {:8.1f} us cpu/event".format(
+              "batch" if batch_events else "per-event",
+              args.count / elapsed,
+              cpu / args.count * 1e6))
+
+
+def benchmark_send(args):
+    """Steady-state Session.send() cost and Python heap usage, compared
+    with the original code path which allocated its cffi arrays on every
+    send."""
+    params = {"action": "describe_conn", "action_id": None}  # No replies.
+    payload = [b"x" * 100] * args.frames
+
+    s = open_session(Session())
+    try:
+        for name, send in (("baseline", send_baseline), ("scratch", Session.send)):
+            for _ in range(100):  # Warm up the scratch buffers.
+                send(s, params, payload)
+
+            t = time.time()
+            for _ in range(args.count):
+                send(s, params, payload)
+            elapsed = time.time() - t
+
+            # Traced separately, since tracing slows down allocations.  The
+            # event delivery thread allocates concurrently, so the median
+            # of the per-send peaks is reported.
+            gc.collect()
+            tracemalloc.start()
+            peaks = []
+            for _ in range(args.count):
+                tracemalloc.reset_peak()
+                current = tracemalloc.get_traced_memory()[0]
+                send(s, params, payload)
+                peaks.append(tracemalloc.get_traced_memory()[1] - current)
+            tracemalloc.stop()
+
+            peaks.sort()
+            print("{:8} {:8.2f} us/send {:6d} bytes allocated/send (median peak)".format(
+                  name, elapsed / args.count * 1e6, peaks[len(peaks) // 2]))
+    finally:
+        close_session(s)
+
+
+def send_baseline(session, params, payload=None):
+    # Session.send() before the scratch buffers.
+    from ninchat.client import _raise_error, ffi, lib
+    from ninchat.codec import get_default
+
+    params_json = get_default().encode(params)
+    params_ptr = ffi.from_buffer(params_json)
+
+    payload_len = len(payload) if payload else 0
+    payload_ptr = ffi.new("ninchat_frame[]", payload_len)
+    for i in range(payload_len):
+        frame = payload[i]
+        lib.set_payload_frame(payload_ptr, i, ffi.from_buffer(frame), len(frame))
+
+    action_id_ptr = ffi.new("int64_t *")
+
+    error_ptr = lib.ninchat_session_send(session._internal, params_ptr, len(params_json), payload_ptr, payload_len, action_id_ptr)
+    if error_ptr:
+        _raise_error(error_ptr)
+
+    return ffi.unpack(action_id_ptr, 1)[0]
+
+
+def benchmark_gil(args):
+    """Event throughput and reply latency while other Python threads keep
+    the GIL busy."""
+    for thread_count in [int(x) for x in args.threads.split(",")]:
+        stop = [False]
+
+        def spin():
+            n = 0
+            while not stop[0]:
+                n += 1
+
+        threads = [threading.Thread(target=spin) for _ in range(thread_count)]
+        for t in threads:
+            t.start()
+
+        s = Session()
+        s.max_inflight = args.window
+        open_session(s)
+        try:
+            latencies = []
+            done = threading.Event()
+
+            def on_reply(params, payload, last_reply, start):
+                if last_reply:
+                    latencies.append(time.perf_counter() - start)
+                    if len(latencies) == args.count:
+                        done.set()
+
+            t = time.perf_counter()
+            for _ in range(args.count):
+                start = time.perf_counter()
+                s.send({"action": "describe_conn"}, None, lambda p, pl, l, start=start: on_reply(p, pl, l, start))
+            done.wait()
+            elapsed = time.perf_counter() - t
+        finally:
+            close_session(s)
+            stop[0] = True
+            for t in threads:
+                t.join()
+
+        latencies.sort()
+        print("{:2d} busy threads {:8.0f} events/s   latency p50 {:7.2f} ms  p99 {:7.2f} ms  max {:7.2f} ms".format(
+              thread_count,
+              args.count / elapsed,
+              latencies[len(latencies) // 2] * 1e3,
+              latencies[len(latencies) * 99 // 100] * 1e3,
+              latencies[-1] * 1e3))
+
+
+def rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except IOError:
+        return 0
+
+
+def benchmark_pool(args):
+    """Memory used per idle session in a SessionPool."""
+    from ninchat.client.pool import SessionPool
+
+    class Handler(object):
+        def __init__(self):
+            self.created = threading.Event()
+
+        def on_session_event(self, params):
+            self.created.set()
+
+    pool = SessionPool()
+    pool.open_rate = args.rate
+    pool.open_burst = args.rate
+
+    gc.collect()
+    tracemalloc.start()
+    heap_before = tracemalloc.get_traced_memory()[0]
+    rss_before = rss()
+
+    handlers = [Handler() for _ in range(args.count)]
+    for i, h in enumerate(handlers):
+        pool.add(i, {"user_attrs": {"name": "ninchat-python benchmark"}}, h)
+    for h in handlers:
+        h.created.wait()
+
+    gc.collect()
+    heap = tracemalloc.get_traced_memory()[0] - heap_before
+    total = rss() - rss_before
+    tracemalloc.stop()
+
+    print("{} sessions: {:8.0f} bytes of Python heap and {:8.0f} bytes of RSS per idle session".format(
+          args.count, heap / args.count, total / args.count))
+    print(pool.health())
+
+    closed = [threading.Event() for _ in handlers]
+    for h, e in zip(handlers, closed):
+        h.on_close = e.set
+    pool.close()
+    for e in closed:
+        e.wait()
+
+
+def benchmark_idle(args):
+    """Memory used by idle (unopened) sessions."""
+    if args.asyncio:
+        import asyncio
+        from ninchat.client.asyncio import Session as AsyncioSession
+
+        loop = asyncio.new_event_loop()
+
+        def new_session():
+            return AsyncioSession(loop=loop)
+    else:
+        new_session = Session
+
+    for count in [int(x) for x in args.counts.split(",")]:
+        gc.collect()
+        tracemalloc.start()
+        heap_before = tracemalloc.get_traced_memory()[0]
+        rss_before = rss()
+
+        sessions = [new_session() for _ in range(count)]
+
+        gc.collect()
+        heap = tracemalloc.get_traced_memory()[0] - heap_before
+        total = rss() - rss_before
+        tracemalloc.stop()
+
+        print("{:7d} sessions: {:6.0f} bytes of Python heap and {:6.0f} bytes of RSS per session".format(
+              count, heap / count, total / count))
+
+        del sessions
+
+
+def benchmark_loop(args):
+    """asyncio event throughput with per-callback vs. coalesced loop
+    wakeups."""
+    import asyncio
+    from ninchat.client.asyncio import Session as AsyncioSession
+
+    class PlainSession(AsyncioSession):
+        __slots__ = []
+        coalesce_callbacks = False
+
+    transport = None
+    if args.fake:
+        from ninchat.testing.fake import Transport as transport
+
+    async def run(session_class):
+        loop = asyncio.get_event_loop()
+        sessions = [session_class(loop=loop, transport=transport) for _ in range(args.sessions)]
+
+        for s in sessions:
+            s.on_session_event = lambda params: None
+            s.on_event = lambda params, payload, last_reply: None
+            s.on_close = lambda: None
+            s.set_params({"user_attrs": {"name": "ninchat-python benchmark"}})
+        await asyncio.gather(*[s.open() for s in sessions])
+
+        try:
+            wakeups = [0]
+            call_soon_threadsafe = loop.call_soon_threadsafe
+
+            def counting_call_soon_threadsafe(*args):
+                wakeups[0] += 1
+                return call_soon_threadsafe(*args)
+
+            loop.call_soon_threadsafe = counting_call_soon_threadsafe
+
+            per_session = args.count // len(sessions)
+            t = time.time()
+            c = time.process_time()
+
+            await asyncio.gather(*[s.call({"action": "describe_conn"})
+                                   for s in sessions for _ in range(per_session)])
+
+            elapsed = time.time() - t
+            cpu = time.process_time() - c
+            del loop.call_soon_threadsafe
+        finally:
+            await asyncio.gather(*[s.close() for s in sessions])
+
+        count = per_session * len(sessions)
+        return count / elapsed, cpu / count * 1e6, wakeups[0]
+
+    for name, session_class in (("per-event", PlainSession), ("coalesced", AsyncioSession)):
+        loop = asyncio.new_event_loop()
+        try:
+            rate, cpu, wakeups = loop.run_until_complete(run(session_class))
+        finally:
+            loop.close()
+
+        print("{:10} {:8.0f} events/s {:8.1f} us cpu/event {:8d} loop wakeups".format(
+              name, rate, cpu, wakeups))
+
+
+def benchmark_timeout(args):
+    """asyncio call() cost with a timeout tracked by the session vs.
+    asyncio.wait_for()."""
+    import asyncio
+    from ninchat.client.asyncio import Session as AsyncioSession
+
+    transport = None
+    if args.fake:
+        from ninchat.testing.fake import Transport as transport
+
+    async def run(mode):
+        s = AsyncioSession(transport=transport)
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: None
+        s.set_params({"user_attrs": {"name": "ninchat-python benchmark"}})
+
+        async with s:
+            t = time.time()
+            c = time.process_time()
+
+            if mode == "timeout":
+                calls = [s.call({"action": "describe_conn"}, timeout=60) for _ in range(args.count)]
+            else:
+                calls = [asyncio.wait_for(s.call({"action": "describe_conn"}), 60) for _ in range(args.count)]
+            await asyncio.gather(*calls)
+
+            elapsed = time.time() - t
+            cpu = time.process_time() - c
+
+        return elapsed, cpu
+
+    for mode in ("timeout", "wait_for"):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            elapsed, cpu = loop.run_until_complete(run(mode))
+        finally:
+            loop.close()
+
+        print("{:8} {:6.1f} us/call {:6.1f} us cpu/call".format(
+              mode, elapsed / args.count * 1e6, cpu / args.count * 1e6))
+
+
+def benchmark_gevent(args):
+    """gevent reply latency with an otherwise idle hub, and the CPU time
+    used while idle, with the async watcher dispatcher and a replica of
+    the heartbeat polling loop which it replaced."""
+    import gevent.monkey
+    # The fake library's thread stands in for a native thread.
+    gevent.monkey.patch_all(thread=not args.fake)
+
+    import gevent
+    from gevent.event import Event
+    from ninchat.client.gevent import Session as GeventSession
+
+    transport = None
+    if args.fake:
+        from ninchat.testing.fake import Transport as transport
+
+    for mode in args.modes.split(","):
+        if mode == "heartbeat":
+            session_class = heartbeat_session_class(GeventSession)
+        else:
+            session_class = GeventSession
+
+        s = session_class(transport=transport)
+        opened = Event()
+        s.on_session_event = lambda params: opened.set()
+        s.on_event = lambda params, payload, last_reply: None
+        s.on_close = lambda: None
+        s.set_params({"user_attrs": {"name": "ninchat-python benchmark"}})
+        s.open()
+        opened.wait()
+
+        try:
+            latencies = []
+
+            for _ in range(args.count):
+                done = Event()
+                start = time.perf_counter()
+                s.send({"action": "describe_conn"}, None, lambda params, payload, last_reply: last_reply and done.set())
+                done.wait()
+                latencies.append(time.perf_counter() - start)
+                gevent.sleep(0.01)  # Let the hub go idle.
+
+            c = time.process_time()
+            gevent.sleep(args.idle)
+            idle_cpu = time.process_time() - c
+        finally:
+            closed = Event()
+            s.on_close = closed.set
+            s.close()
+            closed.wait()
+
+        latencies.sort()
+        print("{:9} latency p50 {:7.2f} ms  p99 {:7.2f} ms  max {:7.2f} ms   idle cpu {:5.1f} ms/s".format(
+              mode,
+              latencies[len(latencies) // 2] * 1e3,
+              latencies[len(latencies) * 99 // 100] * 1e3,
+              latencies[-1] * 1e3,
+              idle_cpu / args.idle * 1e3))
+
+
+def benchmark_gevent_pool(args):
+    """Time until gevent sessions have received their replies while one
+    session's reply callbacks are slow, with serial and pooled callback
+    dispatch."""
+    import gevent.monkey
+    # The fake library's thread stands in for a native thread.
+    gevent.monkey.patch_all(thread=not args.fake)
+
+    import gevent
+    from gevent.event import Event
+    from gevent.pool import Pool
+    from ninchat.client.gevent import Session as GeventSession
+
+    transport = None
+    if args.fake:
+        from ninchat.testing.fake import Transport as transport
+
+    for pool_size in (0, args.pool):
+        pool = Pool(pool_size) if pool_size else None
+        sessions = []
+
+        for i in range(args.sessions):
+            s = GeventSession(transport=transport)
+            s.callback_pool = pool
+            opened = Event()
+            s.on_session_event = lambda params, opened=opened: opened.set()
+            s.on_event = lambda params, payload, last_reply: None
+            s.on_close = lambda: None
+            s.set_params({"user_attrs": {"name": "ninchat-python benchmark"}})
+            s.open()
+            sessions.append((s, opened, Event(), [0], args.delay if i == 0 else 0))
+
+        for _, opened, _, _, _ in sessions:
+            opened.wait()
+
+        def on_reply(params, payload, last_reply, done, received, delay):
+            if delay:
+                gevent.sleep(delay)
+            received[0] += 1
+            if received[0] == args.count:
+                done.set()
+
+        t = time.time()
+        for s, _, done, received, delay in sessions:
+            for _ in range(args.count):
+                s.send({"action": "describe_conn"}, None, lambda p, pl, l, done=done, received=received, delay=delay: on_reply(p, pl, l, done, received, delay))
+
+        for _, _, done, _, _ in sessions[1:]:
+            done.wait()
+        others = time.time() - t
+        sessions[0][2].wait()
+        slow = time.time() - t
+
+        for s, _, _, _, _ in sessions:
+            closed = Event()
+            s.on_close = closed.set
+            s.close()
+            closed.wait()
+
+        print("{:8} other sessions done in {:5.2f} s, slow session in {:5.2f} s".format(
+              "Pool({})".format(pool_size) if pool else "serial", others, slow))
+
+
+def heartbeat_session_class(session_class):
+    """Returns a subclass of ninchat.client.gevent.Session which dispatches
+    callbacks like the original implementation: native threads queue
+    them and request a CPython pending call, which runs when the hub's
+    thread executes Python code, and wake up a polling greenlet via a
+    pipe at most once per poll_duration.  The greenlet keeps the thread
+    executing Python code by polling every poll_interval for
+    poll_duration after a wakeup."""
+    import ctypes
+    import gevent
+    from gevent.fileobject import FileObject
+
+    poll_duration = 1
+    poll_interval = 0.1
+
+    r, w = os.pipe()
+    os.set_blocking(w, False)
+    wakeup_recv_file = FileObject(r, "rb")
+    wakeup_send_time = [0]
+    lock = threading.Lock()
+    pending_calls = []
+
+    @ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p)
+    def invoke(arg):
+        with lock:
+            calls = pending_calls[:]
+            del pending_calls[:]
+        for sig in calls:
+            try:
+                sig[0](*sig[1:])
+            except Exception:
+                log.exception("raised by callback")
+        return 0
+
+    add_pending_call = ctypes.pythonapi.Py_AddPendingCall
+    add_pending_call.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+
+    def heartbeat_loop():
+        recv_time = 0
+        while True:
+            while time.time() < recv_time + poll_duration:
+                gevent.sleep(poll_interval)
+
+            if wakeup_recv_file.read(1):
+                recv_time = time.time()
+
+    gevent.spawn(heartbeat_loop)
+
+    class HeartbeatSession(session_class):
+        __slots__ = []
+
+        def _call(self, *sig):
+            with lock:
+                pending_calls.append(sig)
+
+            if add_pending_call(ctypes.cast(invoke, ctypes.c_void_p), None) == 0:
+                now = time.time()
+                if now - wakeup_send_time[0] > poll_duration:
+                    if os.write(w, b"\0"):
+                        wakeup_send_time[0] = now
+
+    return HeartbeatSession
+
+
+def benchmark_dispatch(args):
+    """Python-layer cost per reply and per unsolicited event, with the
+    in-process fake library instead of the native one and the network."""
+    from functools import partial
+    from ninchat.testing.fake import Transport
+
+    runners = {
+        "default":  dispatch_threads,
+        "threaded": dispatch_threads,
+        "asyncio":  dispatch_asyncio,
+        "gevent":   dispatch_gevent,
+    }
+
+    for mode in args.modes.split(","):
+        for kind in ("replies", "events"):
+            if kind == "replies":
+                transport = Transport
+            else:
+                transport = partial(Transport, event_rate=1e9, event_count=args.count)
+
+            elapsed, cpu = runners[mode](mode, kind, args.count, transport)
+
+            print("{:8} {:7} {:9.0f} events/s {:6.1f} us cpu/event".format(
+                  mode, kind, args.count / elapsed, cpu / args.count * 1e6))
+
+
+def dispatch_threads(mode, kind, count, transport):
+    from ninchat.client.threaded import Session as ThreadedSession
+
+    session_class = ThreadedSession if mode == "threaded" else Session
+    s = session_class(transport=transport)
+
+    opened = threading.Event()
+    done = threading.Event()
+    received = [0]
+
+    def on_event(params, payload, last_reply):
+        received[0] += 1
+        if received[0] == count:
+            done.set()
+
+    s.on_session_event = lambda params: opened.set()
+    s.on_event = on_event
+    s.on_close = lambda: None
+
+    t = time.time()
+    c = time.process_time()
+
+    s.open()
+    opened.wait()
+    if kind == "replies":
+        for _ in range(count):
+            s.send({"action": "describe_conn"})
+    done.wait()
+
+    elapsed = time.time() - t
+    cpu = time.process_time() - c
+
+    close_session(s)
+    return elapsed, cpu
+
+
+def dispatch_asyncio(mode, kind, count, transport):
+    import asyncio
+    from ninchat.client.asyncio import Session as AsyncioSession
+
+    async def run():
+        s = AsyncioSession(transport=transport)
+        done = asyncio.get_event_loop().create_future()
+        received = [0]
+
+        def on_event(params, payload, last_reply):
+            received[0] += 1
+            if received[0] == count:
+                done.set_result(None)
+
+        s.on_session_event = lambda params: None
+        s.on_event = on_event
+
+        t = time.time()
+        c = time.process_time()
+
+        async with s:
+            if kind == "replies":
+                for _ in range(count):
+                    s.send({"action": "describe_conn"})
+            await done
+
+            elapsed = time.time() - t
+            cpu = time.process_time() - c
+
+        return elapsed, cpu
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def dispatch_gevent(mode, kind, count, transport):
+    from gevent.event import Event
+    from ninchat.client.gevent import Session as GeventSession
+
+    s = GeventSession(transport=transport)
+    opened = Event()
+    done = Event()
+    closed = Event()
+    received = [0]
+
+    def on_event(params, payload, last_reply):
+        received[0] += 1
+        if received[0] == count:
+            done.set()
+
+    s.on_session_event = lambda params: opened.set()
+    s.on_event = on_event
+    s.on_close = closed.set
+
+    t = time.time()
+    c = time.process_time()
+
+    s.open()
+    opened.wait()
+    if kind == "replies":
+        for _ in range(count):
+            s.send({"action": "describe_conn"})
+    done.wait()
+
+    elapsed = time.time() - t
+    cpu = time.process_time() - c
+
+    s.close()
+    closed.wait()
+    return elapsed, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers()
+
+    cmd = subparsers.add_parser("batch", help=benchmark_batch.__doc__)
+    cmd.add_argument("--count", type=int, default=10000)
+    cmd.set_defaults(func=benchmark_batch)
+
+    cmd = subparsers.add_parser("send", help=benchmark_send.__doc__)
+    cmd.add_argument("--count", type=int, default=1000)
+    cmd.add_argument("--frames", type=int, default=0)
+    cmd.set_defaults(func=benchmark_send)
+
+    cmd = subparsers.add_parser("gil", help=benchmark_gil.__doc__)
+    cmd.add_argument("--count", type=int, default=10000)
+    cmd.add_argument("--threads", default="0,2,4")
+    cmd.add_argument("--window", type=int, default=100)
+    cmd.set_defaults(func=benchmark_gil)
+
+    cmd = subparsers.add_parser("pool", help=benchmark_pool.__doc__)
+    cmd.add_argument("--count", type=int, default=100)
+    cmd.add_argument("--rate", type=float, default=10)
+    cmd.set_defaults(func=benchmark_pool)
+
+    cmd = subparsers.add_parser("idle", help=benchmark_idle.__doc__)
+    cmd.add_argument("--counts", default="10000,100000")
+    cmd.add_argument("--asyncio", action="store_true")
+    cmd.set_defaults(func=benchmark_idle)
+
+    cmd = subparsers.add_parser("loop", help=benchmark_loop.__doc__)
+    cmd.add_argument("--count", type=int, default=100000)
+    cmd.add_argument("--sessions", type=int, default=10)
+    cmd.add_argument("--fake", action="store_true")
+    cmd.set_defaults(func=benchmark_loop)
+
+    cmd = subparsers.add_parser("timeout", help=benchmark_timeout.__doc__)
+    cmd.add_argument("--count", type=int, default=20000)
+    cmd.add_argument("--fake", action="store_true")
+    cmd.set_defaults(func=benchmark_timeout)
+
+    cmd = subparsers.add_parser("gevent", help=benchmark_gevent.__doc__)
+    cmd.add_argument("--count", type=int, default=200)
+    cmd.add_argument("--idle", type=float, default=5)
+    cmd.add_argument("--fake", action="store_true")
+    cmd.add_argument("--modes", default="watcher,heartbeat")
+    cmd.set_defaults(func=benchmark_gevent)
+
+    cmd = subparsers.add_parser("gevent-pool", help=benchmark_gevent_pool.__doc__)
+    cmd.add_argument("--count", type=int, default=50)
+    cmd.add_argument("--sessions", type=int, default=20)
+    cmd.add_argument("--pool", type=int, default=4)
+    cmd.add_argument("--delay", type=float, default=0.01)
+    cmd.add_argument("--fake", action="store_true")
+    cmd.set_defaults(func=benchmark_gevent_pool)
+
+    cmd = subparsers.add_parser("dispatch", help=benchmark_dispatch.__doc__)
+    cmd.add_argument("--count", type=int, default=100000)
+    cmd.add_argument("--modes", default="default,threaded,asyncio")
+    cmd.set_defaults(func=benchmark_dispatch)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
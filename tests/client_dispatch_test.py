@@ -0,0 +1,133 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ninchat.client.dispatch import ExecutorDispatcher, default_key
+
+
+def test_default_key():
+    assert default_key({"event": "message_received", "channel_id": "c", "user_id": "u"}) == "c"
+    assert default_key({"event": "message_received", "user_id": "u"}) == "u"
+    assert default_key({"event": "user_updated"}) is None
+
+
+def test_order_and_concurrency():
+    received = {}
+    lock = threading.Lock()
+    slow_started = threading.Event()
+    release = threading.Event()
+
+    def handler(params, payload, last_reply):
+        if params["channel_id"] == "slow":
+            slow_started.set()
+            release.wait(5)
+        with lock:
+            received.setdefault(params["channel_id"], []).append(params["n"])
+
+    with ThreadPoolExecutor(4) as executor:
+        d = ExecutorDispatcher(executor, handler)
+
+        for n in range(3):
+            d({"channel_id": "slow", "n": n}, [], True)
+        assert slow_started.wait(5)
+
+        for n in range(100):
+            d({"channel_id": "fast%d" % (n % 3), "n": n}, [], True)
+
+        deadline = time.time() + 5
+        while d.stats()["pending"] > 2 and time.time() < deadline:
+            time.sleep(0.01)
+
+        # The other channels complete while the slow one is stuck.
+        assert sum(len(v) for k, v in received.items() if k != "slow") == 100
+        assert "slow" not in received
+
+        release.set()
+
+    for key, values in received.items():
+        assert values == sorted(values)
+    assert received["slow"] == [0, 1, 2]
+
+    stats = d.stats()
+    assert stats["pending"] == 0
+    assert stats["running"] == 0
+    assert stats["keys"] == 0
+
+
+def test_drop():
+    release = threading.Event()
+
+    with ThreadPoolExecutor(1) as executor:
+        d = ExecutorDispatcher(executor, lambda params, payload, last_reply: release.wait(5))
+        d.max_pending = 2
+        d.overflow = "drop"
+
+        d({"channel_id": "a"}, [], True)
+        deadline = time.time() + 5
+        while d.stats()["running"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+
+        for _ in range(5):
+            d({"channel_id": "a"}, [], True)
+
+        stats = d.stats()
+        assert stats["pending"] == 2
+        assert stats["dropped"] == 3
+
+        release.set()
+
+
+def test_block():
+    release = threading.Event()
+
+    with ThreadPoolExecutor(1) as executor:
+        d = ExecutorDispatcher(executor, lambda params, payload, last_reply: release.wait(5))
+        d.max_pending = 1
+
+        d({"user_id": "a"}, [], True)
+        deadline = time.time() + 5
+        while d.stats()["running"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+
+        d({"user_id": "a"}, [], True)
+
+        def producer():
+            d({"user_id": "a"}, [], True)
+
+        t = threading.Thread(target=producer)
+        t.start()
+        t.join(0.1)
+        assert t.is_alive()
+
+        release.set()
+        t.join(5)
+        assert not t.is_alive()
+
+    assert d.stats()["blocked"] == 1
+    assert d.stats()["blocked_seconds"] > 0
@@ -0,0 +1,226 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import threading
+
+from ninchat.client import Error
+from ninchat.client.asyncio import EventStream, ReplyStream
+
+
+class FakeSession(object):
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.state = "open"
+        self.removed = []
+        self.cancelled = []
+        self._ctx = object()
+
+    def close(self):
+        self.state = "closing"
+
+    def _remove_stream(self, stream):
+        self.removed.append(stream)
+
+    def _remove_reply_stream(self, stream):
+        self.removed.append(stream)
+
+    def cancel_reply(self, action_id):
+        self.cancelled.append(action_id)
+
+
+def event(name, message_type=None):
+    params = {"event": name}
+    if message_type:
+        params["message_type"] = message_type
+    return params, [], True
+
+
+def collect(loop, stream):
+    async def run():
+        return [params["event"] async for params, _, _ in stream]
+
+    return loop.run_until_complete(run())
+
+
+def test_filter():
+    loop = asyncio.new_event_loop()
+    s = EventStream(FakeSession(loop), ["user_*", ("message_received", "ninchat.com/text")], 10, "block")
+
+    for name, message_type in [("user_updated", None),
+                               ("message_received", "ninchat.com/info/join"),
+                               ("message_received", "ninchat.com/text"),
+                               ("channel_updated", None)]:
+        item = event(name, message_type)
+        if s._matches(item[0]):
+            s._put(item)
+    s._end()
+
+    assert collect(loop, s) == ["user_updated", "message_received"]
+    loop.close()
+
+
+def test_drop_oldest():
+    loop = asyncio.new_event_loop()
+    s = EventStream(FakeSession(loop), None, 2, "drop_oldest")
+
+    for i in range(5):
+        s._put(event(str(i)))
+    s._end()
+
+    assert collect(loop, s) == ["3", "4"]
+    assert s.dropped == 3
+    loop.close()
+
+
+def test_fail():
+    loop = asyncio.new_event_loop()
+    session = FakeSession(loop)
+    s = EventStream(session, None, 2, "fail")
+
+    for i in range(3):
+        s._put(event(str(i)))
+
+    assert session.state == "closing"
+    assert session.removed == [s]
+
+    received = []
+
+    async def run():
+        async for params, _, _ in s:
+            received.append(params["event"])
+
+    try:
+        loop.run_until_complete(run())
+    except Error:
+        pass
+    else:
+        assert False
+
+    assert received == ["0", "1"]
+    loop.close()
+
+
+def test_block():
+    loop = asyncio.new_event_loop()
+    s = EventStream(FakeSession(loop), None, 2, "block")
+
+    s._reserve(2, True)
+    s._put(event("0"))
+    s._put(event("1"))
+
+    reserved = threading.Event()
+
+    def producer():
+        s._reserve(1, True)
+        reserved.set()
+
+    t = threading.Thread(target=producer)
+    t.start()
+    assert not reserved.wait(0.05)
+
+    async def take():
+        return await s.__anext__()
+
+    assert loop.run_until_complete(take())[0]["event"] == "0"
+    assert reserved.wait(5)
+    t.join()
+    loop.close()
+
+
+def test_close_ends_waiters():
+    loop = asyncio.new_event_loop()
+    s = EventStream(FakeSession(loop), None, 2, "block")
+
+    async def run():
+        loop.call_soon(s.close)
+        return [x async for x in s]
+
+    assert loop.run_until_complete(run()) == []
+    loop.close()
+
+
+def test_replies():
+    loop = asyncio.new_event_loop()
+    session = FakeSession(loop)
+    s = ReplyStream(session, 10, None)
+    s.action_id = 7
+
+    s._on_reply({"event": "message_received", "action_id": 7}, [b"1"], False)
+    s._on_reply({"event": "message_received", "action_id": 7}, [b"2"], False)
+    s._on_reply({"event": "history_results", "action_id": 7}, [], True)
+    s._on_reply({"event": "message_received", "action_id": 7}, [b"3"], False)
+
+    async def run():
+        return [(params["event"], payload, last_reply) async for params, payload, last_reply in s]
+
+    assert loop.run_until_complete(run()) == [
+        ("message_received", [b"1"], False),
+        ("message_received", [b"2"], False),
+        ("history_results", [], True),
+    ]
+    assert session.removed == [s]
+    loop.close()
+
+
+def test_replies_closed():
+    loop = asyncio.new_event_loop()
+    session = FakeSession(loop)
+    s = ReplyStream(session, 10, None)
+    s.action_id = 7
+
+    s._on_reply({"event": "message_received", "action_id": 7}, [], False)
+    session._ctx = None
+    s._on_reply(None, None, True)
+
+    received = []
+
+    async def run():
+        async for params, _, _ in s:
+            received.append(params["event"])
+
+    try:
+        loop.run_until_complete(run())
+    except Error:
+        pass
+    else:
+        assert False
+
+    assert received == ["message_received"]
+    loop.close()
+
+
+def test_replies_cancelled():
+    loop = asyncio.new_event_loop()
+    session = FakeSession(loop)
+    s = ReplyStream(session, 10, None)
+    s.action_id = 7
+
+    s._on_reply({"event": "message_received", "action_id": 7}, [], False)
+    s.close()
+
+    assert session.cancelled == [7]
+    assert collect(loop, s) == []
+    loop.close()
@@ -0,0 +1,232 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+import logging
+import threading
+import time
+from functools import partial
+
+from ninchat.client import Session
+from ninchat.client.threaded import Session as ThreadedSession
+from ninchat.testing.fake import Transport
+
+log = logging.getLogger(__name__)
+
+
+def test_call():
+    opened = threading.Event()
+    closed = threading.Event()
+    session_events = []
+
+    def on_session_event(params):
+        session_events.append(params)
+        opened.set()
+
+    s = ThreadedSession(transport=Transport)
+    s.on_session_event = on_session_event
+    s.on_event = lambda params, payload, last_reply: None
+    s.on_close = closed.set
+    s.set_params({"user_attrs": {"name": "test"}})
+    s.open()
+    opened.wait()
+
+    params = session_events[0]
+    assert params["event"] == "session_created"
+    assert params["user_attrs"] == {"name": "test"}
+
+    params, payload = s.call({"action": "send_message", "user_id": params["user_id"]}, [b"x"]).result()
+    assert params["event"] == "send_message"
+    assert payload == [b"x"]
+
+    futures = s.call_many([({"action": "describe_conn"}, None, None)] * 3)
+    assert len(set(f.result()[0]["action_id"] for f in futures)) == 3
+
+    s.close()
+    closed.wait()
+    assert s.state == "closed"
+
+
+def test_echo():
+    opened = threading.Event()
+    closed = threading.Event()
+    replies = []
+
+    s = Session(transport=partial(Transport, reply_count=3))
+    s.on_session_event = lambda params: opened.set()
+    s.on_event = lambda params, payload, last_reply: None
+    s.on_close = closed.set
+    s.set_params({"user_attrs": {"name": "test"}})
+    s.open()
+    opened.wait()
+
+    def on_reply(params, payload, last_reply):
+        replies.append((params, payload, last_reply))
+
+    s.send({"action": "load_history", "channel_id": "x"}, [b"a", b"b"], on_reply)
+    s.close()
+    closed.wait()
+
+    assert [last_reply for _, _, last_reply in replies] == [False, False, True]
+    assert [p.get("history_length") for p, _, _ in replies] == [2, 1, None]
+    for params, payload, _ in replies:
+        assert params["event"] == "load_history"
+        assert params["channel_id"] == "x"
+        assert "frames" not in params
+        assert payload == [b"a", b"b"]
+
+
+def test_event_rate():
+    closed = threading.Event()
+    events = []
+
+    s = ThreadedSession(transport=partial(Transport, event_rate=1000, event_count=50))
+    s.on_session_event = lambda params: None
+    s.on_event = lambda params, payload, last_reply: events.append(params["event"])
+    s.on_close = closed.set
+    start = time.time()
+    s.open()
+
+    while s._engine.events_generated < 50:
+        s.call({"action": "describe_conn"}).result()
+    elapsed = time.time() - start
+
+    s.close()
+    closed.wait()
+
+    assert events.count("message_received") == 50
+    assert s._engine.events_delivered == 50
+    assert elapsed > 0.04
+
+
+def test_event_filter():
+    closed = threading.Event()
+    events = []
+
+    s = ThreadedSession(transport=partial(Transport, event_rate=1000, event_count=20))
+    s.on_session_event = lambda params: None
+    s.on_event = lambda params, payload, last_reply: events.append(params["event"])
+    s.on_close = closed.set
+    s.set_event_filter([("message_received", "ninchat.com/*")])
+    s.open()
+
+    while s._engine.events_generated < 20:
+        s.call({"action": "describe_conn"}).result()
+
+    s.close()
+    closed.wait()
+
+    assert "message_received" not in events
+    assert "describe_conn" in events
+    assert s._engine.events_delivered == 0
+
+
+def deliver_payloads(on_reply, count=1):
+    opened = threading.Event()
+    closed = threading.Event()
+
+    s = Session(transport=Transport)
+    s.payload_views = True
+    s.on_session_event = lambda params: opened.set()
+    s.on_event = lambda params, payload, last_reply: None
+    s.on_close = closed.set
+    s.open()
+    opened.wait()
+
+    for _ in range(count):
+        s.send({"action": "send_message"}, [b"hello", b"world"], on_reply)
+    s.close()
+    closed.wait()
+    return s
+
+
+def test_payload_views():
+    views = []
+    copies = []
+
+    def on_reply(params, payload, last_reply):
+        assert all(isinstance(frame, memoryview) for frame in payload)
+        views.extend(payload)
+        copies.extend(bytes(frame) for frame in payload)
+
+    s = deliver_payloads(on_reply)
+
+    assert copies == [b"hello", b"world"]
+    assert s.payload_views
+
+    for view in views:
+        try:
+            view.tobytes()
+        except ValueError:
+            pass  # Released.
+        else:
+            assert False
+
+
+def test_payload_views_retained():
+    payloads = []
+
+    def on_reply(params, payload, last_reply):
+        payloads.append(payload[0][1:])  # A derived view outlives the callback.
+
+    s = deliver_payloads(on_reply, 2)
+
+    assert not s.payload_views
+    assert isinstance(payloads[0], memoryview)
+    assert payloads[1] == b"ello"
+
+
+def test_threaded_reply_order():
+    closed = threading.Event()
+    callback_threads = set()
+    replies = {}
+
+    def on_reply(params, payload, last_reply):
+        callback_threads.add(threading.current_thread())
+        replies.setdefault(params["action_id"], []).append(params.get("history_length", 0))
+
+    s = ThreadedSession(transport=partial(Transport, reply_count=201))
+    s.on_session_event = lambda params: None
+    s.on_event = lambda params, payload, last_reply: None
+    s.on_close = closed.set
+    s.open()
+
+    def send():
+        for f in [s.call({"action": "load_history"}, None, on_reply) for _ in range(5)]:
+            f.result()
+
+    threads = [threading.Thread(target=send) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    s.close()
+    closed.wait()
+
+    assert len(callback_threads) == 1
+    assert len(replies) == 40
+    for history_lengths in replies.values():
+        assert history_lengths == list(range(200, -1, -1))
@@ -0,0 +1,73 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+from _ninchat_cffi import lib
+
+from ninchat.client import Session
+
+
+def filtered(rules, params_json):
+    s = Session()
+    s.set_event_filter(rules)
+    return lib.filter_event(s._context, params_json, len(params_json))
+
+
+def test_filter_event():
+    assert filtered(["user_updated"], b'{"event":"user_updated","user_id":"x"}')
+    assert filtered(["user_*"], b'{"event":"user_updated","user_id":"x"}')
+    assert not filtered(["user_updated"], b'{"event":"user_found","user_id":"x"}')
+    assert not filtered([], b'{"event":"user_updated","user_id":"x"}')
+
+
+def test_filter_reply():
+    assert not filtered(["user_updated"], b'{"event":"user_updated","action_id":1}')
+    assert not filtered(["user_updated"], b'{"event":"user_updated", "action_id" : 1}')
+
+
+def test_filter_message_type():
+    rules = [("message_received", "ninchat.com/info/*")]
+
+    assert filtered(rules, b'{"event":"message_received","message_type":"ninchat.com/info/join"}')
+    assert filtered(rules, b'{ "event" : "message_received",\n  "message_type" : "ninchat.com/info/join" }')
+    assert not filtered(rules, b'{"event":"message_received","message_type":"ninchat.com/text"}')
+    assert not filtered(rules, b'{"event":"message_received"}')
+
+
+def test_filter_nested():
+    rules = [("message_received", "ninchat.com/info/*")]
+
+    assert not filtered(rules, b'{"event":"message_received","message_type":"ninchat.com/text","x":{"message_type":"ninchat.com/info/join"}}')
+    assert not filtered(rules, b'{"event":"message_received","x":[{"message_type":"ninchat.com/info/join"}]}')
+    assert not filtered(["user_updated"], b'{"event":"user_found","user":{"event":"user_updated"}}')
+    assert filtered(rules, b'{"x":{"message_type":"ninchat.com/text","y":"}"},"event":"message_received","message_type":"ninchat.com/info/part"}')
+
+
+def test_filter_unsure():
+    assert not filtered(["user_updated"], b'{"event":"user_updated","event":"user_updated"}')
+    assert not filtered(["user_updated"], b'{"event":"user_updated",')
+    assert not filtered(["user_updated"], b'{"ev\\u0065nt":"user_updated"}')
+    assert not filtered(["user_updated"], b'{"event":"user_\\u0075pdated"}')
+    assert not filtered(["user_updated"], b'[]')
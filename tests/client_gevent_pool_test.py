@@ -0,0 +1,75 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+import gevent
+import gevent.pool
+from gevent.event import Event
+
+from ninchat.client.gevent import Session
+from ninchat.testing.fake import Transport
+
+
+def test_callback_pool():
+    pool = gevent.pool.Pool(2)
+    calls = []
+    sessions = []
+
+    for i in range(3):
+        opened = Event()
+        closed = Event()
+
+        def on_reply(params, payload, last_reply, i=i):
+            calls.append((i, params["action_id"]))
+            gevent.sleep(0.001)  # Let the other sessions' callbacks run.
+
+        def on_close(i=i, closed=closed):
+            calls.append((i, "close"))
+            closed.set()
+
+        s = Session(transport=Transport)
+        s.callback_pool = pool
+        s.on_session_event = lambda params, opened=opened: opened.set()
+        s.on_event = lambda params, payload, last_reply: None
+        s.on_close = on_close
+        s.open()
+        sessions.append((s, opened, closed, on_reply))
+
+    for s, opened, _, on_reply in sessions:
+        opened.wait()
+        for _ in range(20):
+            s.send({"action": "describe_conn"}, None, on_reply)
+
+    for s, _, closed, _ in sessions:
+        s.close()
+    for _, _, closed, _ in sessions:
+        closed.wait()
+
+    for i in range(3):
+        session_calls = [x for j, x in calls if j == i]
+        assert session_calls == list(range(1, 21)) + ["close"]
+
+    # The sessions' callbacks were interleaved.
+    assert [j for j, _ in calls] != sorted(j for j, _ in calls)
@@ -0,0 +1,120 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+import threading
+from functools import partial
+
+from ninchat.client import Session
+from ninchat.client.metrics import Metrics
+from ninchat.testing.fake import Transport
+
+
+class FakeSession(object):
+
+    def __init__(self):
+        self._on_replies = {}
+
+    def _pending_replies(self):
+        return len(self._on_replies)
+
+
+def test_counters():
+    m = Metrics()
+    s = FakeSession()
+
+    m._action_sent(s, "send_message", 100)
+    m._action_sent(s, "send_message", 50)
+    m._action_sent(s, "describe_user", 10)
+    m._event_received("message_received", 70)
+    s._on_replies[1] = None
+
+    snapshot = m.snapshot()
+    assert snapshot["actions_out"] == {"send_message": 2, "describe_user": 1}
+    assert snapshot["bytes_out"] == {"send_message": 150, "describe_user": 10}
+    assert snapshot["events_in"] == {"message_received": 1}
+    assert snapshot["bytes_in"] == {"message_received": 70}
+    assert snapshot["pending_replies"] == 1
+
+    m.reset()
+    assert m.snapshot()["actions_out"] == {}
+
+
+def test_histograms():
+    m = Metrics(buckets=[0.1, 1])
+
+    m._reply_done("send_message", 0.05)
+    m._reply_done("send_message", 0.1)
+    m._reply_done("send_message", 0.5)
+    m._reply_done("send_message", 7)
+    m._conn_state_done("connected", 2.5)
+    m._conn_state_done("connected", 0.5)
+
+    snapshot = m.snapshot()
+    h = snapshot["reply_seconds"]["send_message"]
+    assert h["count"] == 4
+    assert h["sum"] == 7.65
+    assert h["buckets"] == [(0.1, 2), (1, 3), (float("inf"), 4)]
+    assert snapshot["conn_state_seconds"] == {"connected": 3.0}
+    assert snapshot["callback_seconds"] == {}
+
+
+def test_session():
+    m = Metrics()
+    opened = threading.Event()
+    closed = threading.Event()
+    replied = threading.Event()
+    pending = []
+
+    s = Session(transport=partial(Transport, latency=0.01))
+    s.metrics = m
+    s.on_session_event = lambda params: opened.set()
+    s.on_event = lambda params, payload, last_reply: None
+    s.on_close = closed.set
+    s.open()
+    opened.wait()
+
+    def on_reply(params, payload, last_reply):
+        if params["action_id"] == 3:
+            replied.set()
+
+    for _ in range(2):
+        s.send({"action": "send_message"}, [b"hello"], on_reply)
+    s.send({"action": "describe_conn"}, None, on_reply)
+    pending.append(m.snapshot()["pending_replies"])
+    replied.wait()
+
+    snapshot = m.snapshot()
+    s.close()
+    closed.wait()
+
+    assert pending == [3]
+    assert snapshot["pending_replies"] == 0
+    assert snapshot["actions_out"] == {"send_message": 2, "describe_conn": 1}
+    assert snapshot["bytes_out"]["send_message"] > 2 * len(b"hello")
+    assert snapshot["events_in"] == {"send_message": 2, "describe_conn": 1}
+    assert snapshot["reply_seconds"]["send_message"]["count"] == 2
+    assert snapshot["reply_seconds"]["describe_conn"]["sum"] >= 0.01
+    assert snapshot["callback_seconds"]["on_reply"]["count"] == 3
@@ -0,0 +1,67 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+from ninchat.client.params import EventParams
+from ninchat.codec import get_default
+
+
+class CountingCodec(object):
+
+    def __init__(self):
+        self.decoded = 0
+
+    def decode(self, data):
+        self.decoded += 1
+        return get_default().decode(data)
+
+
+def test_event_params_cheap():
+    codec = CountingCodec()
+    params = EventParams(b'{"action_id":3,"event":"message_received","message_type":"ninchat.com/text"}', codec)
+    assert params["event"] == "message_received"
+    assert params["action_id"] == 3
+    assert codec.decoded == 0
+
+    assert params["message_type"] == "ninchat.com/text"
+    assert codec.decoded == 1
+    assert dict(params) == {"action_id": 3, "event": "message_received", "message_type": "ninchat.com/text"}
+    assert codec.decoded == 1
+
+
+def test_event_params_absent():
+    codec = CountingCodec()
+    params = EventParams(b'{"event":"user_updated","user_id":"x"}', codec)
+    assert "action_id" not in params
+    assert params.get("action_id") is None
+    assert codec.decoded == 0
+
+
+def test_event_params_nested():
+    codec = CountingCodec()
+    params = EventParams(b'{"event":"channel_updated","channel_attrs":{"action_id":5,"event":"x"},"note":"\\"event\\":\\"y\\""}', codec)
+    assert "action_id" not in params
+    assert params["event"] == "channel_updated"
+    assert codec.decoded == 1
@@ -0,0 +1,142 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+from ninchat.client import Error
+from ninchat.client.pool import SessionPool
+
+
+class FakeSession(object):
+
+    def __init__(self):
+        self.state = "uninitialized"
+        self.params = None
+
+    def set_params(self, params):
+        self.params = params
+
+    def open(self):
+        self.state = "initialized"
+
+    def close(self):
+        self.state = "closing"
+
+
+class Handler(object):
+
+    def __init__(self):
+        self.session_events = []
+        self.closed = False
+
+    def on_session_event(self, params):
+        self.session_events.append(params["event"])
+
+    def on_close(self):
+        self.closed = True
+
+
+class Pool(SessionPool):
+    session_class = FakeSession
+    open_rate = 0.001
+    open_burst = 3
+    max_opening = 2
+
+    def _schedule(self, deadline):
+        pass
+
+
+def test_open_limits():
+    pool = Pool()
+    handlers = [Handler() for _ in range(5)]
+    for i, h in enumerate(handlers):
+        pool.add(i, {"user": i}, h)
+
+    assert [pool[i].state for i in range(5)] == ["initialized"] * 2 + ["uninitialized"] * 3
+    assert pool[1].params == {"user": 1}
+    assert pool.health()["opening"] == 2
+    assert pool.health()["queued"] == 3
+
+    pool[0].on_session_event({"event": "session_created"})
+    assert handlers[0].session_events == ["session_created"]
+    assert pool[2].state == "initialized"
+
+    # Out of rate limit tokens.
+    pool[1].on_session_event({"event": "session_created"})
+    assert pool[3].state == "uninitialized"
+    assert pool.health()["open"] == 2
+
+
+def test_error_and_remove():
+    pool = Pool()
+    h = Handler()
+    s = pool.add("x", {"user": 1}, h)
+
+    s.on_session_event({"event": "error", "error_type": "access_denied"})
+    assert pool.health()["error"] == 1
+
+    pool.set_params("x", {"user": 2})
+    assert s.params == {"user": 2}
+    assert pool.health()["opening"] == 1
+
+    pool.remove("x")
+    assert s.state == "closing"
+    assert "x" in pool
+
+    s.on_close()
+    assert h.closed
+    assert "x" not in pool
+    assert len(pool) == 0
+
+
+def test_duplicate_key():
+    created = []
+
+    class CountingPool(Pool):
+        def _new_session(self):
+            session = super(CountingPool, self)._new_session()
+            created.append(session)
+            return session
+
+    pool = CountingPool()
+    pool.add("x", {"user": 1})
+
+    try:
+        pool.add("x", {"user": 2})
+    except Error:
+        pass
+    else:
+        assert False
+
+    assert len(created) == 1
+    assert pool["x"].params == {"user": 1}
+
+
+def test_no_opening_capacity():
+    pool = Pool()
+    pool.max_opening = 0
+    pool.add("x", {"user": 1})
+
+    assert pool["x"].state == "uninitialized"
+    assert pool.health()["queued"] == 1
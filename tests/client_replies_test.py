@@ -0,0 +1,168 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+import threading
+import time
+from functools import partial
+
+from ninchat.client import Error, Session
+from ninchat.testing.fake import Transport
+
+
+def open_session(**kwargs):
+    opened = threading.Event()
+
+    s = Session(transport=partial(Transport, **kwargs))
+    s.on_session_event = lambda params: opened.set()
+    s.on_event = lambda params, payload, last_reply: None
+    s.open()
+    opened.wait()
+    return s
+
+
+def close_session(s):
+    closed = threading.Event()
+    s.on_close = closed.set
+    s.close()
+    closed.wait()
+
+
+def recorder(replies, name):
+    def on_reply(params, payload, last_reply):
+        replies.append((name, params and params["event"]))
+
+    return on_reply
+
+
+def test_expire():
+    s = open_session(latency=0.2)
+    replies = []
+
+    s.send({"action": "describe_conn"}, None, recorder(replies, "a"), timeout=0.05)
+    s.send({"action": "describe_conn"}, None, recorder(replies, "b"), timeout=10)
+    deadline = s.expire_replies()
+    assert replies == []
+
+    time.sleep(0.1)
+    assert s.expire_replies() > deadline + 5
+    assert replies == [("a", None)]
+    assert s._pending_replies() == 1
+
+    time.sleep(0.2)
+    assert replies == [("a", None), ("b", "describe_conn")]
+
+    close_session(s)
+
+
+def test_reply_timeout():
+    s = open_session(latency=0.2)
+    s.reply_timeout = 0.05
+    replies = []
+
+    s.send({"action": "describe_conn"}, None, recorder(replies, "a"))
+    time.sleep(0.1)
+
+    # Sending expires the overdue callbacks.
+    s.send({"action": "describe_conn"})
+    assert replies == [("a", None)]
+
+    time.sleep(0.2)
+    assert replies == [("a", None)]
+
+    close_session(s)
+
+
+def test_cancel():
+    s = open_session(latency=0.1)
+    replies = []
+
+    action_id = s.send({"action": "describe_conn"}, None, recorder(replies, "a"))
+    assert s.cancel_reply(action_id)
+    assert not s.cancel_reply(action_id)
+    assert s._pending_replies() == 0
+
+    time.sleep(0.2)
+    assert replies == []
+
+    close_session(s)
+
+
+def test_evict():
+    s = open_session(latency=0.1)
+    s.max_replies = 2
+    s.reply_overflow = "evict"
+    replies = []
+
+    for name in "abcd":
+        s.send({"action": "describe_conn"}, None, recorder(replies, name))
+    assert replies == [("a", None), ("b", None)]
+    assert s._pending_replies() == 2
+
+    time.sleep(0.2)
+    assert replies[2:] == [("c", "describe_conn"), ("d", "describe_conn")]
+
+    close_session(s)
+
+
+def test_raise():
+    s = open_session(latency=0.1)
+    s.max_replies = 2
+    replies = []
+
+    s.send({"action": "describe_conn"}, None, recorder(replies, "a"))
+    s.send({"action": "describe_conn"}, None, recorder(replies, "b"))
+
+    try:
+        s.send({"action": "describe_conn"}, None, recorder(replies, "c"))
+    except Error:
+        pass
+    else:
+        assert False
+    assert s._engine.actions_received == 2
+
+    # Actions without a callback aren't limited.
+    s.send({"action": "describe_conn"})
+
+    time.sleep(0.2)
+    assert replies == [("a", "describe_conn"), ("b", "describe_conn")]
+
+    close_session(s)
+
+
+def test_unknown_policy():
+    s = open_session()
+    s.max_replies = 2
+    s.reply_overflow = "evcit"
+
+    try:
+        s.send({"action": "describe_conn"}, None, lambda params, payload, last_reply: None)
+    except ValueError:
+        pass
+    else:
+        assert False
+    assert s._engine.actions_received == 0
+
+    close_session(s)
@@ -0,0 +1,135 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Concurrency stress test for client sessions: many sessions, each sending
+from several threads while callbacks run on native threads.
+
+    python -m tests.client_stress [--sessions N] [--threads N] [--actions N]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import sys
+import threading
+import time
+
+from ninchat.client import Session
+
+from .client_benchmark import close_session, open_session
+
+
+def stress_session(session, thread_count, action_count):
+    lock = threading.Lock()
+    done = threading.Event()
+    total = thread_count * action_count
+    replies = {}
+    failures = []
+
+    def on_reply(params, payload, last_reply):
+        if params is None:
+            failures.append("reply callback invoked without params")
+            return
+        if last_reply:
+            with lock:
+                action_id = params["action_id"]
+                replies[action_id] = replies.get(action_id, 0) + 1
+                if len(replies) == total:
+                    done.set()
+
+    def send():
+        for i in range(action_count):
+            if i % 10 == 0:
+                session.send_many([({"action": "describe_conn"}, None, on_reply)])
+            else:
+                session.send({"action": "describe_conn"}, None, on_reply)
+
+    threads = [threading.Thread(target=send) for _ in range(thread_count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if not done.wait(60):
+        failures.append("received {} of {} replies".format(len(replies), total))
+
+    duplicates = sum(1 for n in replies.values() if n != 1)
+    if duplicates:
+        failures.append("{} actions got multiple final replies".format(duplicates))
+    if session._on_replies:
+        failures.append("{} reply callbacks left over".format(len(session._on_replies)))
+    if session.inflight != (0, 0):
+        failures.append("in-flight window not empty: {}".format(session.inflight))
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--actions", type=int, default=250)
+    args = parser.parse_args()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print("GIL enabled:", gil)
+
+    sessions = []
+    for i in range(args.sessions):
+        s = Session(batch_events=(i % 2 == 1))
+        s.max_inflight = 64
+        s.reply_timeout = 60
+        sessions.append(open_session(s))
+
+    results = [None] * len(sessions)
+
+    def run(i):
+        results[i] = stress_session(sessions[i], args.threads, args.actions)
+
+    t = time.time()
+    runners = [threading.Thread(target=run, args=(i,)) for i in range(len(sessions))]
+    for r in runners:
+        r.start()
+    for r in runners:
+        r.join()
+    elapsed = time.time() - t
+
+    for s in sessions:
+        close_session(s)
+
+    failed = False
+    for i, failures in enumerate(results):
+        for failure in failures:
+            print("session {}: {}".format(i, failure))
+            failed = True
+
+    count = args.sessions * args.threads * args.actions
+    print("{} actions in {:.2f} s ({:.0f}/s)".format(count, elapsed, count / elapsed))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
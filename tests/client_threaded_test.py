@@ -0,0 +1,72 @@
+# Copyright (c) 2017, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+import logging
+import threading
+
+from ninchat.client.threaded import Session
+
+log = logging.getLogger(__name__)
+
+
+def test_client_threaded():
+    # Not imported at module level, so that it isn't collected twice.
+    from .client_test import test_client
+
+    test_client(Session)
+
+
+def test_client_threaded_call():
+    opened = threading.Event()
+    closed = threading.Event()
+    callback_threads = set()
+
+    def on_session_event(params):
+        callback_threads.add(threading.current_thread())
+        opened.set()
+
+    def on_event(params, payload, last_reply):
+        callback_threads.add(threading.current_thread())
+
+    s = Session()
+    s.on_session_event = on_session_event
+    s.on_event = on_event
+    s.on_close = closed.set
+    s.set_params({"user_attrs": {"name": "ninchat-python"}})
+    s.open()
+    opened.wait()
+
+    params, _ = s.call({"action": "describe_conn"}).result()
+    log.debug("called params = %s", params)
+
+    futures = s.call_many([({"action": "describe_conn"}, None, None)] * 3)
+    for f in futures:
+        assert f.result()[0]["action_id"]
+
+    s.close()
+    closed.wait()
+
+    assert len(callback_threads) == 1
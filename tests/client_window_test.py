@@ -0,0 +1,174 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+import asyncio
+import threading
+import time
+from functools import partial
+
+from ninchat.client import Error, Session
+from ninchat.client.asyncio import Session as AsyncioSession
+from ninchat.testing.fake import Transport
+
+
+def open_session(**kwargs):
+    opened = threading.Event()
+
+    s = Session(transport=partial(Transport, **kwargs))
+    s.on_session_event = lambda params: opened.set()
+    s.on_event = lambda params, payload, last_reply: None
+    s.open()
+    opened.wait()
+    return s
+
+
+def close_session(s):
+    closed = threading.Event()
+    s.on_close = closed.set
+    s.close()
+    closed.wait()
+
+
+def test_raise():
+    s = open_session(latency=0.1)
+    s.max_inflight = 2
+    s.inflight_overflow = "raise"
+    replies = []
+
+    def on_reply(params, payload, last_reply):
+        replies.append(params["event"])
+
+    s.send({"action": "describe_conn"}, None, on_reply)
+    s.send({"action": "describe_conn"}, None, on_reply)
+    assert s.inflight[0] == 2
+
+    try:
+        s.send({"action": "describe_conn"}, None, on_reply)
+    except Error:
+        pass
+    else:
+        assert False
+    assert s.inflight[0] == 2
+
+    time.sleep(0.2)
+    assert replies == ["describe_conn"] * 2
+    assert s.inflight == (0, 0)
+
+    s.send({"action": "describe_conn"}, None, on_reply)
+    close_session(s)
+
+
+def test_block():
+    s = open_session(latency=0.1)
+    s.max_inflight = 2
+    replies = []
+
+    def on_reply(params, payload, last_reply):
+        replies.append(params["event"])
+
+    start = time.time()
+    for _ in range(3):
+        s.send({"action": "describe_conn"}, None, on_reply)
+    assert time.time() - start >= 0.05
+    assert len(replies) >= 2
+
+    time.sleep(0.2)
+    assert replies == ["describe_conn"] * 3
+    assert s.inflight == (0, 0)
+
+    close_session(s)
+
+
+def test_bytes():
+    s = open_session(latency=0.1)
+    s.max_inflight_bytes = 200
+    s.inflight_overflow = "raise"
+
+    s.send({"action": "send_message"}, [b"x" * 100])
+    count, size = s.inflight
+    assert count == 1
+    assert size > 100
+
+    try:
+        s.send({"action": "send_message"}, [b"x" * 100])
+    except Error:
+        pass
+    else:
+        assert False
+
+    time.sleep(0.2)
+    assert s.inflight == (0, 0)
+
+    # Oversized actions are sent when nothing else is in flight.
+    s.send({"action": "send_message"}, [b"x" * 1000])
+    assert s.inflight[0] == 1
+
+    close_session(s)
+
+
+def test_unknown_policy():
+    s = open_session()
+    s.max_inflight = 1
+    s.inflight_overflow = "drop"
+
+    try:
+        s.send({"action": "describe_conn"})
+    except ValueError:
+        pass
+    else:
+        assert False
+    assert s.inflight == (0, 0)
+
+    close_session(s)
+
+
+def test_drain():
+    async def test():
+        s = AsyncioSession(transport=partial(Transport, latency=0.1))
+        s.on_session_event = lambda params: None
+        s.on_event = lambda params, payload, last_reply: None
+        s.max_inflight = 1
+
+        async with s:
+            f = s.call({"action": "describe_conn"})
+
+            try:
+                s.send({"action": "describe_conn"})
+            except Error:
+                pass
+            else:
+                assert False
+
+            drained = s.drain()
+            assert not drained.done()
+
+            await asyncio.wait_for(drained, 1)
+            assert f.done()
+            assert s.drain().done()
+
+            await s.call({"action": "describe_conn"})
+
+    asyncio.get_event_loop().run_until_complete(test())
@@ -0,0 +1,78 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import
+
+import json
+
+from ninchat import codec
+
+params = {
+    "action":     "send_message",
+    "user_id":    "22ouqqbp",
+    "user_attrs": {"name": "åäö \U0001f600", "admin": False},
+    "message_ttl": 1.5,
+    "history":    [1, 2, None],
+}
+
+
+def available_codecs():
+    for name in ("json", "orjson", "msgspec", "ujson"):
+        try:
+            yield codec.get(name)
+        except ImportError:
+            pass
+
+
+def test_codec_roundtrip():
+    for c in available_codecs():
+        data = c.encode(params)
+        assert isinstance(data, bytes), c
+        assert json.loads(data.decode()) == params, c
+
+        for buf in (data, bytearray(data), memoryview(data)):
+            assert c.decode(buf) == params, c
+
+
+def test_codec_default():
+    original = codec.get_default()
+    assert original.name == "json"
+
+    try:
+        codec.set_default("auto")
+        assert codec.get_default().name in ("json", "orjson", "msgspec", "ujson")
+
+        codec.set_default(codec.get("json"))
+        assert codec.get_default().name == "json"
+    finally:
+        codec.set_default(original)
+
+
+def test_codec_unknown():
+    try:
+        codec.get("yaml")
+    except ValueError:
+        pass
+    else:
+        assert False
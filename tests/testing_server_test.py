@@ -0,0 +1,170 @@
+# Copyright (c) 2026, Somia Reality Oy
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import json
+
+from ninchat.client.asyncio import Session
+from ninchat.testing.server import Server
+
+
+def run(test, **kwargs):
+    async def main():
+        server = Server(**kwargs)
+        await server.start()
+        try:
+            await asyncio.wait_for(test(server), 10)
+        finally:
+            await server.stop()
+
+    asyncio.get_event_loop().run_until_complete(main())
+
+
+async def open_session(server, params, events=None):
+    s = Session(transport=server.transport())
+    s.on_session_event = lambda params: None
+    s.on_event = lambda params, payload, last_reply: events.append((params, payload)) if events is not None else None
+    s.set_params(params)
+    return s, await s.open()
+
+
+def text(s):
+    return [json.dumps({"text": s}).encode()]
+
+
+def test_queue_and_dialogue():
+    async def test(server):
+        agent_id = server.create_user("agent", identity=("email", "agent@example.com", "secret"))
+        queue_id = server.create_queue("support", [agent_id])
+
+        agent_events = []
+        agent, params = await open_session(server, {
+            "identity_type": "email",
+            "identity_name": "agent@example.com",
+            "identity_auth": "secret",
+            "message_types": ["ninchat.com/*"],
+        }, agent_events)
+        assert params["user_id"] == agent_id
+        assert params["user_queues"][queue_id]["queue_attrs"] == {"name": "support", "length": 0}
+
+        customer, params = await open_session(server, {"user_attrs": {"name": "customer"}})
+        customer_id = params["user_id"]
+
+        params, _ = await customer.call({"action": "request_audience", "queue_id": queue_id})
+        assert params["event"] == "audience_enqueued"
+        assert params["queue_position"] == 1
+
+        params, _ = await agent.call({"action": "accept_audience", "queue_id": queue_id})
+        assert params["event"] == "dialogue_updated"
+        assert params["user_id"] == customer_id
+        assert params["dialogue_members"][customer_id]["queue_id"] == queue_id
+
+        params, _ = await agent.call({"action": "accept_audience", "queue_id": queue_id})
+        assert params["error_type"] == "queue_is_empty"
+
+        await customer.call({"action": "send_message", "user_id": agent_id, "message_type": "ninchat.com/text"}, text("hello"))
+        await agent.call({"action": "update_dialogue", "user_id": customer_id, "member_attrs": {"writing": True}})
+
+        received = [(p["message_user_id"], p["user_id"], payload) for p, payload in agent_events if p["event"] == "message_received"]
+        assert received == [(customer_id, customer_id, text("hello"))]
+
+        history = [(p["history_length"], payload) async for p, payload, _ in agent.stream({
+            "action":         "load_history",
+            "user_id":        customer_id,
+            "message_id":     "",
+            "history_length": 10,
+            "history_order":  1,
+        })]
+        assert history == [(0, text("hello"))]
+
+        await agent.close()
+        await customer.close()
+
+        # The dialogue is listed when the agent logs in again.
+        agent, params = await open_session(server, {
+            "identity_type": "email",
+            "identity_name": "agent@example.com",
+            "identity_auth": "secret",
+        })
+        assert params["user_dialogues"][customer_id]["dialogue_members"][agent_id] == {"writing": True}
+        await agent.close()
+
+    run(test)
+
+
+def test_channel():
+    async def test(server):
+        events1 = []
+        s1, params = await open_session(server, {"message_types": ["ninchat.com/text"]}, events1)
+        user_id = params["user_id"]
+        s2, _ = await open_session(server, {"user_id": user_id, "user_auth": params["user_auth"]})
+
+        params, _ = await s2.call({"action": "send_message", "channel_id": "c0", "message_type": "ninchat.com/text"}, text("x"))
+        assert params["error_type"] == "channel_not_found"
+
+        params, _ = await s2.call({"action": "join_channel", "channel_id": "c0"})
+        assert params["event"] == "channel_joined"
+
+        params, _ = await s2.call({"action": "send_message", "channel_id": "c0", "message_type": "ninchat.com/text"}, text("x"))
+        assert params["channel_id"] == "c0"
+
+        await s1.call({"action": "describe_conn"})
+        assert [(p["event"], p.get("channel_id")) for p, _ in events1[-3:]] == [
+            ("channel_joined", "c0"),
+            ("message_received", "c0"),
+            ("conn_found", None),
+        ]
+
+        await s1.close()
+        await s2.close()
+
+    run(test)
+
+
+def test_latency():
+    async def test(server):
+        s, _ = await open_session(server, {})
+
+        loop = asyncio.get_event_loop()
+        t = loop.time()
+        await asyncio.gather(*[s.call({"action": "describe_conn"}) for _ in range(10)])
+        elapsed = loop.time() - t
+        assert 0.1 <= elapsed < 0.2, elapsed
+
+        await s.close()
+
+    run(test, latency=0.1)
+
+
+def test_event_rate():
+    async def test(server):
+        events = []
+        s, _ = await open_session(server, {}, events)
+        await asyncio.sleep(0.5)
+        await s.close()
+
+        n = sum(1 for p, _ in events if p["event"] == "user_updated")
+        assert 30 <= n <= 60, n
+
+    run(test, event_rate=100)